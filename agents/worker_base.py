@@ -4,11 +4,19 @@ Provides standard structure for worker agents with LTM functionality.
 """
 
 from abc import ABC, abstractmethod
+import asyncio
 import json
 import uuid
-from typing import Any, Optional
+from typing import Any, Iterable, List, Optional, Union
 from datetime import datetime
 
+from communication.batching import MessageBatcher
+from communication.protocol import AgentStatus, MessageType
+from shared.structured_logging import get_logger
+
+
+logger = get_logger("worker")
+
 
 class AbstractWorkerAgent(ABC):
     """
@@ -54,20 +62,120 @@ class AbstractWorkerAgent(ABC):
 
     # --- Concrete Methods (Shared Communication Protocol) ---
 
+    async def process_task_async(self, task_data: dict) -> dict:
+        """
+        Async counterpart of process_task. The default runs process_task in a
+        worker thread; subclasses with non-blocking I/O should override it.
+        """
+        return await asyncio.to_thread(self.process_task, task_data)
+
     def handle_incoming_message(self, json_message: str):
         """Receives and processes an incoming JSON message from the supervisor."""
         try:
             message = json.loads(json_message)
             msg_type = message.get("type")
             
-            if msg_type == "task_assignment":
+            if msg_type == MessageType.TASK_ASSIGNMENT.value:
                 task_params = message.get("task", {}).get("parameters", {})
                 self._current_task_id = message.get("message_id")
-                print(f"[{self._id}] received task: {message['task']['name']}")
+                logger.info("Received task %s", message["task"]["name"], extra={"agent_id": self._id})
                 self._execute_task(task_params, self._current_task_id)
             
         except json.JSONDecodeError as e:
-            print(f"[{self._id}] ERROR decoding message: {e}")
+            logger.error("Error decoding message: %s", e, extra={"agent_id": self._id})
+
+    async def execute_task_async(self, task_data: dict, related_msg_id: str) -> dict:
+        """
+        Async counterpart of _execute_task that returns the completion report
+        instead of sending it, so a message bus can batch reports.
+        
+        Args:
+            task_data: The task_assignment's task parameters
+            related_msg_id: message_id of the task_assignment
+            
+        Returns:
+            Completion report (status FAILURE if process_task_async raised)
+        """
+        status = "FAILURE"
+        results = {}
+        
+        try:
+            results = await self.process_task_async(task_data)
+            status = "SUCCESS"
+        except Exception as e:
+            results = {"error": str(e), "details": "Task processing failed."}
+            logger.error("Task failed: %s", e, extra={"agent_id": self._id})
+        
+        return self.build_completion_report(related_msg_id, status, results)
+
+    async def execute_tasks_bulk(
+        self,
+        assignments: Iterable[Union[dict, str]],
+        concurrency: int = 8,
+        batch_size: int = 50,
+        flush_interval: float = 0.5
+    ) -> dict:
+        """
+        Run many task_assignment messages and report them in batches.
+        
+        At most `concurrency` tasks run at a time. Completion reports are sent
+        through send_messages in groups of `batch_size`, or earlier once the
+        oldest unsent report is `flush_interval` seconds old. A failing task
+        gets a FAILURE report and does not affect the others, as in
+        _execute_task.
+        
+        Args:
+            assignments: task_assignment messages (dictionaries or JSON strings)
+            concurrency: Tasks processed at the same time
+            batch_size: Completion reports per send_messages call
+            flush_interval: Longest time a report waits for its batch
+            
+        Returns:
+            Counts of succeeded, failed and skipped (undecodable or not a
+            task_assignment) messages, reports sent and batches
+        """
+        async def send(batch: List[dict]):
+            self.send_messages(self._supervisor_id, batch)
+        
+        batcher = MessageBatcher(send, batch_size, flush_interval)
+        counts = {"succeeded": 0, "failed": 0, "skipped": 0}
+        # Runners share one iterator, so assignments are only read as slots free up
+        pending = iter(assignments)
+        
+        async def runner():
+            for assignment in pending:
+                try:
+                    message = json.loads(assignment) if isinstance(assignment, str) else assignment
+                except json.JSONDecodeError as e:
+                    logger.error("Error decoding message: %s", e, extra={"agent_id": self._id})
+                    counts["skipped"] += 1
+                    continue
+                if message.get("type") != MessageType.TASK_ASSIGNMENT.value:
+                    counts["skipped"] += 1
+                    continue
+                
+                task_params = (message.get("task", {}) or {}).get("parameters", {}) or {}
+                report = await self.execute_task_async(task_params, message.get("message_id"))
+                counts["succeeded" if report["status"] == "SUCCESS" else "failed"] += 1
+                batcher.add(report)
+        
+        batcher.start()
+        try:
+            await asyncio.gather(*(runner() for _ in range(max(1, concurrency))))
+        finally:
+            await batcher.aclose()
+        
+        sent = batcher.stats()
+        counts.update(reports_sent=sent["sent"], batches=sent["batches"], reports_unsent=sent["queued"])
+        return counts
+
+    def send_messages(self, recipient: str, messages: List[dict]):
+        """
+        Sends several message objects at once. The default sends them one by
+        one; subclasses with a batching transport should override it.
+        """
+        for message_obj in messages:
+            self.send_message(recipient, message_obj)
 
     def _execute_task(self, task_data: dict, related_msg_id: str):
         """Executes the concrete process_task logic and handles result reporting."""
@@ -79,21 +187,37 @@ class AbstractWorkerAgent(ABC):
             status = "SUCCESS"
         except Exception as e:
             results = {"error": str(e), "details": "Task processing failed."}
-            print(f"[{self._id}] Task FAILED: {e}")
+            logger.error("Task failed: %s", e, extra={"agent_id": self._id})
             
         self._report_completion(related_msg_id, status, results)
 
-    def _report_completion(self, related_msg_id: str, status: str, results: dict):
-        """Constructs and sends a task completion report."""
-        report = {
+    def build_completion_report(self, related_msg_id: str, status: str, results: dict) -> dict:
+        """Constructs a task completion report for the supervisor."""
+        return {
             "message_id": str(uuid.uuid4()),
             "sender": self._id,
             "recipient": self._supervisor_id,
-            "type": "completion_report",
+            "type": MessageType.COMPLETION_REPORT.value,
             "related_message_id": related_msg_id,
             "status": status,
             "results": results,
             "timestamp": datetime.utcnow().isoformat() + "Z"
         }
+
+    def build_status_update(self, agent_status: AgentStatus, details: Optional[dict] = None) -> dict:
+        """Constructs a status update (IDLE, BUSY, OFFLINE, ERROR) for the supervisor."""
+        return {
+            "message_id": str(uuid.uuid4()),
+            "sender": self._id,
+            "recipient": self._supervisor_id,
+            "type": MessageType.STATUS_UPDATE.value,
+            "status": agent_status.value,
+            "details": details or {},
+            "timestamp": datetime.utcnow().isoformat() + "Z"
+        }
+
+    def _report_completion(self, related_msg_id: str, status: str, results: dict):
+        """Constructs and sends a task completion report."""
+        report = self.build_completion_report(related_msg_id, status, results)
         self.send_message(self._supervisor_id, report)
         self._current_task_id = None
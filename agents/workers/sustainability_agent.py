@@ -5,16 +5,138 @@ Analyzes carbon footprint, energy consumption, and environmental impact.
 
 import sys
 import os
-from typing import Any, Optional, Dict
-import json
+import asyncio
+from typing import Any, AsyncIterator, Optional, Dict, Tuple
+
+import httpx
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.worker_base import AbstractWorkerAgent
-from shared.ltm_storage import LTMStorage
-import httpx
-import json
+from shared.ltm_storage import create_ltm_storage, generate_key
+from shared.response_cache import ResponseCache
+from shared.gemini_client import GeminiClient
+from shared.context_cache import ContextCache
+from shared.scheduler import LLMScheduler, SchedulerFullError
+from shared.executor import BlockingExecutor
+from shared.resilience import CircuitOpenError, ResilientCaller
+from shared.deadline import Deadline
+from shared.hedging import Hedger
+from shared.rate_limiter import RateLimitedError, SharedRateLimiter
+from shared.single_flight import SingleFlight
+from shared.carbon_calculator import CarbonCalculator
+from shared.intent_router import IntentRouter
+from shared.prompt_builder import BuiltPrompt, PromptBuilder
+from shared.metrics import RESPONSES, STAGE_LATENCY
+from shared.structured_logging import get_logger
+from shared.utils import load_settings
+from communication.protocol import TaskPriority
+
+
+logger = get_logger("agent")
+
+# Canned answers per intent, used without an LLM
+RULE_BASED_RESPONSES = {
+    "carbon_footprint_analysis": """Carbon footprint analysis involves measuring total greenhouse gas emissions. Key factors include:
+
+1. Transportation: Vehicle emissions, flight miles
+2. Energy consumption: Electricity, heating, cooling
+3. Food choices: Meat vs. plant-based diets
+4. Waste generation: Recycling rates, landfill impact
+
+Average individual carbon footprint is ~4 tons CO2/year. Reduction strategies:
+- Use public transport or electric vehicles
+- Switch to renewable energy
+- Reduce meat consumption
+- Improve home insulation""",
+    "energy_consumption_tracking": """Energy consumption analysis focuses on efficiency and renewable sources:
+
+1. Audit current usage: Identify high-consumption appliances
+2. Energy efficiency: LED bulbs, Energy Star appliances
+3. Renewable energy: Solar panels, wind power options
+4. Smart systems: Thermostats, automated lighting
+
+Typical household uses 10,000 kWh/year. Reduction tips:
+- Upgrade to efficient appliances
+- Install programmable thermostats
+- Consider solar installation
+- Improve insulation and sealing""",
+    "waste_management_assessment": """Waste management assessment evaluates reduction and recycling:
+
+1. Waste audit: Track types and amounts
+2. Recycling: Proper sorting and contamination prevention
+3. Composting: Organic waste reduction
+4. Reduction: Minimize single-use items
+
+Average person generates 4.5 lbs waste/day. Best practices:
+- Implement comprehensive recycling
+- Start composting organic waste
+- Choose reusable over disposable
+- Support circular economy products""",
+    "sustainability_metrics": """Sustainability metrics turn environmental goals into numbers you can track:
+
+1. Emissions: Scope 1, 2 and 3 CO2e, total and per unit of revenue or output
+2. Energy: Consumption (kWh), intensity per m2 or employee, renewable share
+3. Resources: Water use, waste generated, recycling and diversion rates
+4. Governance: Targets, progress, and data coverage
+
+Common reporting frameworks: GHG Protocol, GRI, CDP, SASB, TCFD/ISSB and CSRD. Best practices:
+- Set a baseline year and science-based targets
+- Collect data monthly from meters and invoices
+- Report intensity metrics alongside absolute totals
+- Have key figures verified by a third party""",
+    "environmental_impact_analysis": """Environmental impact analysis looks beyond carbon to the full effect on nature:
+
+1. Climate: Greenhouse gas emissions across the life cycle
+2. Air and water: Pollutants, water withdrawal and discharge quality
+3. Land and biodiversity: Habitat loss, deforestation, land use change
+4. Resources: Raw material extraction and end-of-life waste
+
+Life cycle assessment (LCA, ISO 14040/14044) is the standard method. Key steps:
+- Define the scope and functional unit
+- Inventory inputs and outputs at every stage
+- Assess impacts per category, not just CO2
+- Focus improvements on the largest hotspots""",
+    "green_building_assessment": """Green building assessment evaluates design, construction and operation:
+
+1. Energy performance: Insulation, glazing, HVAC efficiency, on-site renewables
+2. Water efficiency: Low-flow fixtures, rainwater harvesting
+3. Materials: Recycled, local and low-carbon materials
+4. Indoor environment: Ventilation, daylight, air quality
+
+Common certifications: LEED, BREEAM, ENERGY STAR, Passive House and WELL. Buildings account for roughly 40% of energy-related emissions. Quick wins:
+- Commission an energy audit
+- Upgrade lighting to LED with occupancy controls
+- Tune or retrofit HVAC systems
+- Track performance with smart meters""",
+    "renewable_energy_recommendations": """Renewable energy recommendations for sustainability:
+
+1. Solar power: Rooftop panels, community solar
+2. Wind energy: Small turbines, utility programs
+3. Geothermal: Heat pumps for heating/cooling
+4. Hydroelectric: Micro-hydro for suitable locations
+
+Benefits:
+- Reduce carbon emissions by 80%+
+- Long-term cost savings
+- Energy independence
+- Increase property value
+
+Start with energy audit to determine best options."""
+}
+
+DEFAULT_RESPONSE = """As a Sustainability Footprint Agent, I can help you with:
+
+1. Carbon footprint analysis and reduction strategies
+2. Energy consumption tracking and optimization
+3. Waste management and recycling programs
+4. Renewable energy recommendations
+5. Green building certifications
+6. Environmental impact assessments
+7. Sustainability metrics and reporting
+
+Please provide more specific details about your sustainability concerns, and I'll provide targeted analysis and recommendations."""
 
 
 class SustainabilityFootprintAgent(AbstractWorkerAgent):
@@ -31,23 +153,63 @@ class SustainabilityFootprintAgent(AbstractWorkerAgent):
     ):
         super().__init__(agent_id, supervisor_id)
         
+        settings = load_settings()
+        ltm_config = settings.get("ltm", {}) or {}
+        
         # Initialize LTM storage
         ltm_path = os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             "shared", "LTM", "sustainability-footprint-agent"
         )
-        self.ltm = LTMStorage(ltm_path)
+        self.ltm = create_ltm_storage(ltm_path, ltm_config)
+        self.cache = ResponseCache.from_settings(self.ltm, settings)
+        # Async paths run blocking LTM I/O here instead of on the event loop
+        self.executor = BlockingExecutor.from_settings(settings)
         
         # Initialize Google Gemini API (FREE - unlimited requests, better than Groq/OpenAI)
         # Get free API key: https://aistudio.google.com/app/apikey
         self.api_key = api_key or os.getenv("GEMINI_API_KEY")
-        self.gemini_url = "https://generativelanguage.googleapis.com/v1/models/gemini-2.5-flash:generateContent"
+        self.gemini = GeminiClient.from_settings(self.api_key, settings)
+        self.scheduler = LLMScheduler.from_settings(settings)
+        # Retries transient failures and fails fast while the provider is down
+        self.resilience = ResilientCaller.from_settings(settings)
+        # Optional backup call for upstream requests slower than the recent p95 (None when disabled)
+        self.hedger = Hedger.from_settings(settings)
+        # Optional upstream quota shared with the other worker processes (None when disabled)
+        self.rate_limiter = SharedRateLimiter.from_settings(settings, os.path.join(ltm_path, "rate_limit.db"), self.executor)
+        
+        # Requests without a client deadline get the supervisor timeout
+        worker_config = (settings.get("workers", {}) or {}).get("sustainability_footprint", {}) or {}
+        self.request_timeout = float(worker_config.get("timeout", 25))
+        self.min_upstream_time = float((settings.get("deadline", {}) or {}).get("min_upstream_time", 0.5))
+        
+        # Identical concurrent requests share one upstream call
+        single_flight_config = settings.get("single_flight", {}) or {}
+        self.coalesce_requests = bool(single_flight_config.get("enabled", True))
+        self.single_flight = SingleFlight(linger=float(single_flight_config.get("linger", 1.0)))
+        
+        # Quantitative questions are answered offline from emission factors
+        calculator_config = settings.get("calculator", {}) or {}
+        self.use_calculator = bool(calculator_config.get("enabled", True))
+        self.calculator_max_activities = int(calculator_config.get("max_activities", 10000))
+        self.calculator = CarbonCalculator()
+        
+        # Clear single-intent queries get the canned answer instead of an LLM call
+        router_config = settings.get("intent_router", {}) or {}
+        self.route_locally = bool(router_config.get("enabled", True))
+        self.intent_threshold = float(router_config.get("confidence_threshold", 0.75))
+        self.intent_overview_words = int(router_config.get("overview_max_words", 8))
+        self.intent_router = IntentRouter()
+        
+        batch_config = settings.get("batch", {}) or {}
+        self.batch_max_items = int(batch_config.get("max_items", 100))
+        self.batch_concurrency = max(1, int(batch_config.get("max_concurrency", 16)))
         self.use_ai = True if self.api_key else False
         
         if self.api_key:
-            print(f"[{self._id}] Using Google Gemini 2.5 Flash (FREE, unlimited)")
+            logger.info("Using Google Gemini 2.5 Flash (FREE, unlimited)")
         else:
-            print(f"[{self._id}] No API key - using rule-based responses. Get free key: https://aistudio.google.com/app/apikey")
+            logger.warning("No API key - using rule-based responses. Get free key: https://aistudio.google.com/app/apikey")
         
         # System prompt for sustainability analysis
         self.system_prompt = """You are a Sustainability Footprint Agent, an expert AI assistant specializing in environmental impact analysis, carbon footprint calculations, energy efficiency, waste management, and sustainability metrics.
@@ -64,6 +226,11 @@ Your expertise includes:
 Provide accurate, actionable insights with specific recommendations. When providing carbon calculations, use standard emission factors. Always consider both immediate and long-term environmental impacts.
 
 Keep responses concise but informative, focusing on practical sustainability solutions."""
+        
+        # Keeps prompts for long conversations within prompt.max_prompt_tokens
+        self.prompt_builder = PromptBuilder.from_settings(self.system_prompt, settings)
+        # Optional provider-side cache of the system prompt (None when disabled)
+        self.context_cache = ContextCache.from_settings(self.gemini, self.system_prompt, settings)
     
     def process_task(self, task_data: dict) -> dict:
         """
@@ -75,6 +242,159 @@ Keep responses concise but informative, focusing on practical sustainability sol
         Returns:
             Dictionary with analysis results
         """
+        query, messages = self._extract_query(task_data)
+        use_cache = self._use_cache(task_data)
+        
+        local = self._calculate(query) or self._route(query)
+        if local is not None:
+            return local
+        
+        cache_query, semantic = self._cache_query(query, messages)
+        if use_cache:
+            cached_response = self.cache.get(cache_query, semantic)
+            if cached_response is not None:
+                return {
+                    "message": cached_response,
+                    "source": "ltm_cache",
+                    "query": query
+                }
+        
+        # Generate new response
+        response, source, prompt_tokens = self._generate_sustainability_analysis(query, messages)
+        
+        # Only LLM output is cached; rule-based fallbacks are cheap to rebuild
+        if use_cache and source == "generated":
+            self.cache.put(cache_query, response, semantic)
+        
+        return self._generated_result(response, source, query, prompt_tokens)
+    
+    async def process_task_async(self, task_data: dict) -> dict:
+        """
+        Async counterpart of process_task; the Gemini call does not block the event loop.
+        
+        Args:
+            task_data: Dictionary containing the query and parameters
+            
+        Returns:
+            Dictionary with analysis results
+        """
+        query, messages = self._extract_query(task_data)
+        priority = task_data.get("priority", TaskPriority.MEDIUM)
+        use_cache = self._use_cache(task_data)
+        
+        local = self._calculate(query) or self._route(query)
+        if local is not None:
+            return local
+        
+        cache_query, semantic = self._cache_query(query, messages)
+        if use_cache:
+            cached_response = await self.executor.run(self.cache.get, cache_query, semantic)
+            if cached_response is not None:
+                return {
+                    "message": cached_response,
+                    "source": "ltm_cache",
+                    "query": query
+                }
+        
+        response, source, prompt_tokens = await self._generate_sustainability_analysis_async(
+            query, messages, priority, task_data.get("deadline")
+        )
+        
+        if use_cache and source == "generated":
+            await self.executor.run(self.cache.put, cache_query, response, semantic)
+        
+        return self._generated_result(response, source, query, prompt_tokens)
+    
+    def _generated_result(
+        self,
+        response: str,
+        source: str,
+        query: str,
+        prompt_tokens: Optional[int]
+    ) -> dict:
+        """Task result for a generated or fallback response."""
+        result = {
+            "message": response,
+            "source": source,
+            "query": query
+        }
+        if prompt_tokens is not None:
+            result["prompt_tokens"] = prompt_tokens
+        return result
+    
+    def _calculate(self, query: str) -> Optional[dict]:
+        """
+        Answer a quantitative emissions question with the local calculator.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Task result with source "calculator", or None if the query is not
+            a calculation
+        """
+        if not self.use_calculator:
+            return None
+        
+        answer = self.calculator.answer(query)
+        if answer is None:
+            return None
+        
+        message, calculation = answer
+        return {
+            "message": message,
+            "source": "calculator",
+            "query": query,
+            "calculation": calculation
+        }
+    
+    def _route(self, query: str) -> Optional[dict]:
+        """
+        Answer a clear single-intent query with its canned response.
+        
+        With an API key only short generic overview queries are routed
+        locally; anything with numbers or names goes to Gemini, since the
+        canned text cannot answer it however confident the match.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Task result with source "rule_based", or None if routing is
+            disabled, not confident enough or the query is too specific
+        """
+        if not self.route_locally:
+            return None
+        
+        match = self.intent_router.route(query)
+        if match.intent is None or match.confidence < self.intent_threshold:
+            return None
+        if self.use_ai and not self.intent_router.is_overview(query, self.intent_overview_words):
+            return None
+        
+        return {
+            "message": RULE_BASED_RESPONSES[match.intent],
+            "source": "rule_based",
+            "query": query,
+            "intent": match.intent,
+            "intent_confidence": match.confidence
+        }
+    
+    def _use_cache(self, task_data: dict) -> bool:
+        """Per-request cache switch; falls back to the configured default."""
+        use_cache = task_data.get("use_cache")
+        return self.cache.enabled if use_cache is None else bool(use_cache)
+    
+    def _extract_query(self, task_data: dict) -> tuple:
+        """
+        Extract the query and conversation history from task data.
+        
+        Args:
+            task_data: Dictionary containing the query and/or messages
+            
+        Returns:
+            Tuple of (query, messages)
+        """
         query = task_data.get("query", "")
         messages = task_data.get("messages", [])
         
@@ -87,176 +407,291 @@ Keep responses concise but informative, focusing on practical sustainability sol
         if not query:
             raise ValueError("No query provided in task data")
         
-        # LTM caching disabled - always generate fresh responses
-        # cached_response = self.ltm.search_similar(query)
-        # if cached_response:
-        #     print(f"[{self._id}] Found cached response in LTM")
-        #     return {
-        #         "message": cached_response,
-        #         "source": "ltm_cache",
-        #         "query": query
-        #     }
+        return query, messages
+    
+    def _build_gemini_payload(self, prompt: BuiltPrompt, cached_content: Optional[str] = None) -> dict:
+        """
+        Build a native multi-turn generateContent request body.
         
-        # Generate new response
-        response = self._generate_sustainability_analysis(query, messages)
+        Conversation turns become `contents` with user/model roles (consecutive
+        turns of one role are merged) and the system prompt is sent as
+        `systemInstruction`, or referenced through a cached-content handle.
+        
+        Args:
+            prompt: Budgeted prompt from the prompt builder
+            cached_content: cachedContents name holding the system prompt
+            
+        Returns:
+            Gemini request payload
+        """
+        instructions = [prompt.system]
+        contents = []
         
-        # Store successful response in LTM (optional - currently disabled)
-        # self.ltm.store_response(query, response)
+        if prompt.summary:
+            contents.append({"role": "user", "parts": [{"text": prompt.summary}]})
         
-        return {
-            "message": response,
-            "source": "generated",
-            "query": query
+        for role, content in prompt.turns:
+            if role == "system":
+                instructions.append(content)
+                continue
+            
+            gemini_role = "model" if role == "assistant" else "user"
+            if contents and contents[-1]["role"] == gemini_role:
+                contents[-1]["parts"].append({"text": content})
+            else:
+                contents.append({"role": gemini_role, "parts": [{"text": content}]})
+        
+        payload = {
+            "contents": contents,
+            "generationConfig": {
+                "temperature": 0.8,
+                "maxOutputTokens": 800,
+                "topP": 0.9
+            }
         }
+        
+        # A cached handle only covers the static system prompt
+        if cached_content and len(instructions) == 1:
+            payload["cachedContent"] = cached_content
+        else:
+            payload["systemInstruction"] = {"parts": [{"text": text} for text in instructions]}
+        
+        return payload
+    
+    async def _cached_content(self, prompt: BuiltPrompt) -> Optional[str]:
+        """Cached system-prompt handle usable for this prompt, if any."""
+        if self.context_cache is None or any(role == "system" for role, _ in prompt.turns):
+            return None
+        return await self.context_cache.handle()
+    
+    def _rejected_handle(self, cached_content: Optional[str], error: Exception) -> bool:
+        """Whether an upstream error means the cached handle is no longer valid."""
+        if cached_content is None or not isinstance(error, httpx.HTTPStatusError):
+            return False
+        if error.response.status_code not in (400, 403, 404):
+            return False
+        self.context_cache.invalidate(cached_content)
+        return True
+    
+    def _call_gemini_sync(self, prompt: BuiltPrompt) -> dict:
+        """Blocking generateContent call, using an existing cached handle if there is one."""
+        cached = None
+        if self.context_cache is not None and not any(role == "system" for role, _ in prompt.turns):
+            cached = self.context_cache.current()
+        
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire_sync()
+        
+        try:
+            return self.gemini.generate_sync(self._build_gemini_payload(prompt, cached))
+        except Exception as e:
+            if not self._rejected_handle(cached, e):
+                raise
+            return self.gemini.generate_sync(self._build_gemini_payload(prompt))
+    
+    async def _call_gemini(self, prompt: BuiltPrompt) -> dict:
+        """generateContent call that falls back to an inline system prompt if the handle is rejected."""
+        cached = await self._cached_content(prompt)
+        try:
+            return await self.gemini.generate(self._build_gemini_payload(prompt, cached))
+        except Exception as e:
+            if not self._rejected_handle(cached, e):
+                raise
+            return await self.gemini.generate(self._build_gemini_payload(prompt))
+    
+    async def _stream_gemini(self, prompt: BuiltPrompt) -> AsyncIterator[dict]:
+        """streamGenerateContent call with the same cached-handle fallback as _call_gemini."""
+        cached = await self._cached_content(prompt)
+        received = False
+        try:
+            async for chunk in self.gemini.stream(self._build_gemini_payload(prompt, cached)):
+                received = True
+                yield chunk
+        except Exception as e:
+            if received or not self._rejected_handle(cached, e):
+                raise
+            async for chunk in self.gemini.stream(self._build_gemini_payload(prompt)):
+                yield chunk
+    
+    def _build_prompt(self, query: str, messages: list = None) -> BuiltPrompt:
+        """Build a budgeted prompt, noting when older turns had to be condensed."""
+        with STAGE_LATENCY.time("prompt_build"):
+            prompt = self.prompt_builder.build(query, messages)
+        if prompt.summarized_turns or prompt.dropped_turns:
+            logger.debug(
+                "Prompt compacted to ~%d tokens (%d turns summarized, %d dropped)",
+                prompt.prompt_tokens, prompt.summarized_turns, prompt.dropped_turns
+            )
+        return prompt
+    
+    def _prompt_tokens(self, result: dict, prompt: BuiltPrompt) -> int:
+        """Prompt tokens reported by Gemini, or the local estimate if absent."""
+        usage = result.get("usageMetadata") or {}
+        return usage.get("promptTokenCount", prompt.prompt_tokens)
     
-    def _generate_sustainability_analysis(self, query: str, messages: list = None) -> str:
+    def _extract_gemini_text(self, result: dict) -> Optional[str]:
         """
-        Generate sustainability analysis using OpenAI or rule-based approach.
+        Extract generated text from a Gemini response.
+        
+        Args:
+            result: Decoded generateContent response
+            
+        Returns:
+            Generated text, or None if the response has no candidates
+        """
+        if "candidates" in result and len(result["candidates"]) > 0:
+            content = result["candidates"][0]["content"]["parts"][0]["text"]
+            return content.strip()
+        
+        logger.warning("Unexpected Gemini response format")
+        return None
+    
+    def _generate_sustainability_analysis(self, query: str, messages: list = None) -> tuple:
+        """
+        Generate sustainability analysis using Gemini or rule-based approach.
         
         Args:
             query: User query
             messages: Conversation history
             
         Returns:
-            Analysis response
+            Tuple of (analysis response, source, prompt tokens) where source is
+            "generated" or "rule_based" and prompt tokens is None if no prompt
+            was sent
         """
         if not self.use_ai:
-            return self._rule_based_response(query)
+            return self._rule_based_response(query), "rule_based", None
             
         try:
-            # Build conversation context for Gemini
-            conversation_text = f"{self.system_prompt}\n\n"
-            
-            if messages:
-                for msg in messages:
-                    role = msg.get("role", "user")
-                    content = msg.get("content", "")
-                    conversation_text += f"{role.capitalize()}: {content}\n"
-            
-            conversation_text += f"\nUser: {query}\nAssistant:"
-            
-            # Call Google Gemini API
-            url = f"{self.gemini_url}?key={self.api_key}"
-            headers = {"Content-Type": "application/json"}
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": conversation_text
-                    }]
-                }],
-                "generationConfig": {
-                    "temperature": 0.8,
-                    "maxOutputTokens": 800,
-                    "topP": 0.9
-                }
-            }
-            
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
-                result = response.json()
-                
-                # Extract generated text from Gemini response
-                if "candidates" in result and len(result["candidates"]) > 0:
-                    content = result["candidates"][0]["content"]["parts"][0]["text"]
-                    return content.strip()
-                else:
-                    print(f"[{self._id}] Unexpected Gemini response format")
-                    return self._rule_based_response(query)
+            prompt = self._build_prompt(query, messages)
+            result = self.resilience.call_sync(lambda: self._call_gemini_sync(prompt))
+            text = self._extract_gemini_text(result)
+            if text:
+                return text, "generated", self._prompt_tokens(result, prompt)
+        
+        except (CircuitOpenError, RateLimitedError):
+            # Provider is known to be down or over quota; answer locally without waiting
+            pass
         
         except Exception as e:
-            print(f"[{self._id}] Error calling Gemini API: {e}")
-            return self._rule_based_response(query)
+            logger.error("Error calling Gemini API: %s", e)
+        
+        return self._rule_based_response(query), "rule_based", None
     
-    def _rule_based_response(self, query: str) -> str:
+    async def _generate_sustainability_analysis_async(
+        self,
+        query: str,
+        messages: list = None,
+        priority: TaskPriority = TaskPriority.MEDIUM,
+        deadline: Optional[Deadline] = None
+    ) -> tuple:
         """
-        Fallback rule-based response when OpenAI is not available.
+        Async counterpart of _generate_sustainability_analysis using the pooled client.
+        Upstream calls go through the scheduler, so at most max_in_flight run at once,
+        and are cancelled (falling back to the rule-based answer) at the deadline.
         
         Args:
             query: User query
+            messages: Conversation history
+            priority: Scheduler lane for the upstream call
+            deadline: Request deadline (defaults to request_timeout from now)
             
         Returns:
-            Rule-based response
+            Tuple of (analysis response, source, prompt tokens)
+            
+        Raises:
+            SchedulerFullError: If the scheduler queue is full
         """
-        query_lower = query.lower()
+        if not self.use_ai:
+            return self._rule_based_response(query), "rule_based", None
         
-        if any(word in query_lower for word in ["carbon", "footprint", "co2", "emissions"]):
-            return """Carbon footprint analysis involves measuring total greenhouse gas emissions. Key factors include:
-
-1. Transportation: Vehicle emissions, flight miles
-2. Energy consumption: Electricity, heating, cooling
-3. Food choices: Meat vs. plant-based diets
-4. Waste generation: Recycling rates, landfill impact
-
-Average individual carbon footprint is ~4 tons CO2/year. Reduction strategies:
-- Use public transport or electric vehicles
-- Switch to renewable energy
-- Reduce meat consumption
-- Improve home insulation"""
+        deadline = deadline or Deadline(self.request_timeout)
+        if not self._has_upstream_time(deadline):
+            return self._rule_based_response(query), "rule_based", None
+            
+        try:
+            prompt = self._build_prompt(query, messages)
+            result = await asyncio.wait_for(
+                self.resilience.call(lambda: self._hedged_call(prompt, priority), deadline),
+                deadline.remaining()
+            )
+            text = self._extract_gemini_text(result)
+            if text:
+                return text, "generated", self._prompt_tokens(result, prompt)
         
-        elif any(word in query_lower for word in ["energy", "consumption", "electricity"]):
-            return """Energy consumption analysis focuses on efficiency and renewable sources:
-
-1. Audit current usage: Identify high-consumption appliances
-2. Energy efficiency: LED bulbs, Energy Star appliances
-3. Renewable energy: Solar panels, wind power options
-4. Smart systems: Thermostats, automated lighting
-
-Typical household uses 10,000 kWh/year. Reduction tips:
-- Upgrade to efficient appliances
-- Install programmable thermostats
-- Consider solar installation
-- Improve insulation and sealing"""
+        except SchedulerFullError:
+            raise
         
-        elif any(word in query_lower for word in ["waste", "recycling", "trash"]):
-            return """Waste management assessment evaluates reduction and recycling:
-
-1. Waste audit: Track types and amounts
-2. Recycling: Proper sorting and contamination prevention
-3. Composting: Organic waste reduction
-4. Reduction: Minimize single-use items
-
-Average person generates 4.5 lbs waste/day. Best practices:
-- Implement comprehensive recycling
-- Start composting organic waste
-- Choose reusable over disposable
-- Support circular economy products"""
+        except (CircuitOpenError, RateLimitedError):
+            pass
         
-        elif any(word in query_lower for word in ["renewable", "solar", "wind"]):
-            return """Renewable energy recommendations for sustainability:
-
-1. Solar power: Rooftop panels, community solar
-2. Wind energy: Small turbines, utility programs
-3. Geothermal: Heat pumps for heating/cooling
-4. Hydroelectric: Micro-hydro for suitable locations
-
-Benefits:
-- Reduce carbon emissions by 80%+
-- Long-term cost savings
-- Energy independence
-- Increase property value
-
-Start with energy audit to determine best options."""
+        except asyncio.TimeoutError:
+            logger.warning("Gemini call cancelled at the request deadline")
         
-        else:
-            return """As a Sustainability Footprint Agent, I can help you with:
-
-1. Carbon footprint analysis and reduction strategies
-2. Energy consumption tracking and optimization
-3. Waste management and recycling programs
-4. Renewable energy recommendations
-5. Green building certifications
-6. Environmental impact assessments
-7. Sustainability metrics and reporting
-
-Please provide more specific details about your sustainability concerns, and I'll provide targeted analysis and recommendations."""
+        except Exception as e:
+            logger.error("Error calling Gemini API: %s", e)
+        
+        return self._rule_based_response(query), "rule_based", None
+    
+    def _has_upstream_time(self, deadline: Deadline) -> bool:
+        """Whether enough of the deadline is left to be worth calling Gemini."""
+        if deadline.remaining() >= self.min_upstream_time:
+            return True
+        logger.info("%.2fs left before the deadline, answering locally", deadline.remaining())
+        return False
+    
+    def _can_hedge(self) -> bool:
+        """Hedge only with spare capacity; duplicating queued work adds load without cutting latency."""
+        return self.scheduler.queue_depth == 0 and self.scheduler.in_flight < self.scheduler.max_in_flight
+    
+    async def _hedged_call(self, prompt: BuiltPrompt, priority: TaskPriority) -> dict:
+        """One upstream attempt, with a backup call if it runs past the hedge delay."""
+        if self.hedger is None:
+            return await self._scheduled_call(prompt, priority)
+        return await self.hedger.run(lambda: self._scheduled_call(prompt, priority), self._can_hedge)
+    
+    async def _scheduled_call(self, prompt: BuiltPrompt, priority: TaskPriority) -> dict:
+        """One generateContent attempt inside a scheduler slot."""
+        async with self.scheduler.slot(priority):
+            # Token is taken once the call is about to go out, not while queued
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            return await self._call_gemini(prompt)
+    
+    async def _scheduled_stream(self, prompt: BuiltPrompt, priority: TaskPriority) -> AsyncIterator[dict]:
+        """One streamGenerateContent attempt inside a scheduler slot."""
+        async with self.scheduler.slot(priority):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            async for chunk in self._stream_gemini(prompt):
+                yield chunk
+    
+    def _rule_based_response(self, query: str) -> str:
+        """
+        Fallback rule-based response for the query's intent.
+        
+        Args:
+            query: User query
+            
+        Returns:
+            Rule-based response
+        """
+        with STAGE_LATENCY.time("fallback"):
+            match = self.intent_router.route(query)
+            return RULE_BASED_RESPONSES.get(match.intent, DEFAULT_RESPONSE)
     
     def send_message(self, recipient: str, message_obj: dict):
         """
         Send message to supervisor (implementation for completeness).
         In API mode, this is handled by the FastAPI layer.
         """
-        print(f"[{self._id}] Sending message to {recipient}: {json.dumps(message_obj, indent=2)}")
+        # Log identifiers only; serializing the whole report would cost more than sending it
+        logger.debug(
+            "Sending %s to %s",
+            message_obj.get("type"),
+            recipient,
+            extra={"message_id": message_obj.get("message_id"), "status": message_obj.get("status")}
+        )
     
     def write_to_ltm(self, key: str, value: Any) -> bool:
         """Write to Long-Term Memory."""
@@ -266,39 +701,307 @@ Please provide more specific details about your sustainability concerns, and I'l
         """Read from Long-Term Memory."""
         return self.ltm.read(key)
     
-    def process_api_request(self, messages: list) -> Dict[str, Any]:
+    def process_api_request(self, messages: list, use_cache: Optional[bool] = None) -> Dict[str, Any]:
         """
         Process API request from FastAPI endpoint.
         
         Args:
             messages: List of message dictionaries
+            use_cache: Use the response cache (None = configured default)
             
         Returns:
             Response dictionary
         """
         try:
-            # Extract user query
-            user_messages = [msg for msg in messages if msg.get("role") == "user"]
-            if not user_messages:
-                raise ValueError("No user message found in request")
-            
-            query = user_messages[-1].get("content", "")
+            query = self._extract_api_query(messages)
             
             # Process through standard task processing
             task_data = {
                 "query": query,
-                "messages": messages
+                "messages": messages,
+                "use_cache": use_cache
             }
             
             result = self.process_task(task_data)
             
-            return {
-                "message": result.get("message", ""),
-                "metadata": {
-                    "source": result.get("source", "unknown"),
-                    "query": query
-                }
+            return self._format_api_result(result, query)
+        
+        except Exception as e:
+            raise Exception(f"Error processing request: {str(e)}")
+    
+    async def process_api_request_async(
+        self,
+        messages: list,
+        priority: TaskPriority = TaskPriority.MEDIUM,
+        use_cache: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Async counterpart of process_api_request for use inside the event loop.
+        
+        Concurrent identical requests (same conversation, cache choice and
+        priority) share one execution. Followers share the leader's deadline
+        too: the call is bounded by the deadline of the request that started
+        it, not by their own. Requests with use_cache=False only join a call
+        in progress, never a result that has already completed.
+        
+        Args:
+            messages: List of message dictionaries
+            priority: Scheduler lane for any upstream LLM call
+            use_cache: Use the response cache (None = configured default)
+            deadline: Request deadline (None = request_timeout from now)
+            
+        Returns:
+            Response dictionary
+            
+        Raises:
+            SchedulerFullError: If the LLM queue is full (callers should answer 503)
+        """
+        try:
+            query = self._extract_api_query(messages)
+            
+            task_data = {
+                "query": query,
+                "messages": messages,
+                "priority": priority,
+                "use_cache": use_cache,
+                "deadline": deadline
             }
+            
+            if self.coalesce_requests:
+                cached = self._use_cache(task_data)
+                result = await self.single_flight.do(
+                    f"{self._conversation_key(messages)}:{int(cached)}:{TaskPriority(priority).name}",
+                    lambda: self.process_task_async(task_data),
+                    reuse_recent=cached
+                )
+            else:
+                result = await self.process_task_async(task_data)
+            
+            return self._format_api_result(result, query)
+        
+        except SchedulerFullError:
+            raise
         
         except Exception as e:
             raise Exception(f"Error processing request: {str(e)}")
+    
+    async def process_batch_async(
+        self,
+        requests: list,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Process independent API requests concurrently, yielding each as it completes.
+        
+        Items with the same conversation and cache choice are processed once
+        (at the highest priority among them) and the result is handed to every
+        copy. At most batch_concurrency items run at a time, so one batch
+        cannot fill the LLM queue on its own. A failing item only fails itself.
+        
+        Args:
+            requests: List of dictionaries with "messages", "priority" and "use_cache"
+            deadline: Deadline shared by every item
+            
+        Yields:
+            Tuples of (index, result, error_message); exactly one of result
+            and error_message is set
+        """
+        # Deduplicate before any upstream call
+        groups: Dict[Tuple[str, Optional[bool]], list] = {}
+        for index, request in enumerate(requests):
+            key = (self._conversation_key(request["messages"]), request.get("use_cache"))
+            groups.setdefault(key, []).append(index)
+        
+        semaphore = asyncio.Semaphore(self.batch_concurrency)
+        
+        async def run(indices: list) -> Tuple[list, Optional[Dict[str, Any]], Optional[str]]:
+            first = requests[indices[0]]
+            priority = max(
+                requests[index].get("priority", TaskPriority.MEDIUM) for index in indices
+            )
+            async with semaphore:
+                try:
+                    result = await self.process_api_request_async(
+                        first["messages"],
+                        priority=priority,
+                        use_cache=first.get("use_cache"),
+                        deadline=deadline
+                    )
+                    return indices, result, None
+                except Exception as e:
+                    return indices, None, str(e)
+        
+        tasks = [asyncio.ensure_future(run(indices)) for indices in groups.values()]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                indices, result, error = await next_done
+                for index in indices:
+                    yield index, result, error
+        finally:
+            # Consumer went away (e.g. client disconnect); stop outstanding items
+            for task in tasks:
+                task.cancel()
+    
+    async def stream_api_request(
+        self,
+        messages: list,
+        priority: TaskPriority = TaskPriority.MEDIUM,
+        use_cache: Optional[bool] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming counterpart of process_api_request_async.
+        
+        Yields {"delta": text} events as Gemini produces text, then one
+        {"result": data} event carrying the same payload process_api_request
+        returns. Cancelling the consumer closes the upstream stream.
+        
+        Args:
+            messages: List of message dictionaries
+            priority: Scheduler lane for the upstream call
+            use_cache: Use the response cache (None = configured default)
+            deadline: Request deadline; the stream is cut off when it passes
+            
+        Yields:
+            Delta events followed by a final result event
+            
+        Raises:
+            SchedulerFullError: If the LLM queue is full
+        """
+        query = self._extract_api_query(messages)
+        use_cache = self._use_cache({"use_cache": use_cache})
+        
+        local = self._calculate(query) or self._route(query)
+        if local is not None:
+            yield {"delta": local["message"]}
+            yield {"result": self._format_api_result(local, query)}
+            return
+        
+        cache_query, semantic = self._cache_query(query, messages)
+        if use_cache:
+            cached_response = await self.executor.run(self.cache.get, cache_query, semantic)
+            if cached_response is not None:
+                yield {"delta": cached_response}
+                yield {"result": self._format_api_result(
+                    {"message": cached_response, "source": "ltm_cache"}, query
+                )}
+                return
+        
+        parts = []
+        source = "generated"
+        prompt_tokens = None
+        
+        deadline = deadline or Deadline(self.request_timeout)
+        if self.use_ai and self._has_upstream_time(deadline):
+            chunks = None
+            try:
+                prompt = self._build_prompt(query, messages)
+                prompt_tokens = prompt.prompt_tokens
+                chunks = self.resilience.stream(lambda: self._scheduled_stream(prompt, priority), deadline)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), deadline.remaining())
+                    except StopAsyncIteration:
+                        break
+                    prompt_tokens = self._prompt_tokens(chunk, prompt)
+                    text = self._extract_stream_text(chunk)
+                    if text:
+                        parts.append(text)
+                        yield {"delta": text}
+            
+            except SchedulerFullError:
+                raise
+            
+            except (CircuitOpenError, RateLimitedError):
+                pass
+            
+            except asyncio.TimeoutError:
+                logger.warning("Gemini stream cancelled at the request deadline")
+                if parts:
+                    raise Exception("Error processing request: request deadline exceeded")
+            
+            except Exception as e:
+                logger.error("Error streaming from Gemini API: %s", e)
+                if parts:
+                    # Part of the answer was already sent; don't splice in a fallback
+                    raise Exception(f"Error processing request: {str(e)}")
+            
+            finally:
+                if chunks is not None:
+                    await chunks.aclose()
+        
+        if not parts:
+            source = "rule_based"
+            prompt_tokens = None
+            fallback = self._rule_based_response(query)
+            parts.append(fallback)
+            yield {"delta": fallback}
+        
+        response = "".join(parts).strip()
+        if use_cache and source == "generated":
+            await self.executor.run(self.cache.put, cache_query, response, semantic)
+        
+        yield {"result": self._format_api_result(
+            self._generated_result(response, source, query, prompt_tokens), query
+        )}
+    
+    def _extract_stream_text(self, chunk: dict) -> str:
+        """Text carried by one streamGenerateContent chunk (may be empty)."""
+        candidates = chunk.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+    
+    def _conversation_text(self, messages: list) -> str:
+        """The whole conversation as one string, one "role: content" line per message."""
+        return "\n".join(
+            f"{msg.get('role', 'user')}: {msg.get('content', '')}" for msg in messages
+        )
+    
+    def _conversation_key(self, messages: list) -> str:
+        """Coalescing key: the whole conversation, normalized like LTM query keys."""
+        return generate_key(self._conversation_text(messages))
+    
+    def _cache_query(self, query: str, messages: Optional[list]) -> Tuple[str, bool]:
+        """
+        Text the response cache is keyed on, and whether semantic matching applies.
+        
+        A request with earlier turns is keyed on the whole conversation and
+        only matches exactly, so a follow-up such as "what about for a family
+        of four?" is never answered from a different conversation.
+        
+        Args:
+            query: Last user message
+            messages: Conversation history, if any
+            
+        Returns:
+            Tuple of (cache query, semantic)
+        """
+        if messages and len(messages) > 1:
+            return self._conversation_text(messages), False
+        return query, True
+    
+    def _extract_api_query(self, messages: list) -> str:
+        """Return the content of the last user message in an API request."""
+        user_messages = [msg for msg in messages if msg.get("role") == "user"]
+        if not user_messages:
+            raise ValueError("No user message found in request")
+        
+        return user_messages[-1].get("content", "")
+    
+    def _format_api_result(self, result: dict, query: str) -> Dict[str, Any]:
+        """Shape a process_task result into the API data payload."""
+        RESPONSES.inc(result.get("source", "unknown"))
+        data = {
+            "message": result.get("message", ""),
+            "metadata": {
+                "source": result.get("source", "unknown"),
+                "query": query
+            }
+        }
+        for field in ("prompt_tokens", "intent", "intent_confidence", "calculation"):
+            if field in result:
+                data["metadata"][field] = result[field]
+        return data
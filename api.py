@@ -3,12 +3,15 @@ FastAPI application for Sustainability Footprint Agent.
 Provides REST API endpoints following the SPM project standards.
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from contextlib import asynccontextmanager
 import sys
 import os
-from typing import Dict, Any
+import asyncio
+from typing import AsyncIterator, Dict, Any, Optional
 import time
 
 # Add parent directory to path
@@ -18,15 +21,213 @@ from communication.models import (
     AgentRequest, 
     AgentResponse, 
     Status, 
+    BatchRequest,
+    BatchItemResponse,
+    BatchResponse,
+    CalculationRequest,
     HealthCheckResponse
 )
-from agents.workers.sustainability_agent import SustainabilityFootprintAgent
+from communication.bus import MessageBus
+from shared import serialization
+from shared.scheduler import SchedulerFullError
+from shared.structured_logging import REQUEST_ID, get_logger, new_request_id, pipeline_stats
+from shared.utils import PROJECT_ROOT, load_settings, setup_logging_from_settings
+from shared.deadline import Deadline
+from shared.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE,
+    REGISTRY,
+    REQUEST_LATENCY,
+    REQUESTS,
+    REQUESTS_IN_FLIGHT,
+    STAGE_LATENCY,
+    CallbackMetric
+)
+
+# Configure logging before the agent so its startup messages use the pipeline
+settings = load_settings()
+setup_logging_from_settings(settings)
+logger = get_logger("api")
+
+# Built by the lifespan after the server has started (see start_agent); None until then
+agent = None
+agent_startup: Optional[asyncio.Task] = None
+startup_status: Dict[str, Any] = {"state": "pending"}
+
+# Supervisor task_assignment consumer (None unless message_bus.enabled); one per worker process
+message_bus: Optional[MessageBus] = None
+
+
+class AgentUnavailableError(RuntimeError):
+    """Raised for requests that need the agent when its startup failed."""
+
+
+def create_agent():
+    """
+    Import and construct the agent.
+    
+    Blocking (LTM directory creation and loading, settings and API key
+    lookup), so start_agent runs it in a worker thread.
+    """
+    from agents.workers.sustainability_agent import SustainabilityFootprintAgent
+    return SustainabilityFootprintAgent()
+
+
+async def start_agent():
+    """
+    Build the agent, open its Gemini connection pool and start the message
+    bus (if enabled).
+    
+    Runs as a background task of the lifespan, so the server binds and
+    answers /health while the agent is still being built; requests that need
+    the agent wait for it (see wait_for_agent).
+    """
+    global agent, message_bus
+    startup_status["state"] = "starting"
+    started = time.perf_counter()
+    try:
+        instance = await asyncio.to_thread(create_agent)
+        await instance.gemini.start()
+        agent = instance
+        register_component_metrics(instance)
+        bus_config = settings.get("message_bus", {}) or {}
+        if bus_config.get("enabled", False):
+            spool_dir = os.path.join(PROJECT_ROOT, bus_config.get("spool_dir", "spool"))
+            message_bus = MessageBus.from_settings(instance, settings, spool_dir)
+            await message_bus.start()
+    except Exception as e:
+        startup_status.update(state="failed", error=str(e))
+        logger.exception("Agent startup failed: %s", e)
+        raise
+    startup_status.update(state="ready", seconds=round(time.perf_counter() - started, 3))
+    logger.info("Agent ready in %.2fs", startup_status["seconds"])
+
+
+def ensure_agent_startup() -> asyncio.Task:
+    """The agent startup task, started on first use if the lifespan has not started it."""
+    global agent_startup
+    if agent_startup is None:
+        agent_startup = asyncio.create_task(start_agent())
+    return agent_startup
+
+
+async def wait_for_agent():
+    """
+    The agent, once startup has finished.
+    
+    Raises:
+        AgentUnavailableError: If startup failed or was cancelled
+    """
+    startup = ensure_agent_startup()
+    if not startup.done():
+        # asyncio.wait does not cancel the startup task if this request is cancelled
+        await asyncio.wait({startup})
+    if startup.cancelled() or startup.exception() is not None:
+        raise AgentUnavailableError(f"Agent is unavailable: {startup_status.get('error', 'startup was cancelled')}")
+    return agent
+
+
+def register_component_metrics(agent):
+    """Export scheduler, cache, coalescing, executor, circuit breaker and hedging state, read when /metrics is scraped."""
+    def stat(stats, key: str):
+        return lambda: {(): stats()[key]}
+    
+    for name, documentation, stats, key, type_name in (
+        ("agent_scheduler_in_flight", "Gemini calls holding a scheduler slot", agent.scheduler.stats, "in_flight", "gauge"),
+        ("agent_scheduler_queue_depth", "Requests waiting for a scheduler slot", agent.scheduler.stats, "queue_depth", "gauge"),
+        ("agent_scheduler_rejected_total", "Requests shed because the queue was full", agent.scheduler.stats, "rejected", "counter"),
+        ("agent_cache_hit_ratio", "Response cache hit ratio since start", agent.cache.stats, "hit_ratio", "gauge"),
+        ("agent_cache_hits_total", "Response cache hits", agent.cache.stats, "hits", "counter"),
+        ("agent_cache_misses_total", "Response cache misses", agent.cache.stats, "misses", "counter"),
+        ("agent_cache_entries", "Entries in the response cache", agent.cache.stats, "size", "gauge"),
+        # Per-key waiter counts stay in /health; keys are unbounded, so /metrics gets totals and the largest
+        ("agent_single_flight_in_flight_keys", "Distinct requests currently executing", agent.single_flight.stats, "in_flight", "gauge"),
+        ("agent_single_flight_waiters", "Requests waiting on an in-flight execution, leaders included", agent.single_flight.stats, "total_waiters", "gauge"),
+        ("agent_single_flight_max_waiters", "Most requests waiting on a single in-flight execution", agent.single_flight.stats, "max_waiters", "gauge"),
+        ("agent_single_flight_executions_total", "Executions started by coalescing leaders", agent.single_flight.stats, "executions", "counter"),
+        ("agent_single_flight_coalesced_total", "Requests that joined an execution in progress", agent.single_flight.stats, "coalesced", "counter"),
+        ("agent_single_flight_late_joins_total", "Requests answered from a just-completed execution", agent.single_flight.stats, "late_joins", "counter"),
+        ("agent_executor_active", "Executor threads running blocking work", agent.executor.stats, "active", "gauge"),
+        ("agent_executor_queued", "Blocking calls waiting for an executor thread", agent.executor.stats, "queued", "gauge"),
+        ("agent_executor_max_workers", "Executor pool size", agent.executor.stats, "max_workers", "gauge"),
+        ("agent_log_records_dropped_total", "Log records dropped because the log queue was full", pipeline_stats, "dropped", "counter"),
+        ("agent_upstream_retries_total", "Gemini calls retried after a transient failure", agent.resilience.stats, "retries", "counter"),
+        ("agent_circuit_short_circuited_total", "Calls answered locally because the circuit was open", agent.resilience.stats, "short_circuited", "counter"),
+    ):
+        REGISTRY.register(CallbackMetric(name, documentation, stat(stats, key), type_name=type_name))
+    
+    REGISTRY.register(CallbackMetric(
+        "agent_circuit_state",
+        "Circuit breaker state (1 for the current state)",
+        lambda: {(state,): int(agent.resilience.breaker.state == state) for state in ("closed", "open", "half_open")},
+        ("state",)
+    ))
+    
+    if agent.hedger is not None:
+        REGISTRY.register(CallbackMetric(
+            "agent_hedged_calls_total", "Gemini calls that got a hedge", stat(agent.hedger.stats, "hedged"), type_name="counter"
+        ))
+        REGISTRY.register(CallbackMetric(
+            "agent_hedge_delay_seconds", "Current hedge delay", lambda: {(): agent.hedger.delay()}
+        ))
+    
+    if agent.rate_limiter is not None:
+        REGISTRY.register(CallbackMetric(
+            "agent_rate_limited_total", "Gemini calls answered locally because the shared rate limit was reached",
+            stat(agent.rate_limiter.stats, "rejected"), type_name="counter"
+        ))
+
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded by shared.serialization (orjson when installed).
+    
+    Pydantic models are written straight to bytes by pydantic-core, skipping
+    the jsonable_encoder pass and intermediate dict of FastAPI's default path.
+    """
+    
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return serialization.model_json(content)
+        return serialization.dumps_bytes(content)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the agent in the background at startup (see start_agent) and close
+    its connections at shutdown.
+    
+    Runs in every worker process, so each gets its own agent and connection
+    pool. The server only reaches shutdown once in-flight requests have
+    drained.
+    """
+    global agent, agent_startup, message_bus
+    startup = ensure_agent_startup()
+    yield
+    if not startup.done():
+        startup.cancel()
+    await asyncio.gather(startup, return_exceptions=True)
+    if message_bus is not None:
+        # Finish and report claimed tasks; unclaimed ones stay in the transport
+        await message_bus.stop()
+    if agent is not None:
+        agent.ltm.flush()
+        if agent.context_cache is not None:
+            await agent.context_cache.aclose()
+        await agent.gemini.aclose()
+    agent, agent_startup, message_bus = None, None, None
+    startup_status.clear()
+    startup_status["state"] = "pending"
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Sustainability Footprint Agent",
     description="AI Agent for environmental impact analysis and sustainability assessment",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Add CORS middleware
@@ -38,25 +239,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the agent
-agent = SustainabilityFootprintAgent()
-
 # Agent configuration
 AGENT_NAME = "sustainability-footprint-agent"
-REQUEST_TIMEOUT = 30  # seconds
+REQUEST_TIMEOUT = 30  # seconds; also the largest X-Request-Timeout a client may ask for
+AGENT_PATH = "/api/sustainability-footprint-agent"
+HEALTH_PATH = AGENT_PATH + "/health"
+
+
+async def dispatch(request: Request, call_next):
+    """Pass the request on, first waiting for the agent if the endpoint needs it."""
+    if request.url.path.startswith(AGENT_PATH) and request.url.path != HEALTH_PATH:
+        await wait_for_agent()
+    return await call_next(request)
 
 
 @app.middleware("http")
 async def timeout_middleware(request: Request, call_next):
-    """Add timeout to all requests."""
+    """Add timeout to all requests, tag them with a request ID and record request metrics."""
     start_time = time.time()
+    # Monotonic, so request deadlines can count from arrival too
+    request.state.received_at = time.monotonic()
+    # Log records written while handling the request carry this ID
+    request_id = new_request_id(request.headers.get("X-Request-ID"))
+    request_id_token = REQUEST_ID.set(request_id)
+    REQUESTS_IN_FLIGHT.inc()
     try:
-        response = await call_next(request)
+        # Backstop only: handlers already answer by their own request deadline
+        response = await asyncio.wait_for(dispatch(request, call_next), REQUEST_TIMEOUT)
         process_time = time.time() - start_time
         response.headers["X-Process-Time"] = str(process_time)
-        return response
+    except asyncio.TimeoutError:
+        response = JSONResponse(
+            status_code=504,
+            content={
+                "agent_name": AGENT_NAME,
+                "status": "error",
+                "data": None,
+                "error_message": f"Request exceeded {REQUEST_TIMEOUT}s timeout"
+            }
+        )
+    except AgentUnavailableError as e:
+        response = JSONResponse(
+            status_code=503,
+            content={
+                "agent_name": AGENT_NAME,
+                "status": "error",
+                "data": None,
+                "error_message": str(e)
+            }
+        )
     except Exception as e:
-        return JSONResponse(
+        logger.exception("Unhandled error: %s", e)
+        response = JSONResponse(
             status_code=500,
             content={
                 "agent_name": AGENT_NAME,
@@ -65,32 +299,85 @@ async def timeout_middleware(request: Request, call_next):
                 "error_message": f"Internal server error: {str(e)}"
             }
         )
+    finally:
+        REQUESTS_IN_FLIGHT.dec()
+        REQUEST_ID.reset(request_id_token)
+    
+    response.headers["X-Request-ID"] = request_id
+    # Label by route template so path parameters cannot explode cardinality
+    route = request.scope.get("route")
+    path = route.path if route is not None else "other"
+    REQUEST_LATENCY.observe(time.monotonic() - request.state.received_at, path)
+    REQUESTS.inc(path, str(response.status_code))
+    return response
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    """Prometheus metrics for this worker process."""
+    return Response(content=REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
 
 
 @app.get("/api/sustainability-footprint-agent/health")
 async def health_check() -> HealthCheckResponse:
     """
     Health check endpoint.
-    Returns the agent's operational status.
+    Returns the agent's operational status and LLM queue state, or 503 while
+    the agent is starting (or if its startup failed).
     """
+    if startup_status["state"] != "ready":
+        failed = startup_status["state"] == "failed"
+        return FastJSONResponse(HealthCheckResponse(
+            status="error" if failed else "starting",
+            agent_name=AGENT_NAME,
+            ready=False,
+            details={"startup": startup_status}
+        ), status_code=503)
+    
+    details = {
+        "startup": startup_status,
+        "scheduler": agent.scheduler.stats(),
+        "executor": agent.executor.stats(),
+        "cache": agent.cache.stats(),
+        "single_flight": agent.single_flight.stats(),
+        "resilience": agent.resilience.stats(),
+        "logging": pipeline_stats()
+    }
+    if agent.hedger is not None:
+        details["hedging"] = agent.hedger.stats()
+    if agent.rate_limiter is not None:
+        details["rate_limit"] = agent.rate_limiter.stats()
+    if agent.context_cache is not None:
+        details["context_cache"] = agent.context_cache.stats()
+    if message_bus is not None:
+        details["message_bus"] = message_bus.stats()
+    
     return HealthCheckResponse(
         status="ok",
         agent_name=AGENT_NAME,
-        ready=True
+        ready=True,
+        details=details
     )
 
 
-@app.post("/api/sustainability-footprint-agent")
-async def process_request(request: AgentRequest) -> AgentResponse:
+@app.post("/api/sustainability-footprint-agent", response_model=AgentResponse)
+async def process_request(
+    request: AgentRequest,
+    http_request: Request,
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout")
+) -> Response:
     """
     Main endpoint for processing sustainability-related queries.
     
     Args:
         request: AgentRequest with messages
+        http_request: Raw request (for stage timing)
+        request_timeout: Seconds the caller will wait (X-Request-Timeout header)
         
     Returns:
         AgentResponse with analysis results
     """
+    record_validation(http_request)
     try:
         # Validate request
         if not request.messages:
@@ -100,32 +387,318 @@ async def process_request(request: AgentRequest) -> AgentResponse:
             )
         
         # Convert Pydantic models to dictionaries for agent processing
-        messages = [msg.dict() for msg in request.messages]
+        messages = [msg.model_dump() for msg in request.messages]
         
-        # Process request with timeout consideration
-        result = agent.process_api_request(messages)
+        # Process request without blocking the event loop
+        result = await agent.process_api_request_async(
+            messages,
+            priority=request.priority,
+            use_cache=request.use_cache,
+            deadline=request_deadline(request_timeout, http_request)
+        )
         
-        # Return successful response
-        return AgentResponse(
+        # Return successful response (encoded directly, without response-model revalidation)
+        return FastJSONResponse(AgentResponse(
             agent_name=AGENT_NAME,
             status=Status.SUCCESS,
             data=result,
             error_message=None
-        )
+        ))
     
     except HTTPException as he:
         # Re-raise HTTP exceptions
         raise he
     
+    except SchedulerFullError as e:
+        # Shed load quickly instead of queueing without bound
+        return overloaded_response(e)
+    
     except Exception as e:
         # Catch all other errors and return error response
-        print(f"[{AGENT_NAME}] Error processing request: {e}")
+        logger.exception("Error processing request: %s", e)
+        return FastJSONResponse(AgentResponse(
+            agent_name=AGENT_NAME,
+            status=Status.ERROR,
+            data=None,
+            error_message=str(e)
+        ))
+
+
+@app.post("/api/sustainability-footprint-agent/stream")
+async def process_request_stream(
+    request: AgentRequest,
+    http_request: Request,
+    stream_format: str = Query("sse", alias="format", pattern="^(sse|ndjson)$"),
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout")
+):
+    """
+    Streaming variant of the main endpoint.
+    
+    Forwards Gemini's output as it is generated, either as Server-Sent Events
+    (`event: chunk` frames, then one `event: result` frame) or as NDJSON
+    (`{"delta": ...}` lines, then one final line). The final frame is always a
+    standard AgentResponse. If the client disconnects, the upstream call is
+    cancelled.
+    
+    Args:
+        request: AgentRequest with messages
+        http_request: Raw request (for stage timing)
+        stream_format: "sse" (default) or "ndjson"
+        request_timeout: Seconds the caller will wait (X-Request-Timeout header)
+        
+    Returns:
+        StreamingResponse of frames, or a plain AgentResponse if processing
+        fails before the first frame
+    """
+    record_validation(http_request)
+    if not request.messages:
+        raise HTTPException(
+            status_code=400,
+            detail="No messages provided in request"
+        )
+    
+    messages = [msg.model_dump() for msg in request.messages]
+    events = agent.stream_api_request(
+        messages,
+        priority=request.priority,
+        use_cache=request.use_cache,
+        deadline=request_deadline(request_timeout, http_request)
+    )
+    
+    # Wait for the first event so early failures still get a proper status code
+    try:
+        first_event = await events.__anext__()
+    except SchedulerFullError as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.exception("Error processing request: %s", e)
         return AgentResponse(
             agent_name=AGENT_NAME,
             status=Status.ERROR,
             data=None,
             error_message=str(e)
         )
+    
+    if stream_format == "ndjson":
+        media_type = "application/x-ndjson"
+    else:
+        media_type = "text/event-stream"
+    
+    return StreamingResponse(
+        stream_frames(first_event, events, stream_format),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/sustainability-footprint-agent/batch")
+async def process_batch(
+    request: BatchRequest,
+    http_request: Request,
+    stream: bool = False,
+    request_timeout: Optional[str] = Header(None, alias="X-Request-Timeout")
+):
+    """
+    Process many independent queries in one HTTP call.
+    
+    Items run concurrently under the agent's concurrency limits; duplicate
+    items are answered by a single upstream call. Each item gets its own
+    AgentResponse, so one failing item does not fail the batch.
+    
+    Args:
+        request: BatchRequest with a list of AgentRequests
+        http_request: Raw request (for stage timing)
+        stream: Send NDJSON BatchItemResponse lines as items complete
+            instead of one BatchResponse in request order
+        request_timeout: Seconds the caller will wait for the whole batch
+            (X-Request-Timeout header)
+        
+    Returns:
+        BatchResponse, or a StreamingResponse of BatchItemResponse lines
+    """
+    record_validation(http_request)
+    if not request.requests:
+        raise HTTPException(
+            status_code=400,
+            detail="No requests provided in batch"
+        )
+    
+    if len(request.requests) > agent.batch_max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch too large: {len(request.requests)} requests (maximum {agent.batch_max_items})"
+        )
+    
+    items = [
+        {
+            "messages": [msg.model_dump() for msg in item.messages],
+            "priority": item.priority,
+            "use_cache": item.use_cache
+        }
+        for item in request.requests
+    ]
+    deadline = request_deadline(request_timeout, http_request)
+    
+    if stream:
+        return StreamingResponse(
+            batch_lines(agent.process_batch_async(items, deadline)),
+            media_type="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    responses = [None] * len(items)
+    async for index, result, error in agent.process_batch_async(items, deadline):
+        responses[index] = batch_item_response(result, error)
+    
+    return FastJSONResponse(BatchResponse(
+        agent_name=AGENT_NAME,
+        status=Status.SUCCESS,
+        responses=responses
+    ))
+
+
+@app.post("/api/sustainability-footprint-agent/calculate", response_model=AgentResponse)
+async def calculate(request: CalculationRequest, http_request: Request) -> Response:
+    """
+    Deterministic emissions calculation for many activity rows.
+    
+    Uses the local emission-factor table; no LLM call is made. Invalid rows
+    get an error entry and do not fail the request.
+    
+    Args:
+        request: CalculationRequest with activity rows
+        http_request: Raw request (for stage timing)
+        
+    Returns:
+        AgentResponse whose data holds per-row results and totals
+    """
+    record_validation(http_request)
+    if not request.activities:
+        raise HTTPException(
+            status_code=400,
+            detail="No activities provided in request"
+        )
+    
+    if len(request.activities) > agent.calculator_max_activities:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many activities: {len(request.activities)} (maximum {agent.calculator_max_activities})"
+        )
+    
+    activities = [activity.model_dump() for activity in request.activities]
+    # Up to calculator.max_activities rows; keep the event loop free meanwhile
+    result = await agent.executor.run(agent.calculator.calculate_many, activities)
+    
+    return FastJSONResponse(AgentResponse(
+        agent_name=AGENT_NAME,
+        status=Status.SUCCESS,
+        data=result,
+        error_message=None
+    ))
+
+
+async def batch_lines(outcomes: AsyncIterator) -> AsyncIterator[str]:
+    """Encode batch outcomes as NDJSON BatchItemResponse lines."""
+    try:
+        async for index, result, error in outcomes:
+            item = BatchItemResponse(index=index, response=batch_item_response(result, error))
+            yield item.model_dump_json() + "\n"
+    finally:
+        await outcomes.aclose()
+
+
+def batch_item_response(result: Dict[str, Any], error: str) -> AgentResponse:
+    """AgentResponse for one batch item outcome."""
+    if error is not None:
+        logger.error("Error processing batch item: %s", error)
+        return AgentResponse(
+            agent_name=AGENT_NAME,
+            status=Status.ERROR,
+            data=None,
+            error_message=error
+        )
+    
+    return AgentResponse(
+        agent_name=AGENT_NAME,
+        status=Status.SUCCESS,
+        data=result,
+        error_message=None
+    )
+
+
+async def stream_frames(
+    first_event: Dict[str, Any],
+    events: AsyncIterator[Dict[str, Any]],
+    stream_format: str
+) -> AsyncIterator[str]:
+    """Encode agent stream events as SSE or NDJSON frames."""
+    def encode(event: str, payload: str) -> str:
+        if stream_format == "ndjson":
+            return payload + "\n"
+        return f"event: {event}\ndata: {payload}\n\n"
+    
+    event = first_event
+    try:
+        while True:
+            if "result" in event:
+                response = AgentResponse(
+                    agent_name=AGENT_NAME,
+                    status=Status.SUCCESS,
+                    data=event["result"],
+                    error_message=None
+                )
+                yield encode("result", response.model_dump_json())
+            else:
+                yield encode("chunk", serialization.dumps(event))
+            event = await events.__anext__()
+    
+    except StopAsyncIteration:
+        pass
+    
+    except Exception as e:
+        logger.exception("Error streaming response: %s", e)
+        response = AgentResponse(
+            agent_name=AGENT_NAME,
+            status=Status.ERROR,
+            data=None,
+            error_message=str(e)
+        )
+        yield encode("result", response.model_dump_json())
+    
+    finally:
+        # Runs on client disconnect too, closing the upstream Gemini stream
+        await events.aclose()
+
+
+def record_validation(http_request: Request):
+    """Record the time from arrival until the body was parsed and validated."""
+    STAGE_LATENCY.observe(time.monotonic() - http_request.state.received_at, "validation")
+
+
+def request_deadline(request_timeout: Optional[str], http_request: Request) -> Deadline:
+    """
+    Deadline from the X-Request-Timeout header, defaulting to the supervisor timeout.
+    
+    Counts from the request's arrival in the middleware, so time spent waiting
+    for agent startup and parsing the body is included.
+    """
+    return Deadline.from_header(
+        request_timeout, agent.request_timeout, REQUEST_TIMEOUT, started_at=http_request.state.received_at
+    )
+
+
+def overloaded_response(error: Exception) -> JSONResponse:
+    """503 response in the AgentResponse envelope for a full LLM queue."""
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": "1"},
+        content={
+            "agent_name": AGENT_NAME,
+            "status": "error",
+            "data": None,
+            "error_message": str(error)
+        }
+    )
 
 
 @app.get("/")
@@ -137,7 +710,11 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "main": "/api/sustainability-footprint-agent",
-            "health": "/api/sustainability-footprint-agent/health"
+            "stream": "/api/sustainability-footprint-agent/stream",
+            "batch": "/api/sustainability-footprint-agent/batch",
+            "calculate": "/api/sustainability-footprint-agent/calculate",
+            "health": "/api/sustainability-footprint-agent/health",
+            "metrics": "/metrics"
         },
         "intents": [
             "carbon_footprint_analysis",
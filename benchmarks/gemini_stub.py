@@ -0,0 +1,326 @@
+"""
+Local stub of the Gemini REST API for tests and benchmarks.
+
+Implements generateContent, streamGenerateContent (alt=sse) and cachedContents
+with configurable latency (base + uniform jitter + an optional slow tail) and
+error rate, validates request payload shape the way the real API does, and
+records request sizes.
+
+Usage:
+    python benchmarks/gemini_stub.py --port 9100 --latency 0.5
+    GEMINI_BASE_URL=http://127.0.0.1:9100/v1 GEMINI_API_KEY=stub python main.py
+
+GET /stats returns request counts and payload byte totals; POST /stats/reset clears them.
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+
+_GENERATE_PATH = re.compile(r"^/[^/]+/models/([^/:]+):(generateContent|streamGenerateContent)$")
+_CACHED_PATH = re.compile(r"^/[^/]+/cachedContents(?:/([^/]+))?$")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count used for usageMetadata (about 4 characters per token)."""
+    return max(1, len(text) // 4)
+
+
+def validate_payload(payload: dict, cached_contents: dict) -> Optional[str]:
+    """
+    Check a generateContent body against the rules the real API enforces.
+
+    Returns:
+        Error message, or None if the payload is valid
+    """
+    contents = payload.get("contents")
+    if not isinstance(contents, list) or not contents:
+        return "contents must be a non-empty list"
+
+    for content in contents:
+        if content.get("role", "user") not in ("user", "model"):
+            return f"Invalid role: {content.get('role')}"
+        parts = content.get("parts")
+        if not isinstance(parts, list) or not parts:
+            return "Each content needs a non-empty parts list"
+        if not all(isinstance(part.get("text"), str) for part in parts):
+            return "Only text parts are supported"
+
+    if "cachedContent" in payload:
+        if "systemInstruction" in payload:
+            return "systemInstruction cannot be used together with cachedContent"
+        if payload["cachedContent"] not in cached_contents:
+            return f"Cached content not found: {payload['cachedContent']}"
+
+    instruction = payload.get("systemInstruction")
+    if instruction is not None and not instruction.get("parts"):
+        return "systemInstruction needs parts"
+
+    return None
+
+
+class GeminiStub(ThreadingHTTPServer):
+    """HTTP server holding the stub configuration, cached contents and counters."""
+
+    daemon_threads = True
+    request_queue_size = 512
+
+    def __init__(
+        self,
+        port: int = 9100,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        tail_rate: float = 0.0,
+        tail_latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        stream_chunks: int = 5,
+        min_cache_tokens: int = 0,
+        answer: str = "Stub analysis: switch to renewable electricity and reduce car travel."
+    ):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.stream_chunks = stream_chunks
+        self.min_cache_tokens = min_cache_tokens
+        self.answer = answer
+
+        self.cached_contents = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {
+                "requests": 0,
+                "generate": 0,
+                "stream": 0,
+                "cache_creates": 0,
+                "errors": 0,
+                "invalid": 0,
+                "bytes_received": 0,
+                "prompt_tokens": 0,
+                "cached_tokens": 0
+            }
+
+    def count(self, **increments):
+        with self._lock:
+            for key, value in increments.items():
+                self.stats[key] += value
+
+    def delay(self):
+        """Sleep for the configured latency plus jitter; a `tail_rate` fraction of calls take `tail_latency`."""
+        if self.tail_rate and random.random() < self.tail_rate:
+            wait = self.tail_latency
+        else:
+            wait = self.latency + random.uniform(0, self.jitter) if self.jitter else self.latency
+        if wait > 0:
+            time.sleep(wait)
+
+    def handle_error(self, request, client_address):
+        # Clients cancelling calls (hedging, deadlines) are expected; keep other errors visible
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def new_cache_name(self) -> str:
+        return f"cachedContents/stub-{next(self._ids)}"
+
+    def serve_in_thread(self) -> threading.Thread:
+        """Serve requests from a daemon thread (for in-process benchmarks)."""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: GeminiStub
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY each response waits ~40ms for a delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str):
+        self._send_json(status, {"error": {"code": status, "message": message}})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        self.server.count(requests=1, bytes_received=len(raw))
+        return json.loads(raw) if raw else {}
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/stats":
+            self._send_json(200, dict(self.server.stats))
+        else:
+            self._send_error(404, "Not found")
+
+    def do_DELETE(self):
+        match = _CACHED_PATH.match(urlparse(self.path).path)
+        if not match or not match.group(1):
+            self._send_error(404, "Not found")
+            return
+        self.server.cached_contents.pop(f"cachedContents/{match.group(1)}", None)
+        self._send_json(200, {})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            payload = self._read_json()
+        except ValueError:
+            self._send_error(400, "Invalid JSON payload")
+            return
+
+        if url.path == "/stats/reset":
+            self.server.reset_stats()
+            self._send_json(200, {})
+            return
+
+        if _CACHED_PATH.match(url.path):
+            self._create_cached_content(payload)
+            return
+
+        match = _GENERATE_PATH.match(url.path)
+        if not match:
+            self._send_error(404, "Not found")
+            return
+
+        error = validate_payload(payload, self.server.cached_contents)
+        if error:
+            self.server.count(invalid=1)
+            self._send_error(400, error)
+            return
+
+        self.server.delay()
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.count(errors=1)
+            self._send_error(self.server.error_status, "Stub injected error")
+            return
+
+        usage = self._usage(payload)
+        if match.group(2) == "streamGenerateContent":
+            stream_sse = parse_qs(url.query).get("alt") == ["sse"]
+            self._stream(usage, stream_sse)
+        else:
+            self.server.count(generate=1)
+            self._send_json(200, {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": self.server.answer}]}}],
+                "usageMetadata": usage
+            })
+
+    def _create_cached_content(self, payload: dict):
+        instruction = payload.get("systemInstruction") or {}
+        text = "".join(part.get("text", "") for part in instruction.get("parts", []))
+        tokens = estimate_tokens(text)
+        if tokens < self.server.min_cache_tokens:
+            self._send_error(
+                400,
+                f"Cached content is too small. total_token_count={tokens}, "
+                f"min_total_token_count={self.server.min_cache_tokens}"
+            )
+            return
+
+        name = self.server.new_cache_name()
+        self.server.cached_contents[name] = tokens
+        self.server.count(cache_creates=1)
+        self._send_json(200, {"name": name, "model": payload.get("model"), "usageMetadata": {"totalTokenCount": tokens}})
+
+    def _usage(self, payload: dict) -> dict:
+        texts = [
+            part["text"]
+            for content in payload["contents"]
+            for part in content["parts"]
+        ]
+        texts.extend(part.get("text", "") for part in (payload.get("systemInstruction") or {}).get("parts", []))
+        cached = self.server.cached_contents.get(payload.get("cachedContent"), 0)
+        prompt = sum(estimate_tokens(text) for text in texts) + cached
+        self.server.count(prompt_tokens=prompt, cached_tokens=cached)
+
+        usage = {"promptTokenCount": prompt, "candidatesTokenCount": estimate_tokens(self.server.answer)}
+        if cached:
+            usage["cachedContentTokenCount"] = cached
+        return usage
+
+    def _stream(self, usage: dict, stream_sse: bool):
+        self.server.count(stream=1)
+        words = self.server.answer.split(" ")
+        size = max(1, -(-len(words) // self.server.stream_chunks))
+        chunks = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream" if stream_sse else "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for i, text in enumerate(chunks):
+            chunk = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+            if i == len(chunks) - 1:
+                chunk["usageMetadata"] = usage
+            try:
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                self.wfile.flush()
+            except OSError:
+                return  # client disconnected
+            if i < len(chunks) - 1:
+                time.sleep(self.server.latency / max(1, len(chunks)))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local Gemini API stub")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds before each answer")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="fraction of calls that are slow")
+    parser.add_argument("--tail-latency", type=float, default=0.0, help="latency of slow calls, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--stream-chunks", type=int, default=5)
+    parser.add_argument("--min-cache-tokens", type=int, default=0,
+                        help="reject cachedContents smaller than this (the real API has a minimum)")
+    args = parser.parse_args()
+
+    server = GeminiStub(
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_chunks=args.stream_chunks,
+        min_cache_tokens=args.min_cache_tokens
+    )
+    print(f"Gemini stub listening on http://127.0.0.1:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
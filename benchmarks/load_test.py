@@ -0,0 +1,371 @@
+"""
+Load test for the FastAPI app, run in-process against the local Gemini stub.
+
+Drives one or more scenarios either at a fixed request rate (open loop,
+latency measured from the scheduled start so queueing is not hidden) or at
+a fixed concurrency (closed loop), and reports throughput, latency
+percentiles, error rate and answer sources. Results can be saved as JSON and
+compared with an earlier run.
+
+Scenarios:
+    main    POST the main endpoint with distinct queries (LLM path)
+    ltm     POST a small set of repeated queries with the cache on (LTM path)
+    stream  POST the stream endpoint and read the whole body
+    health  GET the health endpoint
+
+Usage:
+    python benchmarks/load_test.py --scenarios main ltm health --concurrency 32 --duration 10
+    python benchmarks/load_test.py --scenarios main --rps 200 --stub-latency 0.3 --json after.json --compare before.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+
+from benchmarks.gemini_stub import GeminiStub
+from shared.utils import load_settings
+
+
+BASE_PATH = "/api/sustainability-footprint-agent"
+
+# Open-ended questions that the intent router and calculator leave to the LLM
+MAIN_QUERIES = [
+    "Compare heat pumps and gas boilers for a {n}-room house in a cold climate",
+    "Draft a two-year decarbonisation roadmap for warehouse {n}",
+    "What trade-offs should site {n} weigh between offsets and on-site reductions?",
+    "How should a {n}-person startup structure its first ESG report?",
+    "Suggest supplier engagement steps for a retailer with {n} stores",
+]
+
+LTM_QUERIES = [
+    "What is a good first step toward a greener office?",
+    "How do I get my team interested in our green goals?",
+    "Which metrics matter most for a small manufacturer?",
+    "How often should we review our sustainability targets?",
+]
+
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def git_commit() -> Optional[str]:
+    """Current commit hash, so results can be matched to the code that produced them."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Scenario:
+    """One kind of request; call() returns (status code, answer source or None)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._sequence = 0
+
+    def next_index(self) -> int:
+        self._sequence += 1
+        return self._sequence
+
+    async def prepare(self, client: httpx.AsyncClient):
+        """Runs once before the measured phase."""
+
+    async def call(self, client: httpx.AsyncClient) -> tuple:
+        raise NotImplementedError
+
+
+class MainScenario(Scenario):
+    async def call(self, client: httpx.AsyncClient) -> tuple:
+        i = self.next_index()
+        query = MAIN_QUERIES[i % len(MAIN_QUERIES)].format(n=i)
+        response = await client.post(BASE_PATH, json={
+            "messages": [{"role": "user", "content": query}],
+            "use_cache": False
+        })
+        return response.status_code, _source(response)
+
+
+class LTMScenario(Scenario):
+    async def prepare(self, client: httpx.AsyncClient):
+        # Store every answer once so the measured phase reads from LTM
+        for query in LTM_QUERIES:
+            await client.post(BASE_PATH, json={"messages": [{"role": "user", "content": query}]})
+        # Let coalesced results expire, or the first second is served from them instead of LTM
+        linger = (load_settings().get("single_flight", {}) or {}).get("linger", 1.0)
+        await asyncio.sleep(float(linger))
+
+    async def call(self, client: httpx.AsyncClient) -> tuple:
+        query = LTM_QUERIES[self.next_index() % len(LTM_QUERIES)]
+        response = await client.post(BASE_PATH, json={"messages": [{"role": "user", "content": query}]})
+        return response.status_code, _source(response)
+
+
+class StreamScenario(Scenario):
+    async def call(self, client: httpx.AsyncClient) -> tuple:
+        i = self.next_index()
+        query = MAIN_QUERIES[i % len(MAIN_QUERIES)].format(n=i)
+        source = None
+        async with client.stream("POST", f"{BASE_PATH}/stream?format=ndjson", json={
+            "messages": [{"role": "user", "content": query}],
+            "use_cache": False
+        }) as response:
+            async for line in response.aiter_lines():
+                if '"status"' in line:
+                    source = ((json.loads(line).get("data") or {}).get("metadata") or {}).get("source")
+            return response.status_code, source
+
+
+class HealthScenario(Scenario):
+    async def call(self, client: httpx.AsyncClient) -> tuple:
+        response = await client.get(f"{BASE_PATH}/health")
+        return response.status_code, None
+
+
+SCENARIOS = {
+    "main": MainScenario,
+    "ltm": LTMScenario,
+    "stream": StreamScenario,
+    "health": HealthScenario,
+}
+
+
+def _source(response: httpx.Response) -> Optional[str]:
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    if body.get("status") != "success":
+        return "error"
+    return ((body.get("data") or {}).get("metadata") or {}).get("source")
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    duration: float,
+    concurrency: Optional[int],
+    rps: Optional[float],
+    max_requests: Optional[int]
+) -> Dict:
+    """Drive one scenario and summarize the results."""
+    await scenario.prepare(client)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    sources: Counter = Counter()
+    failures = 0
+
+    async def one(scheduled: float):
+        nonlocal failures
+        try:
+            status, source = await scenario.call(client)
+        except Exception as e:
+            status, source = type(e).__name__, None
+        latencies.append(time.perf_counter() - scheduled)
+        statuses[str(status)] += 1
+        if source:
+            sources[source] += 1
+        if not isinstance(status, int) or status >= 400 or source == "error":
+            failures += 1
+
+    started = time.perf_counter()
+    stop_at = started + duration
+
+    def more(sent: int) -> bool:
+        return time.perf_counter() < stop_at and (max_requests is None or sent < max_requests)
+
+    if rps:
+        # Open loop: start times are fixed in advance, so a slow server cannot slow the load down
+        interval = 1.0 / rps
+        tasks = []
+        sent = 0
+        while more(sent):
+            scheduled = started + sent * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.ensure_future(one(scheduled)))
+            sent += 1
+        await asyncio.gather(*tasks)
+    else:
+        sent = 0
+
+        async def worker():
+            nonlocal sent
+            while more(sent):
+                sent += 1
+                await one(time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    elapsed = time.perf_counter() - started
+    ordered = sorted(latencies)
+    count = len(ordered)
+    return {
+        "requests": count,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "error_rate": round(failures / count, 4) if count else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / count * 1000, 2) if count else 0.0,
+            "p50": round(percentile(ordered, 50) * 1000, 2),
+            "p95": round(percentile(ordered, 95) * 1000, 2),
+            "p99": round(percentile(ordered, 99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if count else 0.0
+        },
+        "status_codes": dict(statuses),
+        "sources": dict(sources)
+    }
+
+
+async def run(args) -> Dict:
+    stub = GeminiStub(
+        port=args.stub_port,
+        latency=args.stub_latency,
+        jitter=args.stub_jitter,
+        tail_rate=args.stub_tail_rate,
+        tail_latency=args.stub_tail_latency,
+        error_rate=args.stub_error_rate,
+        error_status=args.stub_error_status
+    )
+    stub.serve_in_thread()
+
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{args.stub_port}/v1"
+    os.environ["GEMINI_API_KEY"] = "stub"
+    import api
+    from shared.ltm_storage import create_ltm_storage
+    from shared.response_cache import ResponseCache
+
+    results = {}
+    with tempfile.TemporaryDirectory() as ltm_dir:
+        transport = httpx.ASGITransport(app=api.app)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with api.app.router.lifespan_context(api.app):
+            # Keep benchmark answers out of the agent's real memory
+            agent = await api.wait_for_agent()
+            settings = load_settings()
+            agent.ltm = create_ltm_storage(ltm_dir, settings.get("ltm", {}) or {})
+            agent.cache = ResponseCache.from_settings(agent.ltm, settings)
+
+            async with httpx.AsyncClient(
+                transport=transport,
+                base_url="http://loadtest",
+                timeout=60,
+                limits=limits
+            ) as client:
+                for name in args.scenarios:
+                    stub.reset_stats()
+                    results[name] = await run_scenario(
+                        client,
+                        SCENARIOS[name](name),
+                        args.duration,
+                        None if args.rps else args.concurrency,
+                        args.rps,
+                        args.requests
+                    )
+                    results[name]["upstream_calls"] = stub.stats["generate"] + stub.stats["stream"]
+
+        agent.ltm.close()
+
+    stub.shutdown()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "load": {"rps": args.rps} if args.rps else {"concurrency": args.concurrency},
+            "duration_s": args.duration,
+            "stub": {
+                "latency": args.stub_latency,
+                "jitter": args.stub_jitter,
+                "tail_rate": args.stub_tail_rate,
+                "tail_latency": args.stub_tail_latency,
+                "error_rate": args.stub_error_rate,
+                "error_status": args.stub_error_status
+            }
+        },
+        "scenarios": results
+    }
+
+
+def print_results(results: Dict):
+    print(f"{'scenario':<10}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}  sources")
+    for name, r in results["scenarios"].items():
+        latency = r["latency_ms"]
+        sources = ", ".join(f"{k}={v}" for k, v in sorted(r["sources"].items()))
+        print(
+            f"{name:<10}{r['requests']:>10}{r['throughput_rps']:>10}{latency['p50']:>10}"
+            f"{latency['p95']:>10}{latency['p99']:>10}{r['error_rate']:>9.2%}  {sources}"
+        )
+
+
+def print_comparison(results: Dict, baseline: Dict):
+    print(f"\nCompared with {baseline['meta'].get('commit') or 'baseline'} ({baseline['meta'].get('timestamp')}):")
+    print(f"{'scenario':<10}{'metric':<16}{'before':>12}{'after':>12}{'change':>10}")
+    for name, after in results["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        rows = [("throughput_rps", before["throughput_rps"], after["throughput_rps"])]
+        rows += [(f"{q}_ms", before["latency_ms"][q], after["latency_ms"][q]) for q in ("p50", "p95", "p99")]
+        rows.append(("error_rate", before["error_rate"], after["error_rate"]))
+        for metric, old, new in rows:
+            change = f"{(new - old) / old:+.1%}" if old else "n/a"
+            print(f"{name:<10}{metric:<16}{old:>12}{new:>12}{change:>10}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="In-process load test against the Gemini stub")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=["main", "ltm", "health"])
+    load = parser.add_mutually_exclusive_group()
+    load.add_argument("--concurrency", type=int, default=16, help="closed loop: requests in flight")
+    load.add_argument("--rps", type=float, help="open loop: requests started per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, help="stop a scenario after this many requests")
+    parser.add_argument("--stub-port", type=int, default=9182)
+    parser.add_argument("--stub-latency", type=float, default=0.2)
+    parser.add_argument("--stub-jitter", type=float, default=0.05)
+    parser.add_argument("--stub-tail-rate", type=float, default=0.0)
+    parser.add_argument("--stub-tail-latency", type=float, default=2.0)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--stub-error-status", type=int, default=503)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_results(results)
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""
+Micro-benchmarks for the LTM storage engines, with a regression gate.
+
+For each engine and store size, fills a fresh store and measures per-call
+latency of read (hit and miss), write, search_similar and store_response,
+first sequentially and then from several threads at once. Memory held by
+the filled store and its size on disk are reported too.
+
+With --baseline, every operation's p50 is compared with the stored run and
+the script exits with status 1 if any got slower by more than --threshold.
+
+Usage:
+    python benchmarks/ltm_bench.py --save-baseline ltm_baseline.json
+    python benchmarks/ltm_bench.py --baseline ltm_baseline.json --threshold 0.25
+    python benchmarks/ltm_bench.py --engines sqlite --sizes 1000 10000 100000 --threads 8
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.ltm_storage import create_ltm_storage
+from shared.utils import load_settings
+
+
+# About the size of a generated answer
+RESPONSE = (
+    "To cut the site's footprint, start with an energy audit, move to a renewable "
+    "electricity tariff, upgrade lighting and HVAC controls, and set a target for "
+    "waste diversion. Track progress monthly against a baseline year. "
+) * 4
+
+
+def git_commit() -> Optional[str]:
+    """Current commit hash, so results can be matched to the code that produced them."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def stored_query(i: int) -> str:
+    return f"How can facility {i} reduce its energy use and carbon emissions?"
+
+
+def paraphrase(i: int) -> str:
+    """Differs from stored_query(i) in wording, so only the semantic index can match it."""
+    return f"How could facility {i} reduce energy use and carbon emissions?"
+
+
+def summarize(samples: List[int], elapsed: float) -> Dict[str, float]:
+    """Latency percentiles (microseconds) and throughput for nanosecond samples."""
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(count - 1, int(q / 100 * count))] / 1000, 2)
+
+    return {
+        "p50_us": pick(50),
+        "p95_us": pick(95),
+        "p99_us": pick(99),
+        "ops_per_s": round(count / elapsed) if elapsed else 0
+    }
+
+
+def timed(func: Callable[[int], object], count: int) -> Dict[str, float]:
+    """Call func(i) count times, timing each call."""
+    samples = []
+    started = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter_ns()
+        func(i)
+        samples.append(time.perf_counter_ns() - t0)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def disk_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def bench_store(engine: str, size: int, ops: int, threads: int, config: dict) -> Dict:
+    """Fill one fresh store and run the sequential and concurrent workloads on it."""
+    rng = random.Random(size)
+    results = {}
+
+    with tempfile.TemporaryDirectory() as path:
+        config = dict(config, storage_type=engine)
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        store = create_ltm_storage(path, config)
+        for i in range(size):
+            store.store_response(stored_query(i), RESPONSE)
+        store.flush()
+        fill_seconds = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results["fill"] = {
+            "seconds": round(fill_seconds, 2),
+            "memory_mb": round(memory / 2**20, 1),
+            "disk_mb": round(disk_size(path) / 2**20, 1)
+        }
+
+        hits = [store._generate_key(stored_query(rng.randrange(size))) for _ in range(ops)]
+        paraphrases = [paraphrase(rng.randrange(size)) for _ in range(ops)]
+        # New items use indices past the fill so they never collide
+        fresh = iter(range(size, size + 10 * ops))
+
+        results["sequential"] = {
+            "read_hit": timed(lambda i: store.read(hits[i]), ops),
+            "read_miss": timed(lambda i: store.read(f"missing-{i}"), ops),
+            "search_similar": timed(lambda i: store.search_similar(paraphrases[i]), ops),
+            "write": timed(lambda i: store.write(f"bench-{next(fresh)}", RESPONSE), ops),
+            "store_response": timed(lambda i: store.store_response(stored_query(next(fresh)), RESPONSE), ops)
+        }
+
+        # Mixed workload from several threads: mostly reads, some lookups and stores
+        per_thread = max(1, ops // threads)
+        samples: Dict[str, List[int]] = {"read_hit": [], "search_similar": [], "store_response": []}
+        fresh_lock = threading.Lock()
+
+        def worker(seed: int):
+            local_rng = random.Random(seed)
+            local = {name: [] for name in samples}
+            for _ in range(per_thread):
+                roll = local_rng.random()
+                if roll < 0.8:
+                    name, call = "read_hit", lambda: store.read(hits[local_rng.randrange(ops)])
+                elif roll < 0.9:
+                    name, call = "search_similar", lambda: store.search_similar(paraphrases[local_rng.randrange(ops)])
+                else:
+                    with fresh_lock:
+                        index = next(fresh)
+                    name, call = "store_response", lambda: store.store_response(stored_query(index), RESPONSE)
+                t0 = time.perf_counter_ns()
+                call()
+                local[name].append(time.perf_counter_ns() - t0)
+            for name, values in local.items():
+                samples[name].extend(values)
+
+        workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+        started = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        total = sum(len(values) for values in samples.values())
+        results["concurrent"] = {
+            name: summarize(values, elapsed) for name, values in samples.items() if values
+        }
+        results["concurrent_total_ops_per_s"] = round(total / elapsed) if elapsed else 0
+
+        store.close()
+
+    return results
+
+
+def flatten(results: Dict) -> Dict[str, Dict[str, float]]:
+    """Map "engine/size/workload/op" to that operation's numbers."""
+    flat = {}
+    for engine, sizes in results["engines"].items():
+        for size, workloads in sizes.items():
+            for workload in ("sequential", "concurrent"):
+                for op, numbers in workloads.get(workload, {}).items():
+                    flat[f"{engine}/{size}/{workload}/{op}"] = numbers
+    return flat
+
+
+def check_regressions(results: Dict, baseline: Dict, threshold: float, min_delta_us: float) -> List[str]:
+    """
+    Compare p50 latencies with a baseline run.
+
+    Returns:
+        One line per operation that got slower by more than threshold (and
+        by more than min_delta_us, so microsecond-level noise does not fail the gate)
+    """
+    failures = []
+    current = flatten(results)
+    for name, before in flatten(baseline).items():
+        after = current.get(name)
+        if after is None:
+            continue
+        old, new = before["p50_us"], after["p50_us"]
+        if new > old * (1 + threshold) and new - old > min_delta_us:
+            failures.append(f"{name}: p50 {old}us -> {new}us ({(new - old) / old:+.0%})")
+    return failures
+
+
+def print_results(results: Dict):
+    print(f"{'engine':<8}{'size':>8}  {'workload':<11}{'operation':<16}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'ops/s':>10}")
+    for engine, sizes in results["engines"].items():
+        for size, workloads in sizes.items():
+            fill = workloads["fill"]
+            print(
+                f"{engine:<8}{size:>8}  fill: {fill['seconds']}s, "
+                f"{fill['memory_mb']} MB in memory, {fill['disk_mb']} MB on disk"
+            )
+            for workload in ("sequential", "concurrent"):
+                for op, n in workloads[workload].items():
+                    print(
+                        f"{'':<8}{'':>8}  {workload:<11}{op:<16}{n['p50_us']:>10}"
+                        f"{n['p95_us']:>10}{n['p99_us']:>10}{n['ops_per_s']:>10}"
+                    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LTM storage micro-benchmarks")
+    parser.add_argument("--engines", nargs="+", choices=["json", "sqlite"], default=["json", "sqlite"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=2000, help="timed calls per operation")
+    parser.add_argument("--threads", type=int, default=4, help="threads in the concurrent workload")
+    parser.add_argument("--semantic", action="store_true", help="benchmark with the semantic index even if ltm.semantic_search is off")
+    parser.add_argument("--no-semantic", action="store_true", help="benchmark without the semantic index")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--save-baseline", help="write results to this file for later --baseline runs")
+    parser.add_argument("--baseline", help="fail if slower than this earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-us", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    config = dict(load_settings().get("ltm", {}) or {})
+    if args.semantic:
+        config["semantic_search"] = True
+    if args.no_semantic:
+        config["semantic_search"] = False
+    # Flush on demand only, so background work does not land inside timings
+    config["flush_interval"] = 3600
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "ops": args.ops,
+            "threads": args.threads,
+            "semantic_search": bool(config.get("semantic_search", False))
+        },
+        "engines": {}
+    }
+    for engine in args.engines:
+        results["engines"][engine] = {}
+        for size in args.sizes:
+            print(f"Benchmarking {engine} with {size} entries...", file=sys.stderr)
+            results["engines"][engine][str(size)] = bench_store(engine, size, args.ops, args.threads, config)
+
+    print_results(results)
+
+    for path in (args.json, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = check_regressions(results, baseline, args.threshold, args.min_delta_us)
+        if failures:
+            print(f"\nRegressions beyond {args.threshold:.0%} against {baseline['meta'].get('commit') or args.baseline}:")
+            for line in failures:
+                print(f"  {line}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Compare Gemini request sizes for the legacy, native and context-cached payloads.
+
+Runs the agent against the local Gemini stub and reports the bytes and
+prompt tokens the stub received per request for conversations of several
+lengths.
+
+Usage:
+    python benchmarks/payload_size.py [--turns 1 5 20] [--requests 20] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.gemini_stub import GeminiStub, estimate_tokens
+from shared.context_cache import ContextCache
+
+
+def conversation(turns: int, variant: int) -> list:
+    """A conversation with `turns` user messages, ending with a user message."""
+    messages = []
+    for i in range(turns - 1):
+        messages.append({"role": "user", "content": f"Question {i} about site {variant}: how should we assess it?"})
+        messages.append({"role": "assistant", "content": f"For site {variant}, start with an audit of item {i}. " * 4})
+    messages.append({"role": "user", "content": f"What should site {variant} prioritize next?"})
+    return messages
+
+
+def legacy_payload(agent, messages: list) -> dict:
+    """Payload shape used before native multi-turn requests: one flattened text part."""
+    prompt = agent.prompt_builder.build(messages[-1]["content"], messages)
+    return {
+        "contents": [{"parts": [{"text": prompt.text()}]}],
+        "generationConfig": {"temperature": 0.8, "maxOutputTokens": 800, "topP": 0.9}
+    }
+
+
+async def measure(agent, stub: GeminiStub, turns: int, requests: int) -> dict:
+    stub.reset_stats()
+    for variant in range(requests):
+        await agent.process_api_request_async(conversation(turns, variant), use_cache=False)
+    stats = dict(stub.stats)
+    calls = max(1, stats["generate"])
+    return {
+        "bytes_per_request": round(stats["bytes_received"] / calls),
+        "prompt_tokens_per_request": round(stats["prompt_tokens"] / calls),
+        "cached_tokens_per_request": round(stats["cached_tokens"] / calls)
+    }
+
+
+async def run(turn_counts: list, requests: int, port: int) -> dict:
+    stub = GeminiStub(port=port)
+    stub.serve_in_thread()
+
+    os.environ["GEMINI_BASE_URL"] = f"http://127.0.0.1:{port}/v1"
+    from agents.workers.sustainability_agent import SustainabilityFootprintAgent
+
+    agent = SustainabilityFootprintAgent(api_key="stub")
+    # Measure the LLM path only
+    agent.use_calculator = False
+    agent.route_locally = False
+    agent.coalesce_requests = False
+    await agent.gemini.start()
+
+    results = {}
+    for turns in turn_counts:
+        legacy = [len(json.dumps(legacy_payload(agent, conversation(turns, v))).encode()) for v in range(requests)]
+        legacy_tokens = [
+            estimate_tokens(legacy_payload(agent, conversation(turns, v))["contents"][0]["parts"][0]["text"])
+            for v in range(requests)
+        ]
+
+        agent.context_cache = None
+        native = await measure(agent, stub, turns, requests)
+
+        agent.context_cache = ContextCache(agent.gemini, agent.system_prompt)
+        cached = await measure(agent, stub, turns, requests)
+        await agent.context_cache.aclose()
+
+        results[f"{turns}_turns"] = {
+            "legacy": {
+                "bytes_per_request": round(sum(legacy) / requests),
+                "prompt_tokens_per_request": round(sum(legacy_tokens) / requests)
+            },
+            "native": native,
+            "native_cached": cached
+        }
+
+    await agent.gemini.aclose()
+    stub.shutdown()
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Gemini payload size comparison")
+    parser.add_argument("--turns", type=int, nargs="+", default=[1, 5, 20])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--port", type=int, default=9181)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.turns, args.requests, args.port))
+
+    print(f"{'conversation':<14}{'payload':<16}{'bytes/request':>15}{'uncached tokens':>17}")
+    for name, modes in results.items():
+        for mode, values in modes.items():
+            uncached = values["prompt_tokens_per_request"] - values.get("cached_tokens_per_request", 0)
+            print(f"{name:<14}{mode:<16}{values['bytes_per_request']:>15}{uncached:>17}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
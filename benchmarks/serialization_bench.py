@@ -0,0 +1,156 @@
+"""
+Compare JSON encoding paths for API responses and LTM persistence.
+
+For a typical main-endpoint AgentResponse, a /calculate response and an LTM
+snapshot, reports bytes and encode time per call of:
+- the previous path (FastAPI's jsonable_encoder + json.dumps for responses,
+  json.dump(indent=2) for the snapshot)
+- the stdlib compact backend of shared.serialization
+- the orjson backend (if orjson is installed)
+- pydantic-core writing the model directly (FastJSONResponse)
+Request messages are also converted with the deprecated .dict() and with
+model_dump() for comparison.
+
+Usage:
+    python benchmarks/serialization_bench.py [--iterations 2000] [--snapshot-entries 1000] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from communication.models import AgentRequest, AgentResponse, Status
+from shared import serialization
+from shared.carbon_calculator import CarbonCalculator
+
+
+ANSWER = (
+    "To cut the site's footprint, start with an energy audit, move to a renewable "
+    "electricity tariff, upgrade lighting and HVAC controls, and set a target for "
+    "waste diversion — aim for 50% within two years. Track progress monthly against "
+    "a baseline year and report scope 1, 2 and 3 emissions separately. "
+) * 4
+
+
+def main_response() -> AgentResponse:
+    return AgentResponse(
+        agent_name="sustainability-footprint-agent",
+        status=Status.SUCCESS,
+        data={"message": ANSWER, "source": "generated", "query": "How can our site cut emissions?", "prompt_tokens": 812}
+    )
+
+
+def calculate_response(rows: int) -> AgentResponse:
+    activities = [
+        {"activity": "electricity", "amount": 100 + i, "unit": "kWh"} if i % 2 else
+        {"activity": "diesel_car", "amount": 10 + i, "unit": "km"}
+        for i in range(rows)
+    ]
+    return AgentResponse(
+        agent_name="sustainability-footprint-agent",
+        status=Status.SUCCESS,
+        data=CarbonCalculator().calculate_many(activities)
+    )
+
+
+def snapshot(entries: int) -> dict:
+    return {
+        f"{i:032x}": {
+            "value": {"query": f"question {i} about site emissions", "response": ANSWER, "timestamp": "2026-01-01T00:00:00Z"},
+            "timestamp": "2026-01-01T00:00:00Z",
+            "access_count": i % 7,
+            "last_accessed": "2026-01-02T00:00:00Z"
+        }
+        for i in range(entries)
+    }
+
+
+def timed(encode: Callable[[], object], iterations: int) -> dict:
+    payload = encode()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode()
+    elapsed = time.perf_counter() - start
+    result = {"us_per_call": round(elapsed / iterations * 1e6, 2)}
+    if isinstance(payload, bytes):
+        result["bytes"] = len(payload)
+    return result
+
+
+def starlette_render(content) -> bytes:
+    """What JSONResponse.render did after FastAPI's serialize_response."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def response_paths(model: AgentResponse, iterations: int) -> dict:
+    results = {"fastapi_default": timed(lambda: starlette_render(jsonable_encoder(model)), iterations)}
+    for backend in ("json", "orjson"):
+        if backend == "orjson" and serialization.orjson is None:
+            continue
+        serializer = serialization.create_serializer(backend)
+        results[f"{backend}_model_dump"] = timed(lambda: serializer.dumps_bytes(model.model_dump(mode="json")), iterations)
+    results["pydantic_core_direct"] = timed(lambda: serialization.model_json(model), iterations)
+    return results
+
+
+def snapshot_paths(data: dict, iterations: int) -> dict:
+    results = {"json_indent2": timed(lambda: json.dumps(data, indent=2).encode("utf-8"), iterations)}
+    for backend in ("json", "orjson"):
+        if backend == "orjson" and serialization.orjson is None:
+            continue
+        serializer = serialization.create_serializer(backend)
+        results[f"{backend}_compact"] = timed(lambda: serializer.dumps_bytes(data), iterations)
+    return results
+
+
+def message_paths(iterations: int) -> dict:
+    request = AgentRequest(messages=[
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"Turn {i}: " + ANSWER[:200]}
+        for i in range(10)
+    ])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        legacy = timed(lambda: [msg.dict() for msg in request.messages], iterations)
+    current = timed(lambda: [msg.model_dump() for msg in request.messages], iterations)
+    return {"dict": legacy, "model_dump": current}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="JSON encoding comparison")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--calculate-rows", type=int, default=1000)
+    parser.add_argument("--snapshot-entries", type=int, default=1000)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    results = {
+        "main_response": response_paths(main_response(), args.iterations),
+        "calculate_response": response_paths(calculate_response(args.calculate_rows), max(1, args.iterations // 100)),
+        "ltm_snapshot": snapshot_paths(snapshot(args.snapshot_entries), max(1, args.iterations // 100)),
+        "request_messages": message_paths(args.iterations)
+    }
+
+    print(f"orjson installed: {serialization.orjson is not None}")
+    print(f"{'payload':<20}{'path':<24}{'bytes':>10}{'us/call':>12}{'saved':>9}")
+    for name, paths in results.items():
+        baseline = next(iter(paths.values()))
+        for path, values in paths.items():
+            saved = 1 - values["us_per_call"] / baseline["us_per_call"] if baseline["us_per_call"] else 0.0
+            print(f"{name:<20}{path:<24}{values.get('bytes', '-'):>10}{values['us_per_call']:>12}{saved:>9.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
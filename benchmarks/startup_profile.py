@@ -0,0 +1,152 @@
+"""
+Startup profile: import time per module and agent init time per component.
+
+Reports, for a cold interpreter:
+- `import api` time, from `python -X importtime`, grouped by top-level
+  package, with the slowest first-party modules (agents, communication,
+  shared)
+- the time start_agent spends on importing the agent module, constructing
+  the agent (broken down by the components its __init__ builds) and opening
+  the Gemini client
+
+The server binds after the import; agent startup runs in the background and
+is what /health waits for before reporting ready.
+
+Usage:
+    python benchmarks/startup_profile.py [--top 15] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+FIRST_PARTY = ("api", "agents", "communication", "shared")
+
+
+def import_profile(module: str = "api") -> List[dict]:
+    """Per-module import times of `module` in a fresh interpreter (python -X importtime)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        entry = modules.setdefault(name, {"module": name, "self_ms": 0.0, "cumulative_ms": 0.0})
+        # A submodule import that first loads its package is listed twice
+        entry["self_ms"] += int(self_us) / 1000
+        entry["cumulative_ms"] = max(entry["cumulative_ms"], int(cumulative_us) / 1000)
+    return list(modules.values())
+
+
+def by_package(modules: List[dict]) -> Dict[str, float]:
+    """Self import time summed per top-level package, slowest first."""
+    totals = defaultdict(float)
+    for entry in modules:
+        totals[entry["module"].split(".")[0]] += entry["self_ms"]
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def component_times(profile: cProfile.Profile) -> Dict[str, float]:
+    """Cumulative time of each first-party call made directly by SustainabilityFootprintAgent.__init__."""
+    stats = pstats.Stats(profile)
+    components = {}
+    for (filename, _, function), (_, _, _, _, callers) in stats.stats.items():
+        if not os.path.abspath(filename).startswith(PROJECT_ROOT):
+            continue
+        for (caller_file, _, caller_function), timing in callers.items():
+            if caller_function == "__init__" and caller_file.endswith("sustainability_agent.py"):
+                name = f"{os.path.splitext(os.path.basename(filename))[0]}.{function}"
+                components[name] = components.get(name, 0.0) + timing[3] * 1000
+    return dict(sorted(components.items(), key=lambda item: item[1], reverse=True))
+
+
+async def agent_profile() -> dict:
+    """Time the steps of api.start_agent in this process."""
+    timings = {}
+
+    start = time.perf_counter()
+    import api  # noqa: F401
+    timings["import_api_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    from agents.workers.sustainability_agent import SustainabilityFootprintAgent
+    timings["import_agent_ms"] = (time.perf_counter() - start) * 1000
+
+    # Constructed on this thread so cProfile sees it; start_agent uses a worker thread
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    agent = SustainabilityFootprintAgent()
+    profile.disable()
+    timings["construct_agent_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    await agent.gemini.start()
+    timings["gemini_start_ms"] = (time.perf_counter() - start) * 1000
+
+    await agent.gemini.aclose()
+    agent.ltm.close()
+    return {"steps": timings, "components": component_times(profile)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Import and agent init time per module")
+    parser.add_argument("--top", type=int, default=15, help="first-party modules and packages to list")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    modules = import_profile()
+    total_ms = next(entry["cumulative_ms"] for entry in modules if entry["module"] == "api")
+    first_party = sorted(
+        (entry for entry in modules if entry["module"].split(".")[0] in FIRST_PARTY),
+        key=lambda entry: entry["cumulative_ms"],
+        reverse=True
+    )
+    packages = by_package(modules)
+    agent = asyncio.run(agent_profile())
+
+    print(f"import api (fresh interpreter): {total_ms:.1f} ms")
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for name, self_ms in list(packages.items())[:args.top]:
+        print(f"{name:<32}{self_ms:>10.1f}")
+    print(f"\n{'first-party module':<40}{'self ms':>10}{'cumul. ms':>11}")
+    for entry in first_party[:args.top]:
+        print(f"{entry['module']:<40}{entry['self_ms']:>10.1f}{entry['cumulative_ms']:>11.1f}")
+    print(f"\n{'agent startup step':<40}{'ms':>10}")
+    for name, ms in agent["steps"].items():
+        print(f"{name:<40}{ms:>10.1f}")
+    print(f"\n{'agent component (profiled)':<40}{'ms':>10}")
+    for name, ms in list(agent["components"].items())[:args.top]:
+        print(f"{name:<40}{ms:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "import_api_ms": total_ms,
+                "packages_self_ms": packages,
+                "first_party": first_party,
+                "agent": agent
+            }, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
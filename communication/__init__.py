@@ -11,6 +11,11 @@ from .models import (
     Message,
     AgentRequest,
     AgentResponse,
+    BatchRequest,
+    BatchItemResponse,
+    BatchResponse,
+    Activity,
+    CalculationRequest,
     HealthCheckResponse
 )
 
@@ -21,15 +26,36 @@ from .protocol import (
     SUSTAINABILITY_INTENTS
 )
 
+from .batching import MessageBatcher
+
+from .bus import (
+    Transport,
+    InProcessTransport,
+    FileSpoolTransport,
+    MessageBus,
+    create_transport
+)
+
 __all__ = [
     "Status",
     "Role",
     "Message",
     "AgentRequest",
     "AgentResponse",
+    "BatchRequest",
+    "BatchItemResponse",
+    "BatchResponse",
+    "Activity",
+    "CalculationRequest",
     "HealthCheckResponse",
     "MessageType",
     "TaskPriority",
     "AgentStatus",
-    "SUSTAINABILITY_INTENTS"
+    "SUSTAINABILITY_INTENTS",
+    "MessageBatcher",
+    "Transport",
+    "InProcessTransport",
+    "FileSpoolTransport",
+    "MessageBus",
+    "create_transport"
 ]
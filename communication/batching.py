@@ -0,0 +1,136 @@
+"""
+Size/time batching of outbound messages.
+
+Messages are collected until `batch_size` are waiting or `flush_interval`
+seconds have passed since the first one was added, then handed to a send
+callback as one list. Used by the message bus and by bulk task execution in
+AbstractWorkerAgent.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+from shared.structured_logging import get_logger
+
+
+logger = get_logger("bus")
+
+
+class MessageBatcher:
+    """
+    Groups items for a send callback by size or age.
+
+    A batch whose send raises is kept (in order, ahead of newer items) and
+    retried at the next flush.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[List[Any]], Awaitable[None]],
+        batch_size: int = 50,
+        flush_interval: float = 0.5
+    ):
+        """
+        Initialize the batcher (call start() for time-based flushing).
+
+        Args:
+            send: Coroutine function receiving one batch (list of items)
+            batch_size: Items per batch; reaching it flushes at once
+            flush_interval: Longest time an item waits for its batch
+        """
+        self.send = send
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+
+        self._items: List[Any] = []
+        self._first_added_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._timer: Optional[asyncio.Task] = None
+        self._size_flushes: set = set()
+
+        self._sent = 0
+        self._batches = 0
+        self._errors = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def start(self):
+        """Start the background task that flushes by size and age."""
+        if self._timer is None:
+            self._timer = asyncio.create_task(self._run())
+
+    def add(self, item: Any):
+        """Queue an item for the next batch."""
+        if not self._items:
+            self._first_added_at = time.monotonic()
+            self._wakeup.set()
+        self._items.append(item)
+        if len(self._items) == self.batch_size and self._timer is not None:
+            # Only full batches; items added meanwhile wait for theirs (or the interval)
+            flush = asyncio.get_running_loop().create_task(self.flush(partial=False))
+            self._size_flushes.add(flush)
+            flush.add_done_callback(self._size_flushes.discard)
+
+    async def _run(self):
+        # Plain sleeps and waits only: asyncio.wait_for can swallow a cancellation on Python 3.11
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._first_added_at is not None:
+                delay = self._first_added_at + self.flush_interval - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    await self.flush()
+
+    async def flush(self, partial: bool = True) -> bool:
+        """
+        Send every queued item, in batches of at most batch_size.
+
+        Args:
+            partial: Also send a last batch smaller than batch_size
+
+        Returns:
+            True if no send failed, False otherwise
+        """
+        async with self._lock:
+            while self._items and (partial or len(self._items) >= self.batch_size):
+                batch, self._items = self._items[:self.batch_size], self._items[self.batch_size:]
+                try:
+                    await self.send(batch)
+                except Exception as e:
+                    self._errors += 1
+                    logger.error("Error sending a batch of %d messages: %s", len(batch), e)
+                    self._items = batch + self._items
+                    self._first_added_at = time.monotonic()
+                    return False
+                self._sent += len(batch)
+                self._batches += 1
+            if not self._items:
+                self._first_added_at = None
+            return True
+
+    async def aclose(self) -> bool:
+        """
+        Stop the background task and send what is left.
+
+        Returns:
+            True if everything was sent
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            await asyncio.gather(self._timer, *self._size_flushes, return_exceptions=True)
+            self._timer = None
+        return await self.flush()
+
+    def stats(self) -> dict:
+        """Queued, sent and failed counts."""
+        return {
+            "queued": len(self._items),
+            "sent": self._sent,
+            "batches": self._batches,
+            "send_errors": self._errors
+        }
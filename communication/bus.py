@@ -0,0 +1,390 @@
+"""
+Worker-side message bus for supervisor traffic.
+
+Consumes task_assignment messages from a transport with bounded concurrency,
+runs them on the worker agent and publishes completion_report and
+status_update messages in batches. A task_assignment is acknowledged once
+its completion report has been published, so an interrupted worker leaves
+unfinished assignments for redelivery (at-least-once).
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from .batching import MessageBatcher
+from .protocol import AgentStatus, MessageType
+from shared.structured_logging import get_logger
+
+
+logger = get_logger("bus")
+
+
+class Transport(ABC):
+    """Moves raw JSON messages between the supervisor and one worker."""
+
+    async def start(self):
+        """Open the transport (optional)."""
+
+    @abstractmethod
+    async def receive(self, timeout: float) -> Optional[Tuple[str, str]]:
+        """
+        Wait for the next inbound message.
+
+        Args:
+            timeout: Seconds to wait before returning None
+
+        Returns:
+            (delivery ID, raw JSON message), or None if nothing arrived
+        """
+
+    @abstractmethod
+    async def ack(self, delivery_id: str):
+        """Mark an inbound message as handled so it is not delivered again."""
+
+    @abstractmethod
+    async def publish(self, messages: List[dict]):
+        """Send a batch of outbound messages; raises if the batch was not sent."""
+
+    async def close(self):
+        """Release the transport's resources (optional)."""
+
+
+class InProcessTransport(Transport):
+    """
+    Transport over asyncio queues, for a supervisor in the same process (and tests).
+
+    The supervisor calls deliver() and reads published batches from `outbox`.
+    """
+
+    def __init__(self):
+        self._inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.unacked: Dict[str, str] = {}
+
+    def deliver(self, message: Any) -> str:
+        """
+        Queue a message for the worker.
+
+        Args:
+            message: Message dictionary or raw JSON string
+
+        Returns:
+            Delivery ID
+        """
+        raw = message if isinstance(message, str) else json.dumps(message)
+        delivery_id = uuid.uuid4().hex
+        self._inbox.put_nowait((delivery_id, raw))
+        return delivery_id
+
+    async def receive(self, timeout: float) -> Optional[Tuple[str, str]]:
+        # asyncio.wait rather than wait_for, which can swallow the consumer's cancellation on 3.11
+        get = asyncio.ensure_future(self._inbox.get())
+        try:
+            await asyncio.wait({get}, timeout=timeout)
+        finally:
+            if not get.done():
+                get.cancel()
+        if not get.done():
+            return None
+        delivery_id, raw = get.result()
+        self.unacked[delivery_id] = raw
+        return delivery_id, raw
+
+    async def ack(self, delivery_id: str):
+        self.unacked.pop(delivery_id, None)
+
+    async def publish(self, messages: List[dict]):
+        await self.outbox.put(list(messages))
+
+
+class FileSpoolTransport(Transport):
+    """
+    File-backed stand-in for a broker, using a spool directory.
+
+    The supervisor writes one task_assignment per file into `inbox/`
+    (writing to a temporary name and renaming, so a worker never reads a
+    partial file). A worker claims a file by renaming it into `processing/`,
+    which is atomic, so several worker processes can share one spool. Ack
+    deletes the claimed file. Each published batch becomes one JSON-lines
+    file in `outbox/`. Claims of worker processes that are no longer running
+    are returned to `inbox/` at start.
+    """
+
+    def __init__(self, spool_dir: str, poll_interval: float = 0.2):
+        """
+        Initialize the transport.
+
+        Args:
+            spool_dir: Directory holding inbox/, processing/ and outbox/
+            poll_interval: Seconds between scans of an empty inbox
+        """
+        self.spool_dir = spool_dir
+        self.poll_interval = max(0.01, poll_interval)
+        self.inbox_dir = os.path.join(spool_dir, "inbox")
+        self.processing_dir = os.path.join(spool_dir, "processing")
+        self.outbox_dir = os.path.join(spool_dir, "outbox")
+        self._ready: List[str] = []
+
+    async def start(self):
+        await asyncio.to_thread(self._prepare)
+
+    def _prepare(self):
+        for directory in (self.inbox_dir, self.processing_dir, self.outbox_dir):
+            os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(self.processing_dir):
+            pid = name.split("-", 1)[0]
+            # Claims under our own PID are left over from an earlier process that had it (e.g. PID 1 in a container)
+            if pid.isdigit() and (int(pid) == os.getpid() or not _process_alive(int(pid))):
+                try:
+                    os.rename(os.path.join(self.processing_dir, name), os.path.join(self.inbox_dir, name.split("-", 1)[1]))
+                except OSError:
+                    pass
+
+    def _claim(self) -> Optional[Tuple[str, str]]:
+        """Claim the oldest unclaimed inbox file (blocking)."""
+        if not self._ready:
+            self._ready = sorted(name for name in os.listdir(self.inbox_dir) if name.endswith(".json"))
+        while self._ready:
+            name = self._ready.pop(0)
+            claimed = os.path.join(self.processing_dir, f"{os.getpid()}-{name}")
+            try:
+                os.rename(os.path.join(self.inbox_dir, name), claimed)
+            except FileNotFoundError:
+                continue  # another worker claimed it
+            with open(claimed, "r", encoding="utf-8") as f:
+                return claimed, f.read()
+        return None
+
+    async def receive(self, timeout: float) -> Optional[Tuple[str, str]]:
+        deadline = time.monotonic() + timeout
+        while True:
+            claimed = await asyncio.to_thread(self._claim)
+            if claimed is not None:
+                return claimed
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    async def ack(self, delivery_id: str):
+        try:
+            await asyncio.to_thread(os.remove, delivery_id)
+        except FileNotFoundError:
+            pass
+
+    def _write_batch(self, messages: List[dict]):
+        name = f"{time.time_ns()}-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        temp_path = os.path.join(self.outbox_dir, f".{name}.tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message) + "\n")
+        os.replace(temp_path, os.path.join(self.outbox_dir, name))
+
+    async def publish(self, messages: List[dict]):
+        await asyncio.to_thread(self._write_batch, messages)
+
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows; keep its claims
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def create_transport(config: dict, spool_dir: str) -> Transport:
+    """
+    Create the transport selected by the `message_bus` section of settings.yaml.
+
+    Args:
+        config: The `message_bus` settings dictionary; `transport` is
+            "memory" or "file"
+        spool_dir: Spool directory for the file transport
+
+    Returns:
+        Transport instance
+    """
+    transport_type = str(config.get("transport", "file")).lower()
+    if transport_type == "memory":
+        return InProcessTransport()
+    if transport_type == "file":
+        return FileSpoolTransport(spool_dir, poll_interval=float(config.get("poll_interval", 0.2)))
+    raise ValueError(f"Unknown message bus transport: {transport_type}")
+
+
+class MessageBus:
+    """
+    Runs a worker agent against a transport.
+
+    At most `concurrency` task_assignments are in progress at once; the bus
+    does not take further messages from the transport until one finishes.
+    Outbound messages are published when `batch_size` are waiting or
+    `flush_interval` seconds after the first one was queued.
+    """
+
+    def __init__(
+        self,
+        agent,
+        transport: Transport,
+        concurrency: int = 8,
+        batch_size: int = 50,
+        flush_interval: float = 0.5
+    ):
+        """
+        Initialize the bus.
+
+        Args:
+            agent: AbstractWorkerAgent handling the tasks
+            transport: Transport to consume from and publish to
+            concurrency: task_assignments processed at the same time
+            batch_size: Outbound messages per published batch
+            flush_interval: Longest time an outbound message waits for a batch
+        """
+        self.agent = agent
+        self.transport = transport
+        self.concurrency = max(1, concurrency)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval)
+
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._tasks: set = set()
+        # Items are (message, delivery ID to acknowledge once it is published, or None)
+        self._outbox = MessageBatcher(self._publish, self.batch_size, self.flush_interval)
+        self._active = 0
+        self._consumer: Optional[asyncio.Task] = None
+        self._running = False
+
+        self._received = 0
+        self._completed = 0
+        self._failed = 0
+
+    @classmethod
+    def from_settings(cls, agent, settings: dict, spool_dir: str) -> "MessageBus":
+        """Build a bus from the `message_bus` section of settings.yaml."""
+        config = settings.get("message_bus", {}) or {}
+        return cls(
+            agent,
+            create_transport(config, spool_dir),
+            concurrency=int(config.get("concurrency", 8)),
+            batch_size=int(config.get("batch_size", 50)),
+            flush_interval=float(config.get("flush_interval", 0.5))
+        )
+
+    async def start(self):
+        """Open the transport and start consuming."""
+        await self.transport.start()
+        self._running = True
+        self._queue(self.agent.build_status_update(AgentStatus.IDLE))
+        self._consumer = asyncio.create_task(self._consume())
+        self._outbox.start()
+
+    async def stop(self, drain: bool = True):
+        """
+        Stop consuming, then publish what is queued and close the transport.
+
+        Args:
+            drain: Let in-progress tasks finish (and report) first; otherwise
+                they are cancelled and stay unacknowledged
+        """
+        self._running = False
+        if self._consumer is not None:
+            self._consumer.cancel()
+            await asyncio.gather(self._consumer, return_exceptions=True)
+        if self._tasks:
+            if not drain:
+                for task in self._tasks:
+                    task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._queue(self.agent.build_status_update(AgentStatus.OFFLINE))
+        await self._outbox.aclose()
+        await self.transport.close()
+
+    async def _consume(self):
+        while self._running:
+            await self._slots.acquire()
+            try:
+                delivery = await self.transport.receive(self.flush_interval or 0.5)
+            except Exception as e:
+                self._slots.release()
+                logger.error("Error receiving from the message bus: %s", e)
+                await asyncio.sleep(1.0)
+                continue
+            if delivery is None:
+                self._slots.release()
+                continue
+            self._received += 1
+            task = asyncio.create_task(self._handle(*delivery))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _handle(self, delivery_id: str, raw: str):
+        try:
+            try:
+                message = json.loads(raw)
+            except json.JSONDecodeError as e:
+                logger.error("Error decoding message: %s", e)
+                await self.transport.ack(delivery_id)
+                return
+
+            if message.get("type") != MessageType.TASK_ASSIGNMENT.value:
+                logger.debug("Ignoring %s message", message.get("type"))
+                await self.transport.ack(delivery_id)
+                return
+
+            self._active += 1
+            if self._active == 1:
+                self._queue(self.agent.build_status_update(AgentStatus.BUSY))
+            try:
+                task_params = (message.get("task", {}) or {}).get("parameters", {}) or {}
+                report = await self.agent.execute_task_async(task_params, message.get("message_id"))
+            finally:
+                self._active -= 1
+            if report["status"] == "SUCCESS":
+                self._completed += 1
+            else:
+                self._failed += 1
+            self._queue(report, delivery_id)
+            if self._active == 0:
+                self._queue(self.agent.build_status_update(AgentStatus.IDLE))
+        finally:
+            self._slots.release()
+
+    def _queue(self, message: dict, delivery_id: Optional[str] = None):
+        """Add an outbound message to the current batch."""
+        self._outbox.add((message, delivery_id))
+
+    async def _publish(self, batch: List[Tuple[dict, Optional[str]]]):
+        """Publish one batch, then acknowledge the assignments it reports on."""
+        await self.transport.publish([message for message, _ in batch])
+        for _, delivery_id in batch:
+            if delivery_id is not None:
+                await self.transport.ack(delivery_id)
+
+    async def flush(self) -> bool:
+        """Publish all queued outbound messages; False if publishing failed."""
+        return await self._outbox.flush()
+
+    def stats(self) -> dict:
+        """Message counts for health reporting."""
+        outbox = self._outbox.stats()
+        return {
+            "concurrency": self.concurrency,
+            "in_progress": self._active,
+            "received": self._received,
+            "completed": self._completed,
+            "failed": self._failed,
+            "queued_messages": outbox["queued"],
+            "published_messages": outbox["sent"],
+            "published_batches": outbox["batches"],
+            "publish_errors": outbox["send_errors"]
+        }
@@ -7,6 +7,8 @@ from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from enum import Enum
 
+from .protocol import TaskPriority
+
 
 class Status(str, Enum):
     """Status enumeration for agent responses"""
@@ -33,6 +35,8 @@ class AgentRequest(BaseModel):
     Contains a list of messages representing the conversation history.
     """
     messages: List[Message]
+    priority: TaskPriority = TaskPriority.MEDIUM
+    use_cache: Optional[bool] = None
 
 
 class AgentResponse(BaseModel):
@@ -46,8 +50,51 @@ class AgentResponse(BaseModel):
     error_message: Optional[str] = None
 
 
+class BatchRequest(BaseModel):
+    """
+    Several independent agent requests sent in one HTTP call.
+    Each item is processed as if it had been sent on its own.
+    """
+    requests: List[AgentRequest]
+
+
+class BatchItemResponse(BaseModel):
+    """Response for one batch item, tagged with its position in the request"""
+    index: int
+    response: AgentResponse
+
+
+class BatchResponse(BaseModel):
+    """
+    Response to a BatchRequest.
+    `responses` lines up with `requests`; items fail independently.
+    """
+    agent_name: str
+    status: Status
+    responses: List[AgentResponse]
+
+
+class Activity(BaseModel):
+    """
+    One activity row for the carbon calculator.
+    `activity` is an emission-factor item or alias (e.g. "diesel_car", "train",
+    "beef", "electricity"); `unit` defaults to the factor's unit.
+    """
+    activity: str
+    amount: float
+    unit: Optional[str] = None
+    category: Optional[str] = None
+    region: Optional[str] = None
+
+
+class CalculationRequest(BaseModel):
+    """Activity rows to convert into emissions in one call"""
+    activities: List[Activity]
+
+
 class HealthCheckResponse(BaseModel):
     """Standard health check response"""
     status: str
     agent_name: str
     ready: bool
+    details: Optional[Dict[str, Any]] = None
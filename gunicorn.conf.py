@@ -0,0 +1,54 @@
+"""
+Gunicorn configuration for multi-process deployments.
+
+Used by main.py when server.workers (or WEB_CONCURRENCY) is above 1, or directly:
+    gunicorn -c gunicorn.conf.py api:app
+
+Each worker runs the app under uvicorn's worker class and opens its own
+Gemini connection pool at startup. Workers share the LTM, response cache and
+upstream rate limit through SQLite files rather than keeping private copies.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from shared.structured_logging import get_logger
+from shared.utils import load_settings, setup_logging_from_settings
+
+
+_settings = load_settings()
+setup_logging_from_settings(_settings)
+_logger = get_logger("server")
+_api = _settings.get("api", {}) or {}
+_server = _settings.get("server", {}) or {}
+
+bind = f"{_api.get('host', '0.0.0.0')}:{os.getenv('PORT', _api.get('port', 8000))}"
+workers = int(os.getenv("WEB_CONCURRENCY", _server.get("workers", 1)))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app and the agent's modules once in the master; forked workers
+# share those pages and only build their own agent at startup
+preload_app = bool(_server.get("preload_app", True))
+if preload_app:
+    import agents.workers.sustainability_agent  # noqa: F401
+
+# On SIGTERM workers stop accepting connections and get this long to finish
+# in-flight requests (including LLM calls) before they are killed
+graceful_timeout = int(_server.get("drain_timeout", 35))
+keepalive = int(_server.get("keepalive", 5))
+
+accesslog = "-"
+
+# The JSON LTM engine keeps its index in one process; workers must share the SQLite engine
+_storage_type = os.getenv("LTM_STORAGE_TYPE", (_settings.get("ltm", {}) or {}).get("storage_type", "json"))
+if workers > 1 and str(_storage_type).lower() != "sqlite":
+    _logger.warning("%d workers: using the sqlite LTM engine instead of %s", workers, _storage_type)
+    os.environ["LTM_STORAGE_TYPE"] = "sqlite"
+
+
+def post_fork(server, worker):
+    """Log each worker; per-process state (connections, threads) is reopened lazily after the fork."""
+    worker.log.info("Worker %s started", worker.pid)
+
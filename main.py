@@ -11,45 +11,76 @@ from pathlib import Path
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from api import app
 import uvicorn
-from shared.utils import setup_logging, ConfigLoader
+from shared.utils import setup_logging_from_settings, ConfigLoader
+
+
+def run_gunicorn(logger):
+    """
+    Replace this process with gunicorn using gunicorn.conf.py.
+    Returns only if gunicorn is not installed (it does not run on Windows).
+    """
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        logger.warning("gunicorn is not installed; starting uvicorn workers without app preloading")
+        return
+    
+    config_file = os.path.join(project_root, "gunicorn.conf.py")
+    os.chdir(project_root)
+    os.execvp(sys.executable, [sys.executable, "-m", "gunicorn", "-c", config_file, "api:app"])
 
 
 def main():
     """Main entry point for the application."""
     
-    # Setup logging
-    logger = setup_logging(log_level="INFO")
-    logger.info("Starting Sustainability Footprint Agent...")
-    
     # Load configuration
     config_dir = os.path.join(project_root, "config")
     config_loader = ConfigLoader(config_dir)
     settings, agent_config = config_loader.load_all()
     
+    # Setup logging
+    logger = setup_logging_from_settings(settings or {})
+    logger.info("Starting Sustainability Footprint Agent...")
+    
     # Get API configuration
     api_config = settings.get("api", {})
     host = api_config.get("host", "0.0.0.0")
     port = int(os.getenv("PORT", api_config.get("port", 8000)))
     
+    server_config = settings.get("server", {}) or {}
+    workers = int(os.getenv("WEB_CONCURRENCY", server_config.get("workers", 1)))
+    drain_timeout = float(server_config.get("drain_timeout", 35))
+    
     # Log startup information
     logger.info(f"{'='*60}")
     logger.info(f"Sustainability Footprint Agent")
     logger.info(f"{'='*60}")
     logger.info(f"Host: {host}")
     logger.info(f"Port: {port}")
+    logger.info(f"Workers: {workers}")
     logger.info(f"Health Check: http://localhost:{port}/api/sustainability-footprint-agent/health")
     logger.info(f"Main Endpoint: http://localhost:{port}/api/sustainability-footprint-agent")
     logger.info(f"{'='*60}")
     
+    if workers > 1:
+        # Several workers run under gunicorn (app preloading, SIGTERM draining);
+        # this only returns if gunicorn is unavailable
+        run_gunicorn(logger)
+        # uvicorn's own worker processes must share the SQLite LTM engine
+        os.environ["LTM_STORAGE_TYPE"] = "sqlite"
+    
     # Run the server
     uvicorn.run(
         "api:app",
         host=host,
         port=port,
+        workers=workers,
         reload=False,  # Set to True for development
-        log_level="info"
+        log_level="info",
+        timeout_keep_alive=int(server_config.get("keepalive", 5)),
+        # On SIGTERM, in-flight requests get this long before being cancelled
+        timeout_graceful_shutdown=drain_timeout
     )
 
 
@@ -6,19 +6,48 @@ __version__ = "1.0.0"
 
 from .utils import (
     setup_logging,
+    setup_logging_from_settings,
     load_yaml_config,
     load_json_config,
     get_timestamp,
+    load_settings,
     ConfigLoader
 )
 
-from .ltm_storage import LTMStorage
+import importlib
+
+# Imported on first access: these pull in httpx and numpy, which every
+# "from shared.x import ..." would otherwise pay for at startup
+_LAZY_EXPORTS = {
+    "BaseLTMStorage": "ltm_storage",
+    "LTMStorage": "ltm_storage",
+    "create_ltm_storage": "ltm_storage",
+    "GeminiClient": "gemini_client",
+    "ResponseCache": "response_cache",
+    "CarbonCalculator": "carbon_calculator"
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "setup_logging",
+    "setup_logging_from_settings",
     "load_yaml_config",
     "load_json_config",
     "get_timestamp",
+    "load_settings",
     "ConfigLoader",
-    "LTMStorage"
+    "BaseLTMStorage",
+    "LTMStorage",
+    "create_ltm_storage",
+    "GeminiClient",
+    "ResponseCache",
+    "CarbonCalculator"
 ]
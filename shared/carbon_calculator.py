@@ -0,0 +1,455 @@
+"""
+Deterministic carbon-footprint calculator.
+Computes emissions from activity data with emission factors, entirely offline.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .emission_factors import (
+    ACTIVITY_ALIASES,
+    EMISSION_FACTORS,
+    FLIGHT_BANDS,
+    ISO_REGION_CODES,
+    REGION_ALIASES,
+    UNIT_CONVERSIONS
+)
+
+
+# Placeholder index for "flight"; replaced by a distance band during calculation
+_FLIGHT = -2
+_INVALID = -1
+
+_GRID_WORDS = frozenset(["electricity", "power", "grid", "grid electricity"])
+
+# Generic words lose to a more specific activity in the same phrase ("kg of waste recycled")
+_GENERIC_ALIASES = frozenset(["waste", "trash", "garbage", "rubbish", "meat", "car"])
+
+# Queries asking for advice rather than a number are left to the LLM
+_ADVICE_PATTERN = re.compile(
+    r"\b(reduce|reducing|lower|cut|improve|tips?|advice|recommend\w*|alternatives?|should|how can|how do i)\b"
+)
+
+# Wording the parser cannot model, so such queries are left to the LLM too:
+# rates and periods ("20 miles a day", "annual"), comparisons and savings
+# ("beef vs chicken", "switching to train") and multipliers ("4 passengers")
+_UNMODELED_PATTERN = re.compile(
+    r"\b(per|daily|weekly|monthly|yearly|annual\w*|annum|every|each|"
+    r"(a|an|one|\d+)\s+(days?|weeks?|months?|years?)|"
+    r"vs|versus|compar\w*|than|difference|save[sd]?|saving\w*|switch\w*|instead|replac\w*|"
+    r"passengers?|people|persons?|travell?ers?|times)\b"
+    r"|/\s*(day|week|month|year|yr)\b"
+)
+
+# Clause boundaries; commas and dots inside numbers ("10,000", "2.5") are kept
+_CLAUSE_PATTERN = re.compile(r"\band\b|\bthen\b|\bplus\b|;|,(?!\d)|\.(?!\d)")
+
+_UNIT_LABELS = {"km": "km", "kwh": "kWh", "kg": "kg", "litre": "litre"}
+
+
+def _normalize(name: str) -> str:
+    """Lowercase and collapse separators to single spaces."""
+    return " ".join(name.lower().replace("_", " ").replace("-", " ").split())
+
+
+def _alternation(words) -> str:
+    """Regex alternation matching the longest word first."""
+    return "|".join(re.escape(word) for word in sorted(words, key=len, reverse=True))
+
+
+class CarbonCalculator:
+    """
+    Emission calculator over the EMISSION_FACTORS table.
+
+    Factors are held in a flat NumPy array, so a whole batch of activities is
+    converted and multiplied in a few array operations; per-row Python work
+    is limited to resolving names, which is memoized.
+    """
+
+    def __init__(self, factors: Optional[dict] = None):
+        """
+        Initialize the calculator.
+
+        Args:
+            factors: Emission factor table (defaults to EMISSION_FACTORS)
+        """
+        factors = factors or EMISSION_FACTORS
+        self.categories: List[str] = list(factors)
+
+        self._items: List[Tuple[str, str]] = []
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._by_name: Dict[str, int] = {}
+        values, units, category_ids = [], [], []
+        for category_id, (category, items) in enumerate(factors.items()):
+            for item, (factor, unit) in items.items():
+                index = len(self._items)
+                self._items.append((category, item))
+                self._index[(category, item)] = index
+                self._by_name.setdefault(_normalize(item), index)
+                values.append(factor)
+                units.append(unit)
+                category_ids.append(category_id)
+
+        self._factors = np.array(values, dtype=np.float64)
+        self._units = units
+        self._category_ids = np.array(category_ids, dtype=np.intp)
+
+        self._band_limits = np.array([limit for limit, _ in FLIGHT_BANDS], dtype=np.float64)
+        self._band_indices = np.array(
+            [self._index[("transport", item)] for _, item in FLIGHT_BANDS], dtype=np.intp
+        )
+
+        self._resolved: Dict[tuple, int] = {}
+
+        # Query parsing patterns
+        self._quantity_pattern = re.compile(
+            r"(\d+(?:,\d{3})*(?:\.\d+)?|\.\d+)\s*(" + _alternation(UNIT_CONVERSIONS) + r")\b"
+        )
+        self._activity_terms = set(ACTIVITY_ALIASES) | set(self._by_name) | _GRID_WORDS
+        self._region_terms = set(REGION_ALIASES) | {
+            _normalize(item) for category, item in self._items if category == "electricity"
+        }
+        self._term_pattern = re.compile(
+            r"\b(" + _alternation(self._activity_terms | self._region_terms) + r")\b"
+        )
+
+    def resolve(
+        self,
+        activity: str,
+        category: Optional[str] = None,
+        region: Optional[str] = None
+    ) -> int:
+        """
+        Map an activity name to a factor index.
+
+        Args:
+            activity: Item name or alias, e.g. "diesel_car", "train", "electricity"
+            category: Optional category to disambiguate the name
+            region: Grid region for electricity (defaults to "world")
+
+        Returns:
+            Index into the factor table
+
+        Raises:
+            ValueError: If the activity, category or region is unknown
+        """
+        cache_key = (activity, category, region)
+        index = self._resolved.get(cache_key)
+        if index is None:
+            index = self._resolve(activity, category, region)
+            self._resolved[cache_key] = index
+        return index
+
+    def _resolve(self, activity: str, category: Optional[str], region: Optional[str]) -> int:
+        name = _normalize(activity)
+        if category is not None:
+            category = _normalize(category)
+            if category not in self.categories:
+                raise ValueError(f"Unknown category: {category}")
+
+        if name in _GRID_WORDS and category in (None, "electricity"):
+            return self._region_index(region or "world")
+
+        if category == "electricity":
+            return self._region_index(region or name)
+
+        index = self._by_name.get(name)
+        if index is not None and category in (None, self._items[index][0]):
+            return index
+
+        alias = ACTIVITY_ALIASES.get(name)
+        if alias is not None and category in (None, alias[0]):
+            if alias[1] == "flight":
+                return _FLIGHT
+            return self._index[alias]
+
+        if category is not None and (category, name.replace(" ", "_")) in self._index:
+            return self._index[(category, name.replace(" ", "_"))]
+
+        raise ValueError(f"Unknown activity: {activity}")
+
+    def _region_index(self, region: str) -> int:
+        name = _normalize(region)
+        name = ISO_REGION_CODES.get(name) or REGION_ALIASES.get(name, name).replace(" ", "_")
+        index = self._index.get(("electricity", name))
+        if index is None:
+            raise ValueError(f"Unknown electricity region: {region}")
+        return index
+
+    def calculate_many(self, activities: List[dict]) -> Dict[str, Any]:
+        """
+        Calculate emissions for many activity rows at once.
+
+        Each row has "activity" and "amount", plus optional "unit", "category"
+        and "region". Invalid rows get an "error" instead of a result and do
+        not affect the others.
+
+        Args:
+            activities: List of activity dictionaries
+
+        Returns:
+            Dictionary with per-row "results", "totals_kg_co2e" per category
+            and "total_kg_co2e"
+        """
+        count = len(activities)
+        indices = np.full(count, _INVALID, dtype=np.intp)
+        amounts = np.zeros(count, dtype=np.float64)
+        multipliers = np.ones(count, dtype=np.float64)
+        errors: Dict[int, str] = {}
+
+        for row, activity in enumerate(activities):
+            try:
+                index = self.resolve(
+                    activity["activity"],
+                    activity.get("category"),
+                    activity.get("region")
+                )
+                amount = float(activity["amount"])
+                if not math.isfinite(amount) or amount < 0:
+                    raise ValueError("Amount must be a non-negative number")
+
+                unit = activity.get("unit")
+                if unit:
+                    base_unit = "km" if index == _FLIGHT else self._units[index]
+                    conversion = UNIT_CONVERSIONS.get(unit.lower().strip())
+                    if conversion is None:
+                        raise ValueError(f"Unknown unit: {unit}")
+                    if conversion[0] != base_unit:
+                        raise ValueError(
+                            f"Unit '{unit}' does not apply to {activity['activity']} (expects {base_unit})"
+                        )
+                    multipliers[row] = conversion[1]
+
+                indices[row] = index
+                amounts[row] = amount
+            except (KeyError, TypeError, ValueError) as e:
+                message = f"Missing field: {e}" if isinstance(e, KeyError) else str(e)
+                errors[row] = message
+
+        quantities = amounts * multipliers
+
+        # Pick the flight factor from the distance band
+        flights = indices == _FLIGHT
+        if flights.any():
+            bands = np.searchsorted(self._band_limits, quantities[flights], side="right")
+            indices[flights] = self._band_indices[np.minimum(bands, len(self._band_indices) - 1)]
+
+        valid = indices >= 0
+        factors = np.where(valid, self._factors[np.where(valid, indices, 0)], 0.0)
+        emissions = quantities * factors
+        totals = np.bincount(
+            self._category_ids[indices[valid]],
+            weights=emissions[valid],
+            minlength=len(self.categories)
+        )
+
+        results = []
+        for row, (index, quantity, factor, kg) in enumerate(zip(
+            indices.tolist(), quantities.tolist(), factors.tolist(), np.round(emissions, 3).tolist()
+        )):
+            if row in errors:
+                results.append({"error": errors[row]})
+                continue
+            category, item = self._items[index]
+            results.append({
+                "category": category,
+                "activity": item,
+                "quantity": quantity,
+                "unit": self._units[index],
+                "factor": factor,
+                "kg_co2e": kg
+            })
+
+        return {
+            "results": results,
+            "totals_kg_co2e": {
+                category: round(total, 3)
+                for category, total in zip(self.categories, totals.tolist())
+                if total
+            },
+            "total_kg_co2e": round(float(emissions[valid].sum()), 3)
+        }
+
+    def calculate(
+        self,
+        activity: str,
+        amount: float,
+        unit: Optional[str] = None,
+        category: Optional[str] = None,
+        region: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Calculate emissions for a single activity.
+
+        Args:
+            activity: Item name or alias
+            amount: Quantity of the activity
+            unit: Unit of amount (defaults to the factor's unit)
+            category: Optional category to disambiguate the name
+            region: Grid region for electricity
+
+        Returns:
+            Result dictionary with quantity, unit, factor and kg_co2e
+
+        Raises:
+            ValueError: If the row is invalid
+        """
+        result = self.calculate_many([{
+            "activity": activity,
+            "amount": amount,
+            "unit": unit,
+            "category": category,
+            "region": region
+        }])["results"][0]
+
+        if "error" in result:
+            raise ValueError(result["error"])
+        return result
+
+    def parse(self, text: str) -> List[dict]:
+        """
+        Extract activity rows from a natural-language query.
+
+        Understands quantities with units followed or preceded by an activity,
+        e.g. "500 km by car", "10,000 kWh in Germany", "2 kg of beef".
+
+        Args:
+            text: User query
+
+        Returns:
+            Activity dictionaries for calculate_many (empty if none found)
+        """
+        text = text.lower()
+        activities = []
+        for clause in _CLAUSE_PATTERN.split(text):
+            activities.extend(self._parse_clause(clause, text))
+        return activities
+
+    def _parse_clause(self, clause: str, text: str) -> List[dict]:
+        """Pair each quantity in a clause with the nearest matching activity."""
+        quantities = list(self._quantity_pattern.finditer(clause))
+        activities = []
+
+        for i, match in enumerate(quantities):
+            base_unit = UNIT_CONVERSIONS[match.group(2)][0]
+            after = clause[match.end():quantities[i + 1].start() if i + 1 < len(quantities) else len(clause)]
+            before = clause[quantities[i - 1].end() if i > 0 else 0:match.start()]
+
+            activity = None
+            for segment in (after, before):
+                activity = self._match_activity(segment, base_unit)
+                if activity is not None:
+                    break
+            if activity is None:
+                continue
+
+            if activity == "electricity":
+                region = (
+                    self._match_region(after)
+                    or self._match_region(before)
+                    or self._match_region(text)
+                    or "world"
+                )
+                row = {"activity": "electricity", "region": region}
+            else:
+                row = {"activity": activity}
+
+            row["amount"] = float(match.group(1).replace(",", ""))
+            row["unit"] = match.group(2)
+            activities.append(row)
+
+        return activities
+
+    def _match_activity(self, segment: str, base_unit: str) -> Optional[str]:
+        """First activity term in segment whose factor unit matches base_unit."""
+        candidates = []
+        for term in self._term_pattern.findall(segment):
+            if term not in self._activity_terms:
+                continue
+            if term in _GRID_WORDS:
+                unit = "kwh"
+                term = "electricity"
+            else:
+                index = self.resolve(term)
+                unit = "km" if index == _FLIGHT else self._units[index]
+            if unit == base_unit:
+                candidates.append(term)
+
+        if not candidates:
+            if base_unit == "kwh":
+                return "electricity"
+            return None
+
+        specific = [term for term in candidates if term not in _GENERIC_ALIASES]
+        return (specific or candidates)[0]
+
+    def _match_region(self, segment: str) -> Optional[str]:
+        """First electricity region named in segment."""
+        for term in self._term_pattern.findall(segment):
+            if term in self._region_terms:
+                return term
+        return None
+
+    def answer(self, query: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Answer a quantitative emissions question without the LLM.
+
+        Args:
+            query: User query
+
+        Returns:
+            Tuple of (response text, calculation), or None if the query has no
+            computable activity, asks for advice, or involves a rate, period,
+            comparison or multiplier the parser does not model
+        """
+        text = query.lower()
+        if _ADVICE_PATTERN.search(text) or _UNMODELED_PATTERN.search(text):
+            return None
+
+        activities = self.parse(query)
+        if not activities:
+            return None
+
+        calculation = self.calculate_many(activities)
+        results = [result for result in calculation["results"] if "error" not in result]
+        if not results:
+            return None
+
+        lines = [f"Estimated emissions: {self._format_kg(calculation['total_kg_co2e'])}", ""]
+        for result in results:
+            unit = _UNIT_LABELS.get(result["unit"], result["unit"])
+            lines.append(
+                f"- {self._describe(result)}: {self._format_kg(result['kg_co2e'])} "
+                f"at {result['factor']:g} kg CO2e/{unit}"
+            )
+        lines.append("")
+        lines.append(
+            "Calculated with average emission factors; actual emissions depend on "
+            "vehicle and occupancy, grid mix, and supply chain."
+        )
+        return "\n".join(lines), calculation
+
+    def _describe(self, result: dict) -> str:
+        quantity = f"{result['quantity']:,.2f}".rstrip("0").rstrip(".")
+        label = result["activity"].replace("_", " ")
+        category = result["category"]
+        if category == "transport":
+            return f"{quantity} km by {label}"
+        if category == "electricity":
+            region = label.upper() if len(label) <= 3 else label.title()
+            return f"{quantity} kWh of grid electricity ({region})"
+        if category == "waste":
+            return f"{quantity} kg of waste ({label})"
+        unit = _UNIT_LABELS.get(result["unit"], result["unit"])
+        if unit == "litre":
+            unit = "litres"
+        return f"{quantity} {unit} of {label}"
+
+    @staticmethod
+    def _format_kg(kg: float) -> str:
+        if kg >= 1000:
+            return f"{kg:,.1f} kg CO2e ({kg / 1000:,.2f} t)"
+        return f"{kg:,.2f} kg CO2e"
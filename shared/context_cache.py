@@ -0,0 +1,159 @@
+"""
+Provider-side context cache for the static Gemini system instruction.
+Requests reference a cachedContents handle instead of resending the prompt.
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from .gemini_client import GeminiClient
+from .structured_logging import get_logger
+
+logger = get_logger("gemini")
+
+
+class ContextCache:
+    """
+    Keeps one cachedContents handle for a fixed system instruction.
+
+    The handle is created on first use and recreated shortly before it
+    expires. If creation fails (for example because the instruction is below
+    the model's minimum cacheable size), callers get None and send the
+    instruction inline; creation is retried after `retry_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        client: GeminiClient,
+        system_instruction: str,
+        ttl: float = 3600,
+        refresh_margin: float = 60,
+        retry_interval: float = 300
+    ):
+        """
+        Initialize the cache (nothing is created until first use).
+
+        Args:
+            client: Gemini client used to create and delete the handle
+            system_instruction: Static instruction text to cache
+            ttl: Lifetime requested for each handle, in seconds
+            refresh_margin: Stop using a handle this many seconds before it expires
+            retry_interval: Seconds to wait after a failed creation
+        """
+        self.client = client
+        self.system_instruction = system_instruction
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+
+        self._name: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+        self._created = 0
+        self._failures = 0
+        self._invalidated = 0
+
+    @classmethod
+    def from_settings(
+        cls,
+        client: GeminiClient,
+        system_instruction: str,
+        settings: dict
+    ) -> Optional["ContextCache"]:
+        """
+        Build a context cache from `gemini.context_cache` in settings.yaml.
+
+        Returns:
+            ContextCache, or None if context caching is disabled
+        """
+        config = (settings.get("gemini", {}) or {}).get("context_cache", {}) or {}
+        if not config.get("enabled", False):
+            return None
+
+        return cls(
+            client,
+            system_instruction,
+            ttl=float(config.get("ttl", 3600)),
+            refresh_margin=float(config.get("refresh_margin", 60)),
+            retry_interval=float(config.get("retry_interval", 300))
+        )
+
+    def current(self) -> Optional[str]:
+        """Handle that is valid now, without creating one (safe from sync code)."""
+        if self._name is not None and time.monotonic() < self._expires_at - self.refresh_margin:
+            return self._name
+        return None
+
+    async def handle(self) -> Optional[str]:
+        """
+        Return a valid handle, creating one if needed.
+
+        Returns:
+            cachedContents name, or None if caching is currently unavailable
+        """
+        name = self.current()
+        if name is not None or time.monotonic() < self._retry_at:
+            return name
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            # Another request may have created it while we waited
+            name = self.current()
+            if name is not None or time.monotonic() < self._retry_at:
+                return name
+
+            try:
+                created = await self.client.create_cached_content(
+                    {"parts": [{"text": self.system_instruction}]},
+                    self.ttl
+                )
+                self._name = created["name"]
+                self._expires_at = time.monotonic() + self.ttl
+                self._created += 1
+            except Exception as e:
+                logger.warning("Context cache unavailable, sending system prompt inline: %s", e)
+                self._retry_at = time.monotonic() + self.retry_interval
+                self._failures += 1
+
+            return self.current()
+
+    def invalidate(self, name: str):
+        """
+        Forget a handle the provider rejected (expired or deleted).
+
+        Args:
+            name: Handle that failed
+        """
+        if self._name == name:
+            self._name = None
+            self._invalidated += 1
+
+    async def aclose(self):
+        """Delete the current handle so it stops accruing storage time."""
+        name, self._name = self._name, None
+        if name is None:
+            return
+
+        try:
+            await self.client.delete_cached_content(name)
+        except Exception as e:
+            logger.error("Error deleting cached content %s: %s", name, e)
+
+    def stats(self) -> dict:
+        """
+        Context cache state for health reporting.
+
+        Returns:
+            Dictionary with the active handle and creation counters
+        """
+        return {
+            "handle": self.current(),
+            "created": self._created,
+            "failures": self._failures,
+            "invalidated": self._invalidated
+        }
@@ -0,0 +1,67 @@
+"""
+End-to-end request deadlines.
+A deadline is fixed when a request arrives and bounds every upstream call made for it.
+"""
+
+import time
+from typing import Optional
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which a request must be answered."""
+
+    def __init__(self, timeout: float, started_at: Optional[float] = None):
+        """
+        Start a deadline `timeout` seconds after started_at.
+
+        Args:
+            timeout: Seconds the request may take
+            started_at: time.monotonic() value the request arrived at (default: now)
+        """
+        self.timeout = timeout
+        self.expires_at = (time.monotonic() if started_at is None else started_at) + timeout
+
+    @classmethod
+    def from_header(
+        cls,
+        value: Optional[str],
+        default: float,
+        maximum: Optional[float] = None,
+        started_at: Optional[float] = None
+    ) -> "Deadline":
+        """
+        Build a deadline from a timeout header such as X-Request-Timeout.
+
+        Args:
+            value: Header value in seconds, or None if the header is absent
+            default: Timeout used when the header is absent or invalid
+            maximum: Upper bound for client-supplied timeouts
+            started_at: time.monotonic() value the request arrived at (default: now)
+
+        Returns:
+            Deadline starting at started_at
+        """
+        timeout = default
+        if value is not None:
+            try:
+                requested = float(value)
+                if requested > 0:
+                    timeout = requested
+            except ValueError:
+                pass
+
+        if maximum is not None:
+            timeout = min(timeout, maximum)
+        return cls(timeout, started_at)
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """Whether the deadline has passed."""
+        return time.monotonic() >= self.expires_at
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
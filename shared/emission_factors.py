@@ -0,0 +1,235 @@
+"""
+Emission factors used by the carbon calculator.
+Values are typical published averages in kg CO2e per unit (DEFRA/IEA-style).
+"""
+
+# category -> item -> (kg CO2e per unit, unit)
+EMISSION_FACTORS = {
+    # Per passenger-km
+    "transport": {
+        "petrol_car": (0.170, "km"),
+        "diesel_car": (0.171, "km"),
+        "hybrid_car": (0.120, "km"),
+        "electric_car": (0.047, "km"),
+        "motorbike": (0.114, "km"),
+        "taxi": (0.149, "km"),
+        "bus": (0.097, "km"),
+        "coach": (0.027, "km"),
+        "train": (0.035, "km"),
+        "subway": (0.028, "km"),
+        "tram": (0.029, "km"),
+        "ferry": (0.113, "km"),
+        "domestic_flight": (0.246, "km"),
+        "short_haul_flight": (0.154, "km"),
+        "long_haul_flight": (0.148, "km"),
+        "bicycle": (0.0, "km"),
+        "walking": (0.0, "km")
+    },
+    # Grid electricity, per kWh consumed
+    "electricity": {
+        "world": (0.436, "kwh"),
+        "eu": (0.251, "kwh"),
+        "united_states": (0.367, "kwh"),
+        "canada": (0.120, "kwh"),
+        "mexico": (0.423, "kwh"),
+        "brazil": (0.098, "kwh"),
+        "united_kingdom": (0.207, "kwh"),
+        "ireland": (0.296, "kwh"),
+        "germany": (0.380, "kwh"),
+        "france": (0.056, "kwh"),
+        "spain": (0.152, "kwh"),
+        "italy": (0.257, "kwh"),
+        "netherlands": (0.268, "kwh"),
+        "poland": (0.662, "kwh"),
+        "sweden": (0.041, "kwh"),
+        "norway": (0.019, "kwh"),
+        "china": (0.581, "kwh"),
+        "india": (0.713, "kwh"),
+        "japan": (0.457, "kwh"),
+        "south_korea": (0.436, "kwh"),
+        "australia": (0.510, "kwh"),
+        "south_africa": (0.900, "kwh")
+    },
+    # Combustion, per unit of fuel
+    "fuel": {
+        "petrol": (2.31, "litre"),
+        "diesel": (2.68, "litre"),
+        "lpg": (1.56, "litre"),
+        "heating_oil": (2.54, "litre"),
+        "natural_gas": (0.183, "kwh"),
+        "coal": (2.42, "kg"),
+        "wood_pellets": (0.072, "kg")
+    },
+    # Life-cycle emissions per kg of food
+    "food": {
+        "beef": (60.0, "kg"),
+        "lamb": (24.0, "kg"),
+        "cheese": (21.0, "kg"),
+        "pork": (7.2, "kg"),
+        "chicken": (6.1, "kg"),
+        "fish": (5.1, "kg"),
+        "eggs": (4.5, "kg"),
+        "rice": (4.0, "kg"),
+        "milk": (3.2, "kg"),
+        "tofu": (3.0, "kg"),
+        "bread": (1.4, "kg"),
+        "fruit": (0.9, "kg"),
+        "vegetables": (0.7, "kg"),
+        "potatoes": (0.5, "kg")
+    },
+    # Per kg of waste, by treatment
+    "waste": {
+        "landfill": (0.467, "kg"),
+        "incineration": (0.021, "kg"),
+        "recycling": (0.021, "kg"),
+        "composting": (0.009, "kg")
+    }
+}
+
+# Distance bands (km) used to pick a flight factor when only "flight" is given
+FLIGHT_BANDS = (
+    (500.0, "domestic_flight"),
+    (3700.0, "short_haul_flight"),
+    (float("inf"), "long_haul_flight")
+)
+
+# Everyday names -> (category, item); "flight" is resolved by distance
+ACTIVITY_ALIASES = {
+    "car": ("transport", "petrol_car"),
+    "drive": ("transport", "petrol_car"),
+    "driving": ("transport", "petrol_car"),
+    "petrol car": ("transport", "petrol_car"),
+    "gasoline car": ("transport", "petrol_car"),
+    "diesel car": ("transport", "diesel_car"),
+    "hybrid": ("transport", "hybrid_car"),
+    "electric car": ("transport", "electric_car"),
+    "ev": ("transport", "electric_car"),
+    "motorcycle": ("transport", "motorbike"),
+    "motorbike": ("transport", "motorbike"),
+    "taxi": ("transport", "taxi"),
+    "uber": ("transport", "taxi"),
+    "bus": ("transport", "bus"),
+    "coach": ("transport", "coach"),
+    "train": ("transport", "train"),
+    "rail": ("transport", "train"),
+    "subway": ("transport", "subway"),
+    "metro": ("transport", "subway"),
+    "underground": ("transport", "subway"),
+    "tram": ("transport", "tram"),
+    "ferry": ("transport", "ferry"),
+    "boat": ("transport", "ferry"),
+    "flight": ("transport", "flight"),
+    "fly": ("transport", "flight"),
+    "flying": ("transport", "flight"),
+    "plane": ("transport", "flight"),
+    "airplane": ("transport", "flight"),
+    "bike": ("transport", "bicycle"),
+    "bicycle": ("transport", "bicycle"),
+    "cycling": ("transport", "bicycle"),
+    "walk": ("transport", "walking"),
+    "walking": ("transport", "walking"),
+    "gasoline": ("fuel", "petrol"),
+    "gas": ("fuel", "natural_gas"),
+    "natural gas": ("fuel", "natural_gas"),
+    "heating oil": ("fuel", "heating_oil"),
+    "propane": ("fuel", "lpg"),
+    "pellets": ("fuel", "wood_pellets"),
+    "meat": ("food", "beef"),
+    "steak": ("food", "beef"),
+    "mutton": ("food", "lamb"),
+    "poultry": ("food", "chicken"),
+    "egg": ("food", "eggs"),
+    "vegetable": ("food", "vegetables"),
+    "veggies": ("food", "vegetables"),
+    "potato": ("food", "potatoes"),
+    "waste": ("waste", "landfill"),
+    "trash": ("waste", "landfill"),
+    "garbage": ("waste", "landfill"),
+    "rubbish": ("waste", "landfill"),
+    "recycled": ("waste", "recycling"),
+    "compost": ("waste", "composting"),
+    "composted": ("waste", "composting"),
+    "incinerated": ("waste", "incineration")
+}
+
+# Region names -> electricity item
+REGION_ALIASES = {
+    "global": "world",
+    "europe": "eu",
+    "european union": "eu",
+    "usa": "united_states",
+    "america": "united_states",
+    "united states": "united_states",
+    "uk": "united_kingdom",
+    "britain": "united_kingdom",
+    "england": "united_kingdom",
+    "united kingdom": "united_kingdom",
+    "korea": "south_korea",
+    "south korea": "south_korea",
+    "south africa": "south_africa"
+}
+
+# ISO 3166-1 alpha-2 codes (lowercased) -> electricity item. Only accepted as an
+# explicit region, never matched in free text, where "in", "it" or "us" are words.
+ISO_REGION_CODES = {
+    "eu": "eu",
+    "us": "united_states",
+    "ca": "canada",
+    "mx": "mexico",
+    "br": "brazil",
+    "gb": "united_kingdom",
+    "ie": "ireland",
+    "de": "germany",
+    "fr": "france",
+    "es": "spain",
+    "it": "italy",
+    "nl": "netherlands",
+    "pl": "poland",
+    "se": "sweden",
+    "no": "norway",
+    "cn": "china",
+    "in": "india",
+    "jp": "japan",
+    "kr": "south_korea",
+    "au": "australia",
+    "za": "south_africa"
+}
+
+# Unit spellings -> (base unit, multiplier to the base unit)
+UNIT_CONVERSIONS = {
+    "km": ("km", 1.0),
+    "kms": ("km", 1.0),
+    "kilometer": ("km", 1.0),
+    "kilometers": ("km", 1.0),
+    "kilometre": ("km", 1.0),
+    "kilometres": ("km", 1.0),
+    "mi": ("km", 1.609344),
+    "mile": ("km", 1.609344),
+    "miles": ("km", 1.609344),
+    "kwh": ("kwh", 1.0),
+    "mwh": ("kwh", 1000.0),
+    "gwh": ("kwh", 1000000.0),
+    "kg": ("kg", 1.0),
+    "kgs": ("kg", 1.0),
+    "kilogram": ("kg", 1.0),
+    "kilograms": ("kg", 1.0),
+    "g": ("kg", 0.001),
+    "gram": ("kg", 0.001),
+    "grams": ("kg", 0.001),
+    "t": ("kg", 1000.0),
+    "tonne": ("kg", 1000.0),
+    "tonnes": ("kg", 1000.0),
+    "ton": ("kg", 1000.0),
+    "tons": ("kg", 1000.0),
+    "lb": ("kg", 0.45359237),
+    "lbs": ("kg", 0.45359237),
+    "pound": ("kg", 0.45359237),
+    "pounds": ("kg", 0.45359237),
+    "l": ("litre", 1.0),
+    "litre": ("litre", 1.0),
+    "litres": ("litre", 1.0),
+    "liter": ("litre", 1.0),
+    "liters": ("litre", 1.0),
+    "gallon": ("litre", 3.785411784),
+    "gallons": ("litre", 3.785411784)
+}
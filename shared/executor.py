@@ -0,0 +1,116 @@
+"""
+Thread pool for blocking agent work called from the event loop.
+LTM file/database I/O, semantic search and large calculations run here, so a
+slow call cannot stall other requests (or /health and /metrics) on the worker.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from .metrics import EXECUTOR_QUEUE_WAIT
+
+
+class BlockingExecutor:
+    """
+    Sized thread pool with saturation counters.
+
+    Work beyond `max_workers` concurrent calls waits in the pool's queue; the
+    time spent there is recorded in the agent_executor_queue_wait_seconds
+    histogram. Context variables of the caller are visible inside the call.
+    """
+
+    def __init__(self, max_workers: int = 8, name: str = "agent-blocking"):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Threads in the pool (concurrent blocking calls)
+            name: Thread name prefix
+        """
+        self.max_workers = max(1, max_workers)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._active = 0
+        self._completed = 0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "BlockingExecutor":
+        """Build an executor from the `executor` section of settings.yaml."""
+        config = settings.get("executor", {}) or {}
+        return cls(max_workers=int(config.get("max_workers", 8)))
+
+    def _call(self, state: list, context: contextvars.Context, func: Callable[[], Any]) -> Any:
+        """Run func in a pool thread, keeping the counters up to date."""
+        waited = time.monotonic() - state[0]
+        with self._lock:
+            if state[1] == "cancelled":
+                return None
+            state[1] = "started"
+            self._active += 1
+            self._max_wait = max(self._max_wait, waited)
+        EXECUTOR_QUEUE_WAIT.observe(waited)
+        try:
+            return context.run(func)
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._completed += 1
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run a blocking function in the pool and await its result.
+
+        Args:
+            func: Blocking callable
+            args: Positional arguments for func
+            kwargs: Keyword arguments for func
+
+        Returns:
+            Whatever func returns (its exceptions are raised here)
+        """
+        # [submitted at, "queued" | "started" | "cancelled"]
+        state = [time.monotonic(), "queued"]
+        with self._lock:
+            self._submitted += 1
+        call = functools.partial(
+            self._call, state, contextvars.copy_context(), functools.partial(func, *args, **kwargs)
+        )
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        except asyncio.CancelledError:
+            # A call still in the queue is skipped; a running one cannot be interrupted
+            with self._lock:
+                if state[1] == "queued":
+                    state[1] = "cancelled"
+                    self._submitted -= 1
+            raise
+
+    def shutdown(self, wait: bool = True):
+        """Stop the pool; with wait, running and queued calls finish first."""
+        self._pool.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        """
+        Pool saturation for health and metrics reporting.
+
+        Returns:
+            Dictionary with pool size, busy threads, queued calls, completed
+            calls, busy fraction and the longest queue wait
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._submitted - self._active - self._completed,
+                "completed": self._completed,
+                "saturation": round(self._active / self.max_workers, 4),
+                "max_wait_ms": round(self._max_wait * 1000, 2)
+            }
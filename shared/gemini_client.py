@@ -0,0 +1,279 @@
+"""
+Pooled HTTP client for the Google Gemini API.
+Keeps connections alive across requests instead of opening one per call.
+"""
+
+import importlib.util
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+import httpx
+
+from .metrics import STAGE_LATENCY, UPSTREAM_ERRORS, UPSTREAM_IN_FLIGHT, upstream_error_label
+
+
+DEFAULT_BASE_URL = "https://generativelanguage.googleapis.com/v1"
+DEFAULT_MODEL = "gemini-2.5-flash"
+
+
+@contextmanager
+def _upstream_call() -> Iterator[None]:
+    """Record one Gemini HTTP call: in-flight gauge, latency and error status."""
+    started = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc()
+    try:
+        yield
+    except Exception as e:
+        label = upstream_error_label(e)
+        if label is not None:
+            UPSTREAM_ERRORS.inc(label)
+        STAGE_LATENCY.observe(time.perf_counter() - started, "upstream_llm")
+        raise
+    else:
+        STAGE_LATENCY.observe(time.perf_counter() - started, "upstream_llm")
+    finally:
+        UPSTREAM_IN_FLIGHT.dec()
+
+
+class GeminiClient:
+    """
+    Long-lived Gemini client with a shared connection pool.
+
+    The async client is opened once (normally at application startup) and
+    reused by every request, so TCP/TLS handshakes are paid once per
+    connection rather than once per call. A sync client with the same pool
+    limits is created lazily for callers that are not running in an event loop.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str],
+        base_url: str = DEFAULT_BASE_URL,
+        model: str = DEFAULT_MODEL,
+        timeout: float = 30.0,
+        max_connections: int = 200,
+        max_keepalive_connections: int = 50,
+        keepalive_expiry: float = 30.0,
+        http2: bool = True
+    ):
+        """
+        Initialize the client configuration (no connections are opened yet).
+
+        Args:
+            api_key: Gemini API key
+            base_url: API base URL, e.g. https://generativelanguage.googleapis.com/v1
+            model: Model name used in the generateContent URL
+            timeout: Per-request timeout in seconds
+            max_connections: Maximum number of concurrent connections in the pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept alive
+            http2: Use HTTP/2 when the h2 package is installed
+        """
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        # HTTP/2 needs the optional h2 package (httpx[http2])
+        self.http2 = http2 and importlib.util.find_spec("h2") is not None
+
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._sync_client: Optional[httpx.Client] = None
+
+    @classmethod
+    def from_settings(cls, api_key: Optional[str], settings: dict) -> "GeminiClient":
+        """
+        Build a client from the `gemini` section of settings.yaml.
+
+        Args:
+            api_key: Gemini API key
+            settings: Full settings dictionary
+
+        Returns:
+            Configured GeminiClient
+        """
+        config = settings.get("gemini", {}) or {}
+        return cls(
+            api_key=api_key,
+            base_url=os.getenv("GEMINI_BASE_URL", config.get("base_url", DEFAULT_BASE_URL)),
+            model=config.get("model", DEFAULT_MODEL),
+            timeout=float(config.get("timeout", 30)),
+            max_connections=int(config.get("max_connections", 200)),
+            max_keepalive_connections=int(config.get("max_keepalive_connections", 50)),
+            keepalive_expiry=float(config.get("keepalive_expiry", 30)),
+            http2=bool(config.get("http2", True))
+        )
+
+    @property
+    def generate_url(self) -> str:
+        """URL of the generateContent method for the configured model."""
+        return f"{self.base_url}/models/{self.model}:generateContent"
+
+    @property
+    def stream_url(self) -> str:
+        """URL of the streamGenerateContent method for the configured model."""
+        return f"{self.base_url}/models/{self.model}:streamGenerateContent"
+
+    @property
+    def cached_contents_url(self) -> str:
+        """URL of the cachedContents collection."""
+        return f"{self.base_url}/cachedContents"
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the async connection pool is currently open."""
+        return self._async_client is not None
+
+    async def start(self):
+        """Open the async connection pool (idempotent)."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+
+    async def aclose(self):
+        """Close the async connection pool and the sync client, if open."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+        self.close()
+
+    def close(self):
+        """Close the sync client, if open."""
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
+
+    async def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Call generateContent without blocking the event loop.
+
+        Args:
+            payload: Gemini request body
+
+        Returns:
+            Decoded JSON response
+        """
+        if self._async_client is None:
+            await self.start()
+
+        with _upstream_call():
+            response = await self._async_client.post(
+                self.generate_url,
+                json=payload,
+                params={"key": self.api_key}
+            )
+            response.raise_for_status()
+        return response.json()
+
+    async def stream(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Call streamGenerateContent and yield response chunks as they arrive.
+
+        Closing the generator (e.g. when the caller is cancelled) closes the
+        upstream connection, which stops generation.
+
+        Args:
+            payload: Gemini request body
+
+        Yields:
+            Decoded JSON chunks, each shaped like a generateContent response
+        """
+        if self._async_client is None:
+            await self.start()
+
+        with _upstream_call():
+            async with self._async_client.stream(
+                "POST",
+                self.stream_url,
+                json=payload,
+                params={"key": self.api_key, "alt": "sse"}
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data:
+                        yield json.loads(data)
+
+    async def create_cached_content(
+        self,
+        system_instruction: Dict[str, Any],
+        ttl: float
+    ) -> Dict[str, Any]:
+        """
+        Store a system instruction provider-side so requests can reference it.
+
+        Args:
+            system_instruction: Gemini systemInstruction object
+            ttl: Seconds the cached content stays available
+
+        Returns:
+            Decoded cachedContents resource (its "name" is the handle)
+        """
+        if self._async_client is None:
+            await self.start()
+
+        response = await self._async_client.post(
+            self.cached_contents_url,
+            json={
+                "model": f"models/{self.model}",
+                "systemInstruction": system_instruction,
+                "ttl": f"{int(ttl)}s"
+            },
+            params={"key": self.api_key}
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def delete_cached_content(self, name: str):
+        """
+        Delete cached content by name, e.g. "cachedContents/abc123".
+
+        Args:
+            name: Resource name returned by create_cached_content
+        """
+        if self._async_client is None:
+            await self.start()
+
+        response = await self._async_client.delete(
+            f"{self.base_url}/{name}",
+            params={"key": self.api_key}
+        )
+        response.raise_for_status()
+
+    def generate_sync(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Blocking generateContent call for code that is not running in an event loop.
+
+        Args:
+            payload: Gemini request body
+
+        Returns:
+            Decoded JSON response
+        """
+        if self._sync_client is None:
+            self._sync_client = httpx.Client(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2
+            )
+
+        with _upstream_call():
+            response = self._sync_client.post(
+                self.generate_url,
+                json=payload,
+                params={"key": self.api_key}
+            )
+            response.raise_for_status()
+        return response.json()
@@ -0,0 +1,166 @@
+"""
+Hedged upstream calls.
+A slow call gets a second, identical attempt once it runs past the recent p95 latency.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Optional
+
+
+class Hedger:
+    """
+    Issues a backup call when the first one is slower than usual.
+
+    The hedge delay is the `percentile` of recent successful call latencies
+    (or `initial_delay` until `min_samples` have been seen). Whichever attempt
+    succeeds first wins and the other is cancelled. Hedges are limited by a
+    token bucket that earns `budget_ratio` tokens per call, so at most about
+    that fraction of calls is ever duplicated.
+
+    Bound to a single event loop; not thread-safe.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_samples: int = 20,
+        window: int = 256,
+        initial_delay: float = 2.0,
+        min_delay: float = 0.05,
+        budget_ratio: float = 0.05,
+        max_tokens: float = 10.0
+    ):
+        """
+        Initialize the hedger.
+
+        Args:
+            percentile: Latency percentile after which a hedge is sent
+            min_samples: Samples needed before the percentile is trusted
+            window: Number of recent latencies kept
+            initial_delay: Hedge delay used until min_samples are available
+            min_delay: Lower bound for the hedge delay
+            budget_ratio: Hedge tokens earned per call (fraction of calls that may be hedged)
+            max_tokens: Cap on saved-up tokens, bounding hedge bursts
+        """
+        self.percentile = percentile
+        self.min_samples = max(1, min_samples)
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+
+        self._latencies = deque(maxlen=max(1, window))
+        self._tokens = max_tokens
+
+        self._calls = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> Optional["Hedger"]:
+        """
+        Build a hedger from the `hedging` section of settings.yaml.
+
+        Returns:
+            Hedger, or None if hedging is disabled
+        """
+        config = settings.get("hedging", {}) or {}
+        if not config.get("enabled", False):
+            return None
+
+        return cls(
+            percentile=float(config.get("percentile", 95)),
+            min_samples=int(config.get("min_samples", 20)),
+            window=int(config.get("window", 256)),
+            initial_delay=float(config.get("initial_delay", 2.0)),
+            min_delay=float(config.get("min_delay", 0.05)),
+            budget_ratio=float(config.get("budget_ratio", 0.05)),
+            max_tokens=float(config.get("max_tokens", 10))
+        )
+
+    def delay(self) -> float:
+        """Current hedge delay in seconds."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def record(self, latency: float):
+        """Add the latency of a successful call."""
+        self._latencies.append(latency)
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[Any]],
+        can_hedge: Optional[Callable[[], bool]] = None
+    ) -> Any:
+        """
+        Await func, starting a second attempt if the first is slow.
+
+        Args:
+            func: Zero-argument coroutine function making one upstream attempt
+            can_hedge: Extra check made when the hedge would be sent (e.g. spare capacity)
+
+        Returns:
+            Result of the first attempt to succeed
+
+        Raises:
+            Exception: The primary's error if it fails before a hedge is sent,
+                otherwise the last error once both attempts have failed
+        """
+        self._calls += 1
+        self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+        started = time.monotonic()
+        attempts = [asyncio.ensure_future(func())]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.delay())
+            if done or self._tokens < 1 or (can_hedge is not None and not can_hedge()):
+                result = await attempts[0]
+                self.record(time.monotonic() - started)
+                return result
+
+            self._tokens -= 1
+            self._hedged += 1
+            hedge_started = time.monotonic()
+            attempts.append(asyncio.ensure_future(func()))
+
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    if task is attempts[1]:
+                        self._hedge_wins += 1
+                        self.record(time.monotonic() - hedge_started)
+                    else:
+                        self.record(time.monotonic() - started)
+                    return task.result()
+            raise error
+        finally:
+            # Cancel the losing attempt and wait, so its scheduler slot is free on return
+            losers = [task for task in attempts if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """
+        Hedging counters for health reporting.
+
+        Returns:
+            Dictionary with the current delay, calls, hedges sent and hedges that won
+        """
+        return {
+            "delay_ms": round(self.delay() * 1000, 1),
+            "calls": self._calls,
+            "hedged": self._hedged,
+            "hedge_wins": self._hedge_wins
+        }
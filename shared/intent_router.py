@@ -0,0 +1,245 @@
+"""
+Keyword intent router for sustainability queries.
+Maps a query to one of SUSTAINABILITY_INTENTS in a single regex pass.
+"""
+
+import re
+from typing import Dict, NamedTuple, Optional
+
+
+# intent -> {keyword or phrase: weight}; plural "s"/"es" forms match automatically
+INTENT_KEYWORDS = {
+    "carbon_footprint_analysis": {
+        "carbon": 2.0,
+        "footprint": 2.0,
+        "carbon footprint": 3.0,
+        "co2": 2.0,
+        "co2e": 2.0,
+        "emission": 2.0,
+        "emit": 1.0,
+        "greenhouse gas": 2.0,
+        "ghg": 2.0,
+        "carbon neutral": 2.0,
+        "net zero": 1.5,
+        "offset": 1.5,
+        "scope 1": 2.0,
+        "scope 2": 2.0,
+        "scope 3": 2.0,
+        "commute": 1.0,
+        "flight": 1.0,
+        "driving": 1.0,
+        "climate": 0.5
+    },
+    "energy_consumption_tracking": {
+        "energy": 1.0,
+        "electricity": 2.0,
+        "kwh": 2.0,
+        "consumption": 1.5,
+        "energy consumption": 3.0,
+        "energy use": 3.0,
+        "energy usage": 3.0,
+        "energy bill": 2.5,
+        "utility bill": 2.5,
+        "power bill": 2.5,
+        "appliance": 1.5,
+        "thermostat": 1.5,
+        "heating": 1.0,
+        "cooling": 1.0,
+        "insulation": 1.5,
+        "lighting": 1.0,
+        "led": 1.0,
+        "energy efficiency": 2.5,
+        "smart meter": 2.0,
+        "standby power": 2.0
+    },
+    "waste_management_assessment": {
+        "waste": 2.0,
+        "recycle": 2.0,
+        "recycling": 2.0,
+        "trash": 2.0,
+        "garbage": 2.0,
+        "rubbish": 2.0,
+        "landfill": 2.0,
+        "compost": 2.0,
+        "composting": 2.0,
+        "plastic": 1.5,
+        "packaging": 1.5,
+        "zero waste": 2.5,
+        "single use": 1.5,
+        "circular economy": 1.5
+    },
+    "sustainability_metrics": {
+        "metric": 2.0,
+        "kpi": 2.0,
+        "esg": 2.0,
+        "reporting": 1.5,
+        "sustainability report": 2.5,
+        "disclosure": 1.5,
+        "gri": 2.0,
+        "cdp": 2.0,
+        "sasb": 2.0,
+        "tcfd": 2.0,
+        "csrd": 2.0,
+        "benchmark": 1.0,
+        "target": 1.0,
+        "rating": 1.0,
+        "measure": 1.0
+    },
+    "environmental_impact_analysis": {
+        "environmental impact": 3.0,
+        "impact": 1.0,
+        "biodiversity": 2.0,
+        "pollution": 2.0,
+        "water usage": 2.0,
+        "water use": 2.0,
+        "ecosystem": 2.0,
+        "deforestation": 2.0,
+        "life cycle": 2.0,
+        "lifecycle": 2.0,
+        "lca": 2.0,
+        "eia": 2.0,
+        "habitat": 1.5,
+        "air quality": 2.0
+    },
+    "green_building_assessment": {
+        "building": 1.5,
+        "green building": 3.0,
+        "leed": 3.0,
+        "breeam": 3.0,
+        "energy star": 2.0,
+        "passive house": 3.0,
+        "certification": 1.5,
+        "construction": 1.5,
+        "retrofit": 1.5,
+        "hvac": 1.5,
+        "green roof": 2.0
+    },
+    "renewable_energy_recommendations": {
+        "renewable": 2.5,
+        "renewable energy": 3.0,
+        "solar": 2.5,
+        "solar panel": 3.0,
+        "wind": 2.0,
+        "wind turbine": 3.0,
+        "geothermal": 2.5,
+        "heat pump": 2.0,
+        "hydro": 2.0,
+        "hydroelectric": 2.5,
+        "photovoltaic": 2.5,
+        "pv": 2.0,
+        "battery storage": 2.0,
+        "clean energy": 2.0,
+        "green energy": 2.0,
+        "biomass": 2.0
+    }
+}
+
+
+_WORD_PATTERN = re.compile(r"[A-Za-z0-9][\w'-]*")
+
+
+class IntentMatch(NamedTuple):
+    """Routing result: best intent (None if no keyword matched) and its confidence."""
+    intent: Optional[str]
+    confidence: float
+    scores: Dict[str, float]
+
+
+class IntentRouter:
+    """
+    Weighted keyword router compiled into one regular expression.
+
+    Every keyword and phrase of every intent is part of a single word-bounded
+    alternation, so "wind" no longer matches inside "window" and the query is
+    scanned once regardless of how many intents exist. Each distinct keyword
+    adds its weight to its intents; confidence is the winning intent's share
+    of the total score, smoothed so a single weak keyword stays uncertain.
+    """
+
+    def __init__(self, keywords: Optional[Dict[str, Dict[str, float]]] = None, smoothing: float = 1.0):
+        """
+        Compile the router.
+
+        Args:
+            keywords: intent -> {keyword: weight} (defaults to INTENT_KEYWORDS)
+            smoothing: Score added to the total when computing confidence
+        """
+        keywords = keywords or INTENT_KEYWORDS
+        self.intents = list(keywords)
+        self.smoothing = smoothing
+
+        # keyword -> [(intent, weight), ...]
+        self._weights: Dict[str, list] = {}
+        for intent, terms in keywords.items():
+            for term, weight in terms.items():
+                self._weights.setdefault(" ".join(term.lower().split()), []).append((intent, weight))
+
+        alternation = "|".join(
+            re.escape(term).replace(r"\ ", r"\s+")
+            for term in sorted(self._weights, key=len, reverse=True)
+        )
+        self._pattern = re.compile(r"\b(" + alternation + r")(?:s|es)?\b", re.IGNORECASE)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Score every intent that has at least one keyword in text.
+
+        Args:
+            text: User query
+
+        Returns:
+            intent -> summed weight of the distinct keywords found
+        """
+        found = {" ".join(match.lower().split()) for match in self._pattern.findall(text)}
+
+        scores: Dict[str, float] = {}
+        for term in found:
+            for intent, weight in self._weights[term]:
+                scores[intent] = scores.get(intent, 0.0) + weight
+        return scores
+
+    def route(self, text: str) -> IntentMatch:
+        """
+        Pick the most likely intent for a query.
+
+        Args:
+            text: User query
+
+        Returns:
+            IntentMatch with the best intent and a confidence in [0, 1)
+        """
+        scores = self.scores(text)
+        if not scores:
+            return IntentMatch(None, 0.0, scores)
+
+        intent = max(scores, key=scores.get)
+        confidence = scores[intent] / (sum(scores.values()) + self.smoothing)
+        return IntentMatch(intent, round(confidence, 4), scores)
+
+    def is_overview(self, text: str, max_words: int = 8) -> bool:
+        """
+        Whether a query is a short generic question a canned overview can answer.
+
+        Confidence only says how much of a query is about one topic; a query
+        with numbers or names ("NYC-London flight", "scope 1, 2 and 3",
+        "500 employees") asks something specific even when it is on topic.
+
+        Args:
+            text: User query
+            max_words: Longest query still considered generic
+
+        Returns:
+            True if the query has at most max_words words, no digits and no
+            capitalized words other than the first and router keywords
+        """
+        words = _WORD_PATTERN.findall(text)
+        if len(words) > max_words:
+            return False
+
+        for position, word in enumerate(words):
+            if any(char.isdigit() for char in word):
+                return False
+            if position and word != "I" and any(char.isupper() for char in word):
+                if not self._pattern.fullmatch(word):
+                    return False
+        return True
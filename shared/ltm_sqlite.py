@@ -0,0 +1,380 @@
+"""
+SQLite-backed Long-Term Memory (LTM) storage.
+Lets several threads and worker processes share one LTM safely.
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+
+from . import serialization
+from .ltm_storage import BaseLTMStorage
+from .structured_logging import get_logger
+
+logger = get_logger("ltm")
+
+
+_SCHEMA = (
+    # key is the PRIMARY KEY, which gives it a unique index
+    """CREATE TABLE IF NOT EXISTS memory (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        access_count INTEGER NOT NULL DEFAULT 0,
+        last_accessed TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_memory_timestamp ON memory(timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_memory_access_count ON memory(access_count)",
+    # Recency order used by LRU eviction
+    "CREATE INDEX IF NOT EXISTS idx_memory_recency ON memory(COALESCE(last_accessed, timestamp))",
+    # Semantic index vectors shared by all processes; seq orders changes for incremental reloads
+    """CREATE TABLE IF NOT EXISTS semantic_vectors (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        key TEXT NOT NULL UNIQUE,
+        vector BLOB NOT NULL,
+        signature TEXT NOT NULL
+    )"""
+)
+
+# Statements are kept as constants so sqlite3's per-connection statement
+# cache reuses the prepared form on every call
+_SQL_WRITE = (
+    "INSERT OR REPLACE INTO memory (key, value, timestamp, access_count, last_accessed) "
+    "VALUES (?, ?, ?, 0, NULL)"
+)
+_SQL_READ = "SELECT value, timestamp, access_count, last_accessed FROM memory WHERE key = ?"
+_SQL_DELETE = "DELETE FROM memory WHERE key = ?"
+# Parameters: key to keep ("" for none; keys are hex digests), number to evict
+_SQL_EVICT = {
+    "lru": (
+        "DELETE FROM memory WHERE key IN (SELECT key FROM memory WHERE key != ? "
+        "ORDER BY COALESCE(last_accessed, timestamp) LIMIT ?) RETURNING key"
+    ),
+    "lfu": (
+        "DELETE FROM memory WHERE key IN (SELECT key FROM memory WHERE key != ? "
+        "ORDER BY access_count, timestamp LIMIT ?) RETURNING key"
+    )
+}
+_SQL_TOUCH = (
+    "UPDATE memory SET access_count = access_count + ?, last_accessed = ? WHERE key = ?"
+)
+_SQL_COUNT = "SELECT COUNT(*) FROM memory"
+_SQL_VECTOR_SAVE = "INSERT OR REPLACE INTO semantic_vectors (key, vector, signature) VALUES (?, ?, ?)"
+_SQL_VECTOR_DELETE = "DELETE FROM semantic_vectors WHERE key = ?"
+_SQL_VECTORS_SINCE = "SELECT seq, key, vector, signature FROM semantic_vectors WHERE seq > ? ORDER BY seq"
+_SQL_IMPORT = (
+    "INSERT OR IGNORE INTO memory (key, value, timestamp, access_count, last_accessed) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+
+
+class SQLiteLTMStorage(BaseLTMStorage):
+    """
+    SQLite Long-Term Memory storage.
+
+    The database runs in WAL mode, so readers never block each other or the
+    single writer, and every thread (and every worker process) uses its own
+    connection. Access-count updates from reads are batched in memory and
+    written in one transaction by the background flush thread, which keeps
+    reads free of write locks.
+
+    On first use an existing `memory.json` from the JSON engine is imported.
+
+    Also serves as the shared store of the semantic index, so every worker
+    process searches the vectors added by all of them.
+    """
+
+    def __init__(
+        self,
+        storage_path: str,
+        flush_interval: float = 1.0,
+        busy_timeout: float = 5.0
+    ):
+        """
+        Initialize SQLite LTM storage.
+
+        Args:
+            storage_path: Directory path where memory.db will be stored
+            flush_interval: Seconds between background flushes of batched access counts
+            busy_timeout: Seconds to wait for a competing writer before failing
+        """
+        super().__init__(storage_path, flush_interval)
+        self.db_file = os.path.join(storage_path, "memory.db")
+        self.busy_timeout = busy_timeout
+
+        self._local = threading.local()
+        # (opening thread, connection) for every connection this process opened
+        self._connections: List[Tuple[threading.Thread, sqlite3.Connection]] = []
+        self._connections_pid = os.getpid()
+        self._connections_lock = threading.Lock()
+        # key -> [access count delta, last_accessed] not yet written to the database
+        self._pending_access: Dict[str, list] = {}
+        self._pending_lock = threading.Lock()
+
+        os.makedirs(self.storage_path, exist_ok=True)
+        self._initialize_schema()
+        self._close_at_exit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one if needed (or after a fork)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout,
+            isolation_level=None,  # autocommit; transactions are explicit
+            check_same_thread=False,  # only so it can be closed from another thread
+            cached_statements=64
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        with self._connections_lock:
+            if self._connections_pid != os.getpid():
+                # Connections inherited from the parent (e.g. a preloading server
+                # master) belong to it; never use or close them in this process
+                self._connections = []
+                self._connections_pid = os.getpid()
+            self._prune_connections()
+            self._connections.append((threading.current_thread(), connection))
+        return connection
+
+    def _prune_connections(self):
+        """Close connections whose thread has exited (e.g. a finished executor worker). Caller holds _connections_lock."""
+        alive = []
+        for thread, connection in self._connections:
+            if thread.is_alive():
+                alive.append((thread, connection))
+                continue
+            try:
+                connection.close()
+            except Exception:
+                pass
+        self._connections = alive
+
+    def _initialize_schema(self):
+        """Create tables and indexes, importing memory.json into an empty database."""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            if connection.execute(_SQL_COUNT).fetchone()[0] == 0:
+                self._import_json(connection)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def _import_json(self, connection: sqlite3.Connection):
+        """Import entries from a JSON-engine memory.json in the same directory."""
+        memory_file = os.path.join(self.storage_path, "memory.json")
+        if not os.path.exists(memory_file):
+            return
+
+        try:
+            with open(memory_file, 'rb') as f:
+                memory = serialization.loads(f.read()) or {}
+        except Exception as e:
+            logger.error("Error importing memory.json: %s", e)
+            return
+
+        connection.executemany(_SQL_IMPORT, [
+            (
+                key,
+                serialization.dumps(entry.get("value")),
+                entry.get("timestamp") or datetime.utcnow().isoformat() + "Z",
+                entry.get("access_count", 0),
+                entry.get("last_accessed")
+            )
+            for key, entry in memory.items()
+        ])
+
+    def flush(self):
+        """Write batched access-count updates in a single transaction."""
+        with self._pending_lock:
+            if not self._pending_access:
+                return
+            pending = self._pending_access
+            self._pending_access = {}
+
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(_SQL_TOUCH, [
+                    (count, last_accessed, key)
+                    for key, (count, last_accessed) in pending.items()
+                ])
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        except Exception as e:
+            logger.error("Error flushing memory: %s", e)
+
+    def close(self):
+        """Flush pending updates and close every connection opened by this process."""
+        super().close()
+        self.flush()
+        with self._connections_lock:
+            if self._connections_pid != os.getpid():
+                self._connections = []
+            for _, connection in self._connections:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+
+    def write(self, key: str, value: Any) -> bool:
+        """
+        Write a key-value pair to LTM.
+
+        Args:
+            key: Storage key
+            value: Value to store
+
+        Returns:
+            True on success, False otherwise
+        """
+        try:
+            timestamp = datetime.utcnow().isoformat() + "Z"
+            with self._pending_lock:
+                self._pending_access.pop(key, None)
+            self._connection().execute(_SQL_WRITE, (key, serialization.dumps(value), timestamp))
+            self._ensure_flusher()
+            return True
+        except Exception as e:
+            logger.error("Error writing to memory: %s", e)
+            return False
+
+    def read_entry(self, key: str) -> Optional[dict]:
+        """
+        Read a full entry from LTM and count the access.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            Stored entry or None if not found
+        """
+        try:
+            row = self._connection().execute(_SQL_READ, (key,)).fetchone()
+            if row is None:
+                return None
+
+            # Update access count; written in batches by the flush thread
+            now = datetime.utcnow().isoformat() + "Z"
+            with self._pending_lock:
+                pending = self._pending_access.setdefault(key, [0, None])
+                pending[0] += 1
+                pending[1] = now
+                access_count = row[2] + pending[0]
+
+            self._ensure_flusher()
+            return {
+                "value": serialization.loads(row[0]),
+                "timestamp": row[1],
+                "access_count": access_count,
+                "last_accessed": now
+            }
+        except Exception as e:
+            logger.error("Error reading from memory: %s", e)
+            return None
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete an entry from LTM.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            True if the key existed, False otherwise
+        """
+        try:
+            with self._pending_lock:
+                self._pending_access.pop(key, None)
+            deleted = self._connection().execute(_SQL_DELETE, (key,)).rowcount > 0
+            self._unindex([key])
+            return deleted
+        except Exception as e:
+            logger.error("Error deleting from memory: %s", e)
+            return False
+
+    def evict(self, count: int, policy: str = "lru", keep: Optional[str] = None) -> List[str]:
+        """
+        Delete up to `count` entries chosen by an eviction policy.
+
+        Args:
+            count: Maximum number of entries to evict
+            policy: "lru" (least recently accessed) or "lfu" (lowest access_count)
+            keep: Key never to evict, e.g. the entry just stored
+
+        Returns:
+            Evicted keys
+        """
+        if count <= 0:
+            return []
+
+        statement = _SQL_EVICT[policy]
+        # Rank on up-to-date access counts
+        self.flush()
+        try:
+            victims = [row[0] for row in self._connection().execute(statement, (keep or "", count)).fetchall()]
+            with self._pending_lock:
+                for key in victims:
+                    self._pending_access.pop(key, None)
+            self._unindex(victims)
+            return victims
+        except Exception as e:
+            logger.error("Error evicting from memory: %s", e)
+            return []
+
+    def __len__(self) -> int:
+        """Number of stored entries."""
+        return self._connection().execute(_SQL_COUNT).fetchone()[0]
+
+    def save_vector(self, key: str, vector: bytes, signature: str):
+        """
+        Store the semantic index vector for a key (replacing any earlier one).
+
+        Args:
+            key: Storage key
+            vector: float32 vector bytes
+            signature: query_signature of the indexed query
+        """
+        try:
+            self._connection().execute(_SQL_VECTOR_SAVE, (key, vector, signature))
+        except Exception as e:
+            logger.error("Error saving semantic vector: %s", e)
+
+    def delete_vectors(self, keys: List[str]):
+        """Remove the semantic index vectors of deleted keys."""
+        try:
+            self._connection().executemany(_SQL_VECTOR_DELETE, [(key,) for key in keys])
+        except Exception as e:
+            logger.error("Error deleting semantic vectors: %s", e)
+
+    def load_vectors(self, after: int) -> Tuple[List[Tuple[str, bytes, str]], int]:
+        """
+        Semantic index vectors saved (by any process) after a sequence number.
+
+        Args:
+            after: Highest sequence number already loaded (0 for all)
+
+        Returns:
+            Tuple of ([(key, vector bytes, signature), ...], new highest sequence number)
+        """
+        rows = self._connection().execute(_SQL_VECTORS_SINCE, (after,)).fetchall()
+        if not rows:
+            return [], after
+        return [(key, vector, signature) for _, key, vector, signature in rows], rows[-1][0]
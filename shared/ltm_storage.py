@@ -3,130 +3,639 @@ Long-Term Memory (LTM) storage implementation using JSON files.
 Provides persistent storage for agent responses and learning.
 """
 
-import json
+import atexit
+import heapq
 import os
-from typing import Any, Optional
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import hashlib
 
+from . import serialization
+from .structured_logging import get_logger
 
-class LTMStorage:
+logger = get_logger("ltm")
+
+# Storages still open, closed (and so persisted) at interpreter exit. Held
+# weakly so a storage nobody uses any more can be garbage collected.
+_open_storages: "weakref.WeakSet[BaseLTMStorage]" = weakref.WeakSet()
+
+
+@atexit.register
+def _close_open_storages():
+    """Close every storage still open at interpreter exit."""
+    for storage in list(_open_storages):
+        try:
+            storage.close()
+        except Exception as e:
+            logger.error("Error closing memory: %s", e)
+
+
+def _flush_loop(storage_ref: "weakref.ref[BaseLTMStorage]", stop: threading.Event, interval: float):
+    """
+    Flush-thread body: run the storage's periodic work every `interval` seconds.
+
+    Holds the storage only through a weak reference between rounds, so the
+    thread does not keep an otherwise unused storage alive.
+    """
+    while not stop.wait(interval):
+        storage = storage_ref()
+        if storage is None:
+            return
+        storage._flush_round()
+        del storage
+
+
+def generate_key(text: str) -> str:
+    """
+    Hash key for a query: MD5 of the lowercased, stripped text.
+
+    Args:
+        text: Query (or serialized conversation) to key
+
+    Returns:
+        Hex digest used as the storage key
+    """
+    return hashlib.md5(text.lower().strip().encode()).hexdigest()
+
+
+class BaseLTMStorage(ABC):
+    """
+    Common interface and helpers shared by all LTM storage engines.
+
+    Engines implement read/write; query hashing, the query-level helpers and
+    the background flush thread used to batch access-count updates live here.
+    """
+
+    def __init__(self, storage_path: str, flush_interval: float = 1.0):
+        """
+        Initialize shared engine state.
+
+        Args:
+            storage_path: Directory path where LTM files will be stored
+            flush_interval: Seconds between background flushes
+        """
+        self.storage_path = storage_path
+        self.flush_interval = flush_interval
+        # Optional shared.semantic_index.SemanticIndex used by find_entry
+        self.semantic_index = None
+        self.semantic_save_interval = 30.0
+        self._semantic_saved_at = time.monotonic()
+
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+        self._stop = threading.Event()
+
+    def _generate_key(self, query: str) -> str:
+        """
+        Generate a hash key from the query for storage.
+
+        Args:
+            query: The user query
+
+        Returns:
+            Hash key for the query
+        """
+        return generate_key(query)
+
+    def _ensure_flusher(self):
+        """Start the background flush thread (again after a fork, since threads do not survive it)."""
+        if self._flusher_pid == os.getpid() or self._stop.is_set():
+            return
+
+        self._flusher_pid = os.getpid()
+        self._flusher = threading.Thread(
+            target=_flush_loop,
+            args=(weakref.ref(self), self._stop, self.flush_interval),
+            name="ltm-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_round(self):
+        """One round of the flush thread: _background_flush, plus a semantic index sync when due."""
+        try:
+            self._background_flush()
+            if time.monotonic() - self._semantic_saved_at >= self.semantic_save_interval:
+                self._sync_semantic_index()
+        except Exception as e:
+            logger.error("Error flushing memory: %s", e)
+
+    def _close_at_exit(self):
+        """Have this storage closed at interpreter exit unless it is closed (or collected) before."""
+        _open_storages.add(self)
+        # Stop the flush thread if the storage is collected without close()
+        weakref.finalize(self, self._stop.set).atexit = False
+
+    def _background_flush(self):
+        """Periodic work done by the flush thread."""
+        self.flush()
+
+    def _sync_semantic_index(self):
+        """Save the semantic index if it changed, or load other processes' additions from its shared store."""
+        self._semantic_saved_at = time.monotonic()
+        if self.semantic_index is not None:
+            try:
+                self.semantic_index.sync()
+            except Exception as e:
+                logger.error("Error syncing semantic index: %s", e)
+
+    def _unindex(self, keys: List[str]):
+        """Drop deleted keys from the semantic index."""
+        if self.semantic_index is not None:
+            for key in keys:
+                self.semantic_index.remove(key)
+
+    def flush(self):
+        """Persist batched updates now."""
+
+    def close(self):
+        """Stop background work and release resources."""
+        _open_storages.discard(self)
+        self._stop.set()
+        if self.semantic_index is not None and self.semantic_index.store is None:
+            # A store-backed index is already persisted; only a file needs saving
+            self._sync_semantic_index()
+
+    @abstractmethod
+    def write(self, key: str, value: Any) -> bool:
+        """
+        Write a key-value pair to LTM.
+        Returns True on success, False otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def read_entry(self, key: str) -> Optional[dict]:
+        """
+        Read a full entry (value, timestamp, access_count, last_accessed) and
+        count the access. Returns None if the key is not found.
+        """
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        """
+        Delete an entry from LTM.
+        Returns True if the key existed, False otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def evict(self, count: int, policy: str = "lru", keep: Optional[str] = None) -> List[str]:
+        """
+        Delete up to `count` entries chosen by policy: "lru" removes the least
+        recently accessed, "lfu" the lowest access_count. The `keep` key is
+        never chosen. Returns the evicted keys.
+        """
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored entries."""
+        pass
+
+    def read(self, key: str) -> Optional[Any]:
+        """
+        Read a value from LTM.
+
+        Args:
+            key: Storage key
+
+        Returns:
+            Stored value or None if not found
+        """
+        entry = self.read_entry(key)
+        return entry["value"] if entry is not None else None
+
+    def find_entry(self, query: str, semantic: bool = True) -> Optional[Tuple[str, dict, float]]:
+        """
+        Find the stored entry answering a query.
+
+        Tries the exact normalized-query key first, then (if a semantic index
+        is attached) the nearest stored query above the similarity threshold.
+
+        Args:
+            query: Query to search for
+            semantic: Fall back to the semantic index on an exact miss
+
+        Returns:
+            Tuple of (key, entry, similarity) with similarity 1.0 for exact
+            matches, or None if nothing matches
+        """
+        key = self._generate_key(query)
+        entry = self.read_entry(key)
+        if entry is not None:
+            return key, entry, 1.0
+
+        if self.semantic_index is None or not semantic:
+            return None
+
+        match = self.semantic_index.search(query)
+        if match is None:
+            return None
+
+        key, similarity = match
+        entry = self.read_entry(key)
+        if entry is None:
+            # Removed by another process; forget the stale vector
+            self.semantic_index.remove(key)
+            return None
+        return key, entry, similarity
+
+    def search_similar(self, query: str) -> Optional[Any]:
+        """
+        Search for similar queries in memory.
+
+        Args:
+            query: Query to search for
+
+        Returns:
+            Cached response if found, None otherwise
+        """
+        found = self.find_entry(query)
+        return found[1]["value"] if found is not None else None
+
+    def store_response(self, query: str, response: Any, semantic: bool = True) -> bool:
+        """
+        Store a successful response in LTM.
+
+        Args:
+            query: The original query
+            response: The response to store
+            semantic: Add the query to the semantic index (if attached)
+
+        Returns:
+            True on success, False otherwise
+        """
+        key = self._generate_key(query)
+        if not self.write(key, response):
+            return False
+
+        if self.semantic_index is not None and semantic:
+            self.semantic_index.add(key, query)
+        return True
+
+
+# Sort keys for (key, entry) pairs; the smallest are evicted first
+_EVICTION_RANK = {
+    "lru": lambda item: item[1].get("last_accessed") or item[1].get("timestamp", ""),
+    "lfu": lambda item: (item[1].get("access_count", 0), item[1].get("timestamp", ""))
+}
+
+
+class LTMStorage(BaseLTMStorage):
     """
     JSON-based Long-Term Memory storage.
     Stores successful responses for quick retrieval and learning.
+
+    All entries live in an in-memory index, so reads never touch the disk.
+    Mutations are appended to `memory.log` (one JSON record per line) and the
+    log is periodically compacted into the `memory.json` snapshot by a
+    background thread. Access-count updates from reads are batched and
+    flushed to the log by the same thread.
+
+    The index is guarded by a lock, so one process may use it from many
+    threads; processes must not share a storage directory (use the SQLite
+    engine for that).
     """
-    
-    def __init__(self, storage_path: str):
+
+    def __init__(
+        self,
+        storage_path: str,
+        compact_threshold: int = 1000,
+        flush_interval: float = 1.0
+    ):
         """
         Initialize LTM storage.
-        
+
         Args:
             storage_path: Directory path where LTM files will be stored
+            compact_threshold: Log records after which the log is compacted into the snapshot
+            flush_interval: Seconds between background flushes of batched access counts
         """
-        self.storage_path = storage_path
+        super().__init__(storage_path, flush_interval)
         self.memory_file = os.path.join(storage_path, "memory.json")
+        self.log_file = os.path.join(storage_path, "memory.log")
+        self.rotated_log_file = self.log_file + ".1"
+        self.compact_threshold = max(1, compact_threshold)
+
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._index: Dict[str, dict] = {}
+        # key -> [access count delta, last_accessed] not yet written to the log
+        self._pending_access: Dict[str, list] = {}
+        self._log_records = 0
+        self._log_handle = None
+
         self._ensure_storage_exists()
-    
+        self._load()
+        self._close_at_exit()
+
     def _ensure_storage_exists(self):
         """Create storage directory and file if they don't exist."""
         os.makedirs(self.storage_path, exist_ok=True)
         if not os.path.exists(self.memory_file):
-            with open(self.memory_file, 'w') as f:
-                json.dump({}, f)
-    
-    def _generate_key(self, query: str) -> str:
+            with open(self.memory_file, 'wb') as f:
+                f.write(serialization.dumps_bytes({}))
+
+    # --- Persistence ---
+
+    def _load(self):
+        """Load the snapshot and replay the mutation log into the in-memory index."""
+        try:
+            with open(self.memory_file, 'rb') as f:
+                self._index = serialization.loads(f.read()) or {}
+        except Exception as e:
+            logger.error("Error loading snapshot: %s", e)
+            self._index = {}
+
+        # A rotated log is left behind only if a compaction was interrupted
+        for log_file in (self.rotated_log_file, self.log_file):
+            if not os.path.exists(log_file):
+                continue
+            with open(log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        record = serialization.loads(line)
+                    except ValueError:
+                        # A crash mid-append can leave a partial last line
+                        continue
+                    self._apply(record)
+                    self._log_records += 1
+
+    def _apply(self, record: dict):
+        """Apply one log record to the in-memory index."""
+        op = record.get("op")
+        key = record.get("key")
+
+        if op == "set":
+            self._index[key] = record["entry"]
+        elif op == "delete":
+            self._index.pop(key, None)
+        elif op == "access" and key in self._index:
+            entry = self._index[key]
+            entry["access_count"] = entry.get("access_count", 0) + record.get("count", 1)
+            entry["last_accessed"] = record.get("last_accessed")
+
+    def _append(self, records: List[dict]):
+        """Append records to the mutation log. Caller must hold the lock."""
+        if self._log_handle is None:
+            self._log_handle = open(self.log_file, 'ab')
+
+        self._log_handle.write(b"".join(serialization.dumps_bytes(record) + b"\n" for record in records))
+        self._log_handle.flush()
+        self._log_records += len(records)
+
+    def _flush_access(self):
+        """Write batched access-count updates to the log. Caller must hold the lock."""
+        if not self._pending_access:
+            return
+
+        records = [
+            {"op": "access", "key": key, "count": count, "last_accessed": last_accessed}
+            for key, (count, last_accessed) in self._pending_access.items()
+        ]
+        self._pending_access.clear()
+        self._append(records)
+
+    def _compact(self):
         """
-        Generate a hash key from the query for storage.
-        
-        Args:
-            query: The user query
-            
-        Returns:
-            Hash key for the query
+        Rewrite the snapshot from the index and start a fresh log.
+
+        Only the entry copy and log rotation run under the index lock; the
+        snapshot itself is serialized and written outside it, so readers are
+        not blocked for the O(N) part. If the process dies between replacing
+        the snapshot and removing the rotated log, the rotated log is replayed
+        again on the next load, which can only over-count access counts.
         """
-        return hashlib.md5(query.lower().strip().encode()).hexdigest()
-    
+        with self._compact_lock:
+            with self._lock:
+                self._flush_access()
+                snapshot = {key: dict(entry) for key, entry in self._index.items()}
+                if self._log_handle is not None:
+                    self._log_handle.close()
+                    self._log_handle = None
+                if os.path.exists(self.log_file):
+                    if os.path.exists(self.rotated_log_file):
+                        # An earlier compaction was interrupted; keep both logs until the snapshot lands
+                        with open(self.log_file, 'rb') as src, open(self.rotated_log_file, 'ab') as dst:
+                            dst.write(src.read())
+                        os.remove(self.log_file)
+                    else:
+                        os.replace(self.log_file, self.rotated_log_file)
+                self._log_records = 0
+
+            tmp_file = self.memory_file + ".tmp"
+            # Compact encoding: the snapshot is only read back by _load
+            with open(tmp_file, 'wb') as f:
+                f.write(serialization.dumps_bytes(snapshot))
+            os.replace(tmp_file, self.memory_file)
+
+            if os.path.exists(self.rotated_log_file):
+                os.remove(self.rotated_log_file)
+
+    def _background_flush(self):
+        """Flush batched access counts, or compact the log once it has grown."""
+        if self._log_records + len(self._pending_access) >= self.compact_threshold:
+            self._compact()
+        else:
+            self.flush()
+
+    def flush(self):
+        """Persist batched access-count updates now."""
+        with self._lock:
+            try:
+                self._flush_access()
+            except Exception as e:
+                logger.error("Error flushing memory: %s", e)
+
+    def compact(self):
+        """Compact the mutation log into the snapshot now."""
+        try:
+            self._compact()
+        except Exception as e:
+            logger.error("Error compacting memory: %s", e)
+
+    def close(self):
+        """Stop the flush thread and persist everything into the snapshot."""
+        super().close()
+        if self._log_records or self._pending_access:
+            self.compact()
+        with self._lock:
+            if self._log_handle is not None:
+                self._log_handle.close()
+                self._log_handle = None
+
+    # --- Public API ---
+
     def write(self, key: str, value: Any) -> bool:
         """
         Write a key-value pair to LTM.
-        
+
         Args:
             key: Storage key
             value: Value to store
-            
+
         Returns:
             True on success, False otherwise
         """
         try:
-            with open(self.memory_file, 'r') as f:
-                memory = json.load(f)
-            
-            memory[key] = {
+            entry = {
                 "value": value,
                 "timestamp": datetime.utcnow().isoformat() + "Z",
                 "access_count": 0
             }
-            
-            with open(self.memory_file, 'w') as f:
-                json.dump(memory, f, indent=2)
-            
+
+            with self._lock:
+                self._index[key] = entry
+                self._pending_access.pop(key, None)
+                self._append([{"op": "set", "key": key, "entry": entry}])
+
+            self._ensure_flusher()
             return True
         except Exception as e:
-            print(f"[LTM] Error writing to memory: {e}")
+            logger.error("Error writing to memory: %s", e)
             return False
-    
-    def read(self, key: str) -> Optional[Any]:
+
+    def read_entry(self, key: str) -> Optional[dict]:
         """
-        Read a value from LTM.
-        
+        Read a full entry from LTM and count the access.
+
         Args:
             key: Storage key
-            
+
         Returns:
-            Stored value or None if not found
+            Copy of the stored entry or None if not found
         """
         try:
-            with open(self.memory_file, 'r') as f:
-                memory = json.load(f)
-            
-            if key in memory:
-                # Update access count
-                memory[key]["access_count"] = memory[key].get("access_count", 0) + 1
-                memory[key]["last_accessed"] = datetime.utcnow().isoformat() + "Z"
-                
-                with open(self.memory_file, 'w') as f:
-                    json.dump(memory, f, indent=2)
-                
-                return memory[key]["value"]
-            
-            return None
+            with self._lock:
+                entry = self._index.get(key)
+                if entry is None:
+                    return None
+
+                # Update access count; persisted in batches by the flush thread
+                now = datetime.utcnow().isoformat() + "Z"
+                entry["access_count"] = entry.get("access_count", 0) + 1
+                entry["last_accessed"] = now
+
+                pending = self._pending_access.setdefault(key, [0, None])
+                pending[0] += 1
+                pending[1] = now
+
+                entry = dict(entry)
+
+            self._ensure_flusher()
+            return entry
         except Exception as e:
-            print(f"[LTM] Error reading from memory: {e}")
+            logger.error("Error reading from memory: %s", e)
             return None
-    
-    def search_similar(self, query: str) -> Optional[Any]:
+
+    def delete(self, key: str) -> bool:
         """
-        Search for similar queries in memory.
-        
+        Delete an entry from LTM.
+
         Args:
-            query: Query to search for
-            
+            key: Storage key
+
         Returns:
-            Cached response if found, None otherwise
+            True if the key existed, False otherwise
         """
-        key = self._generate_key(query)
-        return self.read(key)
-    
-    def store_response(self, query: str, response: Any) -> bool:
+        try:
+            with self._lock:
+                if self._index.pop(key, None) is None:
+                    return False
+                self._pending_access.pop(key, None)
+                self._append([{"op": "delete", "key": key}])
+            self._unindex([key])
+            return True
+        except Exception as e:
+            logger.error("Error deleting from memory: %s", e)
+            return False
+
+    def evict(self, count: int, policy: str = "lru", keep: Optional[str] = None) -> List[str]:
         """
-        Store a successful response in LTM.
-        
+        Delete up to `count` entries chosen by an eviction policy.
+
         Args:
-            query: The original query
-            response: The response to store
-            
+            count: Maximum number of entries to evict
+            policy: "lru" (least recently accessed) or "lfu" (lowest access_count)
+            keep: Key never to evict, e.g. the entry just stored
+
         Returns:
-            True on success, False otherwise
+            Evicted keys
         """
-        key = self._generate_key(query)
-        return self.write(key, response)
+        if count <= 0:
+            return []
+
+        rank = _EVICTION_RANK[policy]
+        try:
+            with self._lock:
+                candidates = (item for item in self._index.items() if item[0] != keep)
+                victims = [key for key, _ in heapq.nsmallest(count, candidates, key=rank)]
+                for key in victims:
+                    del self._index[key]
+                    self._pending_access.pop(key, None)
+                self._append([{"op": "delete", "key": key} for key in victims])
+            self._unindex(victims)
+            return victims
+        except Exception as e:
+            logger.error("Error evicting from memory: %s", e)
+            return []
+
+    def __len__(self) -> int:
+        """Number of stored entries."""
+        return len(self._index)
+
+
+def create_ltm_storage(storage_path: str, config: Optional[dict] = None) -> BaseLTMStorage:
+    """
+    Create the LTM engine selected by the `ltm` section of settings.yaml.
+
+    Args:
+        storage_path: Directory path where LTM files will be stored
+        config: The `ltm` settings dictionary; `storage_type` is "json" or "sqlite"
+            (the LTM_STORAGE_TYPE environment variable takes precedence) and
+            `semantic_search` attaches a semantic index (semantic_index.npz
+            for the JSON engine, a table in memory.db for the SQLite engine)
+
+    Returns:
+        Configured LTM storage engine
+    """
+    config = config or {}
+    storage_type = os.getenv("LTM_STORAGE_TYPE", config.get("storage_type", "json")).lower()
+    flush_interval = float(config.get("flush_interval", 1.0))
+
+    if storage_type == "json":
+        storage = LTMStorage(
+            storage_path,
+            compact_threshold=int(config.get("compact_threshold", 1000)),
+            flush_interval=flush_interval
+        )
+    elif storage_type == "sqlite":
+        from .ltm_sqlite import SQLiteLTMStorage
+        storage = SQLiteLTMStorage(
+            storage_path,
+            flush_interval=flush_interval,
+            busy_timeout=float(config.get("busy_timeout", 5.0))
+        )
+    else:
+        raise ValueError(f"Unknown LTM storage type: {storage_type}")
+
+    if config.get("semantic_search", False):
+        # Imported lazily so NumPy is only needed when semantic search is on
+        from .semantic_index import SemanticIndex
+        # Worker processes sharing memory.db also share its vectors
+        shared_store = storage if storage_type == "sqlite" else None
+        storage.semantic_index = SemanticIndex(
+            None if shared_store is not None else os.path.join(storage_path, "semantic_index.npz"),
+            n_features=int(config.get("semantic_dimensions", 1024)),
+            threshold=float(config.get("semantic_threshold", 0.92)),
+            store=shared_store
+        )
+        storage.semantic_save_interval = float(config.get("semantic_save_interval", 30))
+
+    return storage
@@ -0,0 +1,295 @@
+"""
+In-process metrics exported in the Prometheus text format.
+
+Recording only touches a per-thread shard (no locks); shards are merged and
+formatted when /metrics is scraped. Values are per worker process.
+"""
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Seconds; covers local answers (sub-millisecond) up to slow LLM calls
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0
+)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """Base class: one dict of label values -> state per recording thread."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        # list.append is atomic, so threads can register shards without a lock
+        self._shards: List[dict] = []
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            values = {}
+            self._local.values = values
+            self._shards.append(values)
+            return values
+
+    def _merged(self) -> Dict[Tuple[str, ...], float]:
+        merged: Dict[Tuple[str, ...], float] = {}
+        for shard in list(self._shards):
+            for labels, value in list(shard.items()):
+                merged[labels] = merged.get(labels, 0.0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        merged = self._merged()
+        if not merged and not self.labelnames:
+            merged[()] = 0.0
+        for labels, value in sorted(merged.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type_name = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """
+        Increase the counter.
+
+        Args:
+            labels: Label values, in labelnames order
+            amount: Increment (must not be negative)
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. in-flight requests)."""
+
+    type_name = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """Increase the gauge."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        """Decrease the gauge."""
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) - amount
+
+    @contextmanager
+    def track(self, *labels: str) -> Iterator[None]:
+        """Count the enclosed block as in progress."""
+        self.inc(*labels)
+        try:
+            yield
+        finally:
+            self.dec(*labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        """
+        Record one observation.
+
+        Args:
+            value: Observed value (seconds for latency histograms)
+            labels: Label values, in labelnames order
+        """
+        shard = self._shard()
+        state = shard.get(labels)
+        if state is None:
+            # Per-bucket counts (last one is +Inf), then sum
+            state = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the enclosed block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def _merged(self) -> Dict[Tuple[str, ...], list]:
+        merged: Dict[Tuple[str, ...], list] = {}
+        for shard in list(self._shards):
+            for labels, state in list(shard.items()):
+                total = merged.get(labels)
+                if total is None:
+                    merged[labels] = list(state)
+                else:
+                    for i, value in enumerate(state):
+                        total[i] += value
+        return merged
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        bounds = self.buckets + (math.inf,)
+        for labels, state in sorted(self._merged().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Metric read from a function at scrape time, for state other components already track."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        func: Callable[[], Dict[Tuple[str, ...], float]],
+        labelnames: Sequence[str] = (),
+        type_name: str = "gauge"
+    ):
+        """
+        Initialize the metric.
+
+        Args:
+            name: Metric name
+            documentation: HELP text
+            func: Returns {label values: value}; use an empty tuple without labels
+            labelnames: Label names for the tuples func returns
+            type_name: "gauge", or "counter" for cumulative totals
+        """
+        self.name = name
+        self.documentation = documentation
+        self.func = func
+        self.labelnames = tuple(labelnames)
+        self.type_name = type_name
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for labels, value in sorted(self.func().items()):
+            if value is not None:
+                lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        """
+        Add a metric, replacing any previous one with the same name.
+
+        Args:
+            metric: Counter, Gauge, Histogram or CallbackMetric
+
+        Returns:
+            The metric, for assignment at definition time
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.register(Counter(
+    "agent_http_requests_total", "HTTP requests by endpoint and status code", ("path", "status")
+))
+REQUEST_LATENCY = REGISTRY.register(Histogram(
+    "agent_http_request_duration_seconds",
+    "HTTP request latency by endpoint (until response headers for streams)",
+    ("path",)
+))
+REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "agent_http_requests_in_flight", "HTTP requests currently being handled"
+))
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    "agent_stage_duration_seconds",
+    "Time spent per processing stage (validation, prompt_build, upstream_llm, fallback, ltm_read, ltm_write)",
+    ("stage",)
+))
+UPSTREAM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "agent_upstream_requests_in_flight", "Gemini HTTP calls currently open"
+))
+UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "agent_upstream_errors_total", "Failed Gemini HTTP calls by status code (or timeout/connection)", ("status",)
+))
+EXECUTOR_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "agent_executor_queue_wait_seconds", "Time blocking work waited for a thread in the executor pool"
+))
+RESPONSES = REGISTRY.register(Counter(
+    "agent_responses_total", "Answers by source (generated, ltm_cache, rule_based, calculator)", ("source",)
+))
+
+
+def upstream_error_label(error: BaseException) -> Optional[str]:
+    """Status label for a failed upstream call, or None for errors that are not HTTP failures."""
+    import httpx  # already loaded by the Gemini client that raised the error
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code)
+    if isinstance(error, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(error, httpx.TransportError):
+        return "connection"
+    return None
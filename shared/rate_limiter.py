@@ -0,0 +1,212 @@
+"""
+Upstream rate limit shared by all worker processes.
+The token bucket lives in a small SQLite database, so every process draws from one budget.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS buckets ("
+    "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+)
+_SQL_SELECT = "SELECT tokens, updated FROM buckets WHERE name = ?"
+_SQL_UPSERT = "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)"
+
+
+class RateLimitedError(Exception):
+    """Raised instead of calling the provider when no token is available in time."""
+    pass
+
+
+class SharedRateLimiter:
+    """
+    Token bucket stored in SQLite (WAL mode), safe across threads and processes.
+
+    Each acquisition refills the bucket for the time elapsed since the last
+    one (wall clock, which all processes share) and takes a token inside one
+    write transaction. Every thread (and process) uses its own connection.
+    """
+
+    def __init__(
+        self,
+        db_file: str,
+        requests_per_minute: float = 600,
+        burst: float = 20,
+        max_wait: float = 2.0,
+        name: str = "gemini",
+        busy_timeout: float = 1.0,
+        executor=None
+    ):
+        """
+        Initialize the limiter.
+
+        Args:
+            db_file: SQLite file holding the bucket (created if missing)
+            requests_per_minute: Sustained rate across all processes
+            burst: Bucket size, i.e. calls allowed at once after an idle period
+            max_wait: Longest wait for a token before giving up
+            name: Bucket name, so several limits can share one file
+            busy_timeout: Seconds to wait for another process holding the lock
+            executor: Optional shared.executor.BlockingExecutor that acquire()
+                runs the SQLite transaction in (a worker thread otherwise)
+        """
+        self.db_file = db_file
+        self.rate = max(requests_per_minute, 0.001) / 60.0
+        self.burst = max(1.0, burst)
+        self.max_wait = max_wait
+        self.name = name
+        self.busy_timeout = busy_timeout
+        self.executor = executor
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._acquired = 0
+        self._waited = 0
+        self._rejected = 0
+
+        os.makedirs(os.path.dirname(db_file) or ".", exist_ok=True)
+        self._connection().execute(_SCHEMA)
+
+    @classmethod
+    def from_settings(cls, settings: dict, db_file: str, executor=None) -> Optional["SharedRateLimiter"]:
+        """
+        Build a limiter from the `rate_limit` section of settings.yaml.
+
+        Args:
+            settings: Loaded settings
+            db_file: SQLite file holding the bucket
+            executor: Optional BlockingExecutor for acquire()
+
+        Returns:
+            SharedRateLimiter, or None if rate limiting is disabled
+        """
+        config = settings.get("rate_limit", {}) or {}
+        if not config.get("enabled", False):
+            return None
+
+        return cls(
+            db_file,
+            requests_per_minute=float(config.get("requests_per_minute", 600)),
+            burst=float(config.get("burst", 20)),
+            max_wait=float(config.get("max_wait", 2.0)),
+            executor=executor
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening one if needed (or after a fork)."""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(
+            self.db_file,
+            timeout=self.busy_timeout,
+            isolation_level=None,  # autocommit; transactions are explicit
+            check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def try_acquire(self) -> float:
+        """
+        Take a token if one is available.
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one will be
+        """
+        connection = self._connection()
+        now = time.time()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(_SQL_SELECT, (self.name,)).fetchone()
+            if row is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, row[0] + max(0.0, now - row[1]) * self.rate)
+
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+
+            connection.execute(_SQL_UPSERT, (self.name, tokens, now))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+    def _count(self, counter: str):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def acquire(self):
+        """
+        Take a token, waiting up to max_wait for one.
+
+        The SQLite transaction can wait up to busy_timeout for other
+        processes, so it runs off the event loop.
+
+        Raises:
+            RateLimitedError: If no token becomes available within max_wait
+        """
+        waited = 0.0
+        while True:
+            if self.executor is not None:
+                wait = await self.executor.run(self.try_acquire)
+            else:
+                wait = await asyncio.to_thread(self.try_acquire)
+            if wait == 0.0:
+                self._count("_acquired")
+                if waited:
+                    self._count("_waited")
+                return
+            if waited + wait > self.max_wait:
+                self._count("_rejected")
+                raise RateLimitedError(f"Upstream rate limit reached ({self.rate * 60:g} requests/minute)")
+            # Other processes may take the token first, so check again after waiting
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def acquire_sync(self):
+        """Blocking counterpart of acquire."""
+        waited = 0.0
+        while True:
+            wait = self.try_acquire()
+            if wait == 0.0:
+                self._count("_acquired")
+                if waited:
+                    self._count("_waited")
+                return
+            if waited + wait > self.max_wait:
+                self._count("_rejected")
+                raise RateLimitedError(f"Upstream rate limit reached ({self.rate * 60:g} requests/minute)")
+            time.sleep(wait)
+            waited += wait
+
+    def stats(self) -> dict:
+        """
+        Limiter counters for this process, for health reporting.
+
+        Returns:
+            Dictionary with the configured rate and acquired/waited/rejected counts
+        """
+        with self._stats_lock:
+            return {
+                "requests_per_minute": round(self.rate * 60, 3),
+                "burst": self.burst,
+                "acquired": self._acquired,
+                "waited": self._waited,
+                "rejected": self._rejected
+            }
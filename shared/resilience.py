@@ -0,0 +1,385 @@
+"""
+Retries and circuit breaking for upstream LLM calls.
+Transient failures are retried with jittered backoff; a failing provider is short-circuited.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+
+from .deadline import Deadline
+
+
+TRANSIENT_STATUS_CODES = frozenset([408, 429, 500, 502, 503, 504])
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the provider while the circuit is open."""
+    pass
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether an error is worth retrying (timeouts, connection errors, 408/429/5xx).
+
+    Args:
+        error: Exception raised by an upstream call
+
+    Returns:
+        True for transient provider failures
+    """
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in TRANSIENT_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Seconds from a Retry-After header, if the error carries one."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("Retry-After")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by a total time budget."""
+
+    def __init__(
+        self,
+        max_retries: int = 2,
+        base_delay: float = 0.2,
+        max_delay: float = 5.0,
+        budget: float = 20.0
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Backoff ceiling for the first retry, in seconds
+            max_delay: Upper bound for a single backoff
+            budget: No retry is started once elapsed time plus backoff would exceed this
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+
+    def delay(self, attempt: int, error: BaseException) -> float:
+        """
+        Backoff before retry number `attempt` (0-based).
+
+        A Retry-After header is honored up to max_delay; otherwise the delay is
+        drawn uniformly from [0, min(max_delay, base_delay * 2**attempt)].
+        """
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open circuit breaker.
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and calls fail immediately with CircuitOpenError. Once
+    `reset_timeout` seconds have passed, up to `half_open_max_calls` probe
+    calls are let through: a success closes the circuit, a failure reopens it.
+    Thread-safe, so sync and async callers can share one breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1
+    ):
+        """
+        Initialize the breaker in the closed state.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+
+        self._times_opened = 0
+        self._short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half-open once the timeout has passed."""
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def before_call(self):
+        """
+        Admit a call or fail fast.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all probe slots are taken
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return
+            self._short_circuited += 1
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        raise CircuitOpenError(f"LLM provider circuit is open; retrying in {retry_in:.0f}s")
+
+    def record_success(self):
+        """The provider answered; close the circuit."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        """A transient provider failure; open the circuit at the threshold or on a failed probe."""
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probes = 0
+
+    def release(self):
+        """The call ended without telling us anything about provider health."""
+        with self._lock:
+            if self._state == self.HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def stats(self) -> dict:
+        """
+        Breaker state for health and metrics reporting.
+
+        Returns:
+            Dictionary with state, consecutive failures and counters
+        """
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "times_opened": self._times_opened,
+                "short_circuited": self._short_circuited
+            }
+
+
+class ResilientCaller:
+    """Runs upstream calls through a CircuitBreaker with RetryPolicy retries."""
+
+    def __init__(self, retry: RetryPolicy, breaker: CircuitBreaker):
+        """
+        Initialize the caller.
+
+        Args:
+            retry: Retry policy for transient failures
+            breaker: Circuit breaker shared by all calls to the provider
+        """
+        self.retry = retry
+        self.breaker = breaker
+        self._retries = 0
+        self._gave_up = 0
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "ResilientCaller":
+        """
+        Build a caller from settings.yaml.
+
+        Retries come from `workers.sustainability_footprint.max_retries`, the
+        retry budget from its `timeout`, and the rest from `resilience`.
+        """
+        worker = (settings.get("workers", {}) or {}).get("sustainability_footprint", {}) or {}
+        config = settings.get("resilience", {}) or {}
+        return cls(
+            RetryPolicy(
+                max_retries=int(worker.get("max_retries", 2)),
+                base_delay=float(config.get("retry_base_delay", 0.2)),
+                max_delay=float(config.get("retry_max_delay", 5.0)),
+                budget=float(worker.get("timeout", 25))
+            ),
+            CircuitBreaker(
+                failure_threshold=int(config.get("failure_threshold", 5)),
+                reset_timeout=float(config.get("reset_timeout", 30)),
+                half_open_max_calls=int(config.get("half_open_max_calls", 1))
+            )
+        )
+
+    def _budget(self, deadline: Optional[Deadline]) -> float:
+        """Retry budget for one call: the policy budget, cut short by the request deadline."""
+        if deadline is None:
+            return self.retry.budget
+        return min(self.retry.budget, deadline.remaining())
+
+    def _should_retry(self, error: BaseException, attempt: int, started: float, budget: float) -> Optional[float]:
+        """Record the failure and return the backoff before retrying, or None to give up."""
+        if not is_transient(error):
+            self.breaker.release()
+            return None
+
+        self.breaker.record_failure()
+        if attempt >= self.retry.max_retries:
+            self._gave_up += 1
+            return None
+
+        delay = self.retry.delay(attempt, error)
+        if time.monotonic() - started + delay > budget:
+            self._gave_up += 1
+            return None
+
+        self._retries += 1
+        return delay
+
+    async def call(self, func: Callable[[], Awaitable[Any]], deadline: Optional[Deadline] = None) -> Any:
+        """
+        Await func with retries and circuit breaking.
+
+        Args:
+            func: Zero-argument coroutine function making one upstream attempt
+            deadline: Request deadline; no retry is started that would end after it
+
+        Returns:
+            The first successful result
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            Exception: The last error once retries are exhausted or not applicable
+        """
+        started = time.monotonic()
+        budget = self._budget(deadline)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = await func()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                delay = self._should_retry(e, attempt, started, budget)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def call_sync(self, func: Callable[[], Any]) -> Any:
+        """Blocking counterpart of call."""
+        started = time.monotonic()
+        budget = self._budget(None)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                delay = self._should_retry(e, attempt, started, budget)
+                if delay is None:
+                    raise
+                attempt += 1
+                time.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    async def stream(
+        self,
+        open_stream: Callable[[], AsyncIterator[Any]],
+        deadline: Optional[Deadline] = None
+    ) -> AsyncIterator[Any]:
+        """
+        Iterate a streaming call, retrying only failures before the first item.
+
+        Once an item has been yielded the stream cannot be replayed, so later
+        failures are raised to the caller (and still count against the breaker).
+
+        Args:
+            open_stream: Zero-argument function returning a new async iterator
+            deadline: Request deadline; no retry is started that would end after it
+
+        Yields:
+            Items of the first stream that starts successfully
+        """
+        started = time.monotonic()
+        budget = self._budget(deadline)
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            received = False
+            stream = open_stream()
+            try:
+                async for item in stream:
+                    if not received:
+                        received = True
+                        self.breaker.record_success()
+                    yield item
+            except (asyncio.CancelledError, GeneratorExit):
+                if not received:
+                    self.breaker.release()
+                raise
+            except Exception as e:
+                if received:
+                    if is_transient(e):
+                        self.breaker.record_failure()
+                    raise
+                delay = self._should_retry(e, attempt, started, budget)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            finally:
+                # Close the upstream stream promptly (e.g. on client disconnect)
+                await stream.aclose()
+
+            if not received:
+                self.breaker.record_success()
+            return
+
+    def stats(self) -> dict:
+        """
+        Retry and breaker counters.
+
+        Returns:
+            Dictionary with breaker state, retries performed and calls given up
+        """
+        stats = self.breaker.stats()
+        stats["retries"] = self._retries
+        stats["gave_up"] = self._gave_up
+        return stats
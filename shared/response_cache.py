@@ -0,0 +1,164 @@
+"""
+Response cache on top of Long-Term Memory.
+Enforces the ltm.cache_ttl and ltm.max_cache_size settings.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from .ltm_storage import BaseLTMStorage
+from .metrics import STAGE_LATENCY
+
+
+class ResponseCache:
+    """
+    TTL- and size-bounded cache of generated responses, stored in LTM.
+
+    Entries older than `ttl` seconds are treated as misses and removed on
+    lookup. When the store grows past `max_size`, entries are evicted by
+    the configured policy: "lru" drops the least recently used ones, "lfu"
+    the ones with the lowest `access_count` tracked by LTM. The entry being
+    stored is never evicted by its own put, which under "lfu" would
+    otherwise drop every new answer (count 0) once the rest had been read.
+    """
+
+    POLICIES = ("lru", "lfu")
+
+    def __init__(
+        self,
+        ltm: BaseLTMStorage,
+        ttl: float = 86400,
+        max_size: int = 1000,
+        policy: str = "lru",
+        enabled: bool = True
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            ltm: LTM engine that stores the entries
+            ttl: Seconds an entry stays valid (0 disables expiry)
+            max_size: Maximum number of stored entries
+            policy: Eviction policy, "lru" or "lfu"
+            enabled: Default for requests that don't choose explicitly
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown cache policy: {policy} (expected one of {self.POLICIES})")
+
+        self.ltm = ltm
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self.policy = policy
+        self.enabled = enabled
+
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._semantic_hits = 0
+        self._misses = 0
+        self._expirations = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_settings(cls, ltm: BaseLTMStorage, settings: dict) -> "ResponseCache":
+        """Build a cache from the `ltm` section of settings.yaml."""
+        config = settings.get("ltm", {}) or {}
+        return cls(
+            ltm,
+            ttl=float(config.get("cache_ttl", 86400)),
+            max_size=int(config.get("max_cache_size", 1000)),
+            policy=str(config.get("cache_policy", "lru")).lower(),
+            enabled=bool(config.get("enabled", True))
+        )
+
+    def _is_expired(self, entry: dict) -> bool:
+        """Whether an entry is older than the TTL."""
+        if not self.ttl:
+            return False
+
+        timestamp = entry.get("timestamp")
+        if not timestamp:
+            return True
+
+        stored_at = datetime.fromisoformat(timestamp.rstrip("Z"))
+        return datetime.utcnow() - stored_at > timedelta(seconds=self.ttl)
+
+    def _count(self, counter: str, amount: int = 1):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get(self, query: str, semantic: bool = True) -> Optional[Any]:
+        """
+        Look up a cached response (exact match, then semantic neighbour).
+
+        Args:
+            query: User query
+            semantic: Also accept a semantic neighbour (if the LTM has an index)
+
+        Returns:
+            Cached response, or None on a miss or expired entry
+        """
+        with STAGE_LATENCY.time("ltm_read"):
+            found = self.ltm.find_entry(query, semantic)
+
+        if found is None:
+            self._count("_misses")
+            return None
+
+        key, entry, similarity = found
+        if self._is_expired(entry):
+            self.ltm.delete(key)
+            self._count("_expirations")
+            self._count("_misses")
+            return None
+
+        self._count("_hits")
+        if similarity < 1.0:
+            self._count("_semantic_hits")
+        return entry["value"]
+
+    def put(self, query: str, response: Any, semantic: bool = True) -> bool:
+        """
+        Store a response and evict entries beyond max_size.
+
+        Args:
+            query: User query
+            response: Response to cache
+            semantic: Add the query to the semantic index (if the LTM has one)
+
+        Returns:
+            True on success, False otherwise
+        """
+        with STAGE_LATENCY.time("ltm_write"):
+            if not self.ltm.store_response(query, response, semantic):
+                return False
+
+            overflow = len(self.ltm) - self.max_size
+            if overflow > 0:
+                evicted = self.ltm.evict(overflow, self.policy, keep=self.ltm._generate_key(query))
+                self._count("_evictions", len(evicted))
+
+        return True
+
+    def stats(self) -> dict:
+        """
+        Cache counters for health and metrics reporting.
+
+        Returns:
+            Dictionary with configuration and hit/miss/eviction counters
+        """
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": self.enabled,
+                "policy": self.policy,
+                "ttl": self.ttl,
+                "max_size": self.max_size,
+                "size": len(self.ltm),
+                "hits": self._hits,
+                "semantic_hits": self._semantic_hits,
+                "misses": self._misses,
+                "expirations": self._expirations,
+                "evictions": self._evictions,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0
+            }
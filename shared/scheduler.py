@@ -0,0 +1,175 @@
+"""
+Bounded concurrency scheduler for upstream LLM calls.
+Limits in-flight requests, queues the overflow by priority and rejects
+new work when the queue is full.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+from communication.protocol import TaskPriority
+
+
+class SchedulerFullError(Exception):
+    """Raised when a request cannot be admitted because the wait queue is full."""
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the LLM with one priority lane per TaskPriority.
+
+    At most `max_in_flight` calls run at once. Further callers wait in a
+    priority queue (CRITICAL first, FIFO within a lane) of at most `max_queue`
+    entries; once that is full, acquire() fails immediately with
+    SchedulerFullError so the API can answer 503 instead of piling up latency.
+
+    The scheduler is bound to a single event loop and is not thread-safe.
+    """
+
+    def __init__(self, max_in_flight: int = 32, max_queue: int = 256):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_in_flight: Maximum number of concurrent upstream calls
+            max_queue: Maximum number of callers waiting for a slot
+        """
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+
+        self._in_flight = 0
+        # Heap entries: [-priority, sequence, future, lane]; future is None once the
+        # entry is out of the queue (cancelled), so whichever side sets it counts the lane down
+        self._waiters: List[list] = []
+        self._sequence = itertools.count()
+        self._lane_depth: Dict[TaskPriority, int] = {lane: 0 for lane in TaskPriority}
+
+        self._admitted = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "LLMScheduler":
+        """Build a scheduler from the `scheduler` section of settings.yaml."""
+        config = settings.get("scheduler", {}) or {}
+        return cls(
+            max_in_flight=int(config.get("max_in_flight", 32)),
+            max_queue=int(config.get("max_queue", 256))
+        )
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot."""
+        return sum(self._lane_depth.values())
+
+    async def acquire(self, priority: TaskPriority = TaskPriority.MEDIUM) -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Lane to queue in when no slot is free
+
+        Returns:
+            Seconds spent waiting in the queue
+
+        Raises:
+            SchedulerFullError: If the wait queue is already full
+        """
+        priority = TaskPriority(priority)
+
+        if self._in_flight < self.max_in_flight and not self.queue_depth:
+            self._in_flight += 1
+            self._record_admission(0.0)
+            return 0.0
+
+        if self.queue_depth >= self.max_queue:
+            self._rejected += 1
+            raise SchedulerFullError(
+                f"LLM queue is full ({self.queue_depth} waiting, {self._in_flight} in flight)"
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [-int(priority), next(self._sequence), future, priority]
+        heapq.heappush(self._waiters, entry)
+        self._lane_depth[priority] += 1
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before cancellation; give it back
+                self.release()
+            elif entry[2] is not None:
+                # Still queued; release() drops cancelled entries it pops first
+                entry[2] = None
+                self._lane_depth[priority] -= 1
+            raise
+
+        waited = time.monotonic() - started
+        self._record_admission(waited)
+        return waited
+
+    def release(self):
+        """Release a slot, handing it to the highest-priority waiter if any."""
+        while self._waiters:
+            entry = heapq.heappop(self._waiters)
+            future, lane = entry[2], entry[3]
+            if future is None:
+                continue
+            entry[2] = None
+            self._lane_depth[lane] -= 1
+            if future.done():
+                # Its task was cancelled but has not resumed yet to dequeue itself
+                continue
+            # The slot transfers directly to the waiter; in-flight count is unchanged
+            future.set_result(None)
+            return
+
+        self._in_flight = max(0, self._in_flight - 1)
+
+    @asynccontextmanager
+    async def slot(self, priority: TaskPriority = TaskPriority.MEDIUM):
+        """Hold a slot for the duration of the `async with` block."""
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _record_admission(self, waited: float):
+        self._admitted += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+    def stats(self) -> dict:
+        """
+        Snapshot of scheduler state for health and metrics reporting.
+
+        Returns:
+            Dictionary with limits, queue depth per lane and wait-time figures
+        """
+        avg_wait = self._total_wait / self._admitted if self._admitted else 0.0
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth,
+            "queue_depth_by_priority": {
+                lane.name.lower(): depth for lane, depth in self._lane_depth.items()
+            },
+            "admitted": self._admitted,
+            "rejected": self._rejected,
+            "avg_wait_ms": round(avg_wait * 1000, 3),
+            "max_wait_ms": round(self._max_wait * 1000, 3)
+        }
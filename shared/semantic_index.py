@@ -0,0 +1,392 @@
+"""
+Offline semantic index over stored LTM queries.
+Finds near-duplicate questions with a hashing vectorizer and cosine search.
+
+The vectors ignore numbers, word order and most names, so a match also
+requires both queries to have the same signature: the same numbers and the
+same named places, in the same order.
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .emission_factors import EMISSION_FACTORS, REGION_ALIASES
+from .structured_logging import get_logger
+
+logger = get_logger("ltm")
+
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can could do does for from how i in is it me my of on or "
+    "our please should tell the their this to us we what when where which who why will "
+    "with would you your".split()
+)
+
+# Domain synonyms folded onto one token so paraphrases share features
+_SYNONYMS = {
+    "co2": "carbon",
+    "co2e": "carbon",
+    "emission": "carbon",
+    "emissions": "carbon",
+    "footprint": "carbon",
+    "ghg": "carbon",
+    "greenhouse": "carbon",
+    "nyc": "new york",
+    "sf": "san francisco",
+    "uk": "united kingdom",
+    "usa": "united states",
+    "electricity": "power",
+    "electric": "power",
+    "kwh": "power",
+    "plane": "flight",
+    "fly": "flight",
+    "flying": "flight",
+    "airplane": "flight",
+    "car": "drive",
+    "driving": "drive",
+    "vehicle": "drive",
+    "garbage": "waste",
+    "trash": "waste",
+    "rubbish": "waste",
+    "pv": "solar"
+}
+
+
+# Standalone numbers only, so the "2" of "CO2" is not one
+_NUMBER_PATTERN = re.compile(r"\b\d[\d.,]*\b")
+# Hyphens split words, so "NYC-London" is two places
+_WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9']*|[.!?]")
+
+# Region and place names recognized even when not capitalized
+_PLACE_NAMES = (
+    set(REGION_ALIASES) | {item.replace("_", " ") for item in EMISSION_FACTORS["electricity"]}
+    | {"new york", "san francisco", "united kingdom", "united states"}
+)
+_PLACE_SYNONYMS = {word: place for word, place in _SYNONYMS.items() if place in _PLACE_NAMES}
+_PLACES = sorted(_PLACE_NAMES | set(_PLACE_SYNONYMS), key=len, reverse=True)
+_PLACE_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(place) for place in _PLACES) + r")\b")
+
+# Domain vocabulary that is often capitalized ("CO2", "GHG") but names nothing
+_DOMAIN_TERMS = frozenset(word for word in _SYNONYMS if word not in _PLACE_SYNONYMS)
+
+
+def _canonical_place(name: str) -> str:
+    """Fold a lowercased place name onto one spelling ("nyc" -> "new york", "uk" -> "united kingdom")."""
+    name = _PLACE_SYNONYMS.get(name, name)
+    return REGION_ALIASES.get(name, name).replace("_", " ")
+
+
+def query_signature(text: str) -> str:
+    """
+    Numbers and named entities of a query, in order.
+
+    Entities are capitalized words that do not start a sentence (other than
+    domain terms such as "CO2"), and known region and place names in any
+    case, folded onto one spelling ("NYC" and "new york" are the same
+    entity). Numbers are standalone numbers only. Queries whose signatures differ
+    (e.g. "500 MWh" vs "900 MWh", or "New York to London" vs "London to
+    New York") ask different questions however similar their wording.
+
+    Args:
+        text: Raw query text
+
+    Returns:
+        Signature string; equal signatures are required for a semantic match
+    """
+    numbers = [number.replace(",", "") for number in _NUMBER_PATTERN.findall(text)]
+
+    places = [(match.start(), match.end(), match.group()) for match in _PLACE_PATTERN.finditer(text.lower())]
+    entities = []
+    sentence_start = True
+    for match in _WORD_PATTERN.finditer(text):
+        word = match.group()
+        if word in ".!?":
+            sentence_start = True
+            continue
+        place = next((p for p in places if p[0] <= match.start() < p[1]), None)
+        if place is not None:
+            # A multi-word place counts once, at its first word
+            if place[0] == match.start():
+                entities.append(_canonical_place(place[2]))
+        elif not sentence_start and word[0].isupper() and word != "I" and word.lower() not in _DOMAIN_TERMS:
+            entities.append(word.lower())
+        sentence_start = False
+
+    return " ".join(numbers) + "|" + " ".join(entities)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Normalize text into content tokens.
+
+    Lowercases, drops stopwords, folds domain synonyms and strips a plural "s".
+
+    Args:
+        text: Raw text
+
+    Returns:
+        List of normalized tokens
+    """
+    tokens = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        token = _SYNONYMS.get(token, token)
+        for part in token.split():
+            if len(part) > 3 and part.endswith("s") and not part.endswith("ss"):
+                part = part[:-1]
+            tokens.append(part)
+    return tokens
+
+
+class HashingVectorizer:
+    """
+    Stateless text vectorizer using the hashing trick.
+
+    Word unigrams carry most of the weight; character trigrams add tolerance
+    for spelling and inflection. Hashes use CRC32 so vectors are stable across
+    processes and can be persisted.
+    """
+
+    def __init__(self, n_features: int = 1024, char_weight: float = 0.3):
+        """
+        Initialize the vectorizer.
+
+        Args:
+            n_features: Vector dimensionality
+            char_weight: Weight of character trigram features relative to words
+        """
+        self.n_features = n_features
+        self.char_weight = char_weight
+
+    def _add(self, vector: np.ndarray, feature: str, weight: float):
+        digest = zlib.crc32(feature.encode())
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest % self.n_features] += sign * weight
+
+    def transform(self, text: str) -> np.ndarray:
+        """
+        Vectorize text into an L2-normalized float32 vector.
+
+        Args:
+            text: Raw text
+
+        Returns:
+            Vector of shape (n_features,); all zeros if the text has no content tokens
+        """
+        vector = np.zeros(self.n_features, dtype=np.float32)
+
+        for token, count in Counter(tokenize(text)).items():
+            weight = 1.0 + math.log(count)
+            self._add(vector, "w:" + token, weight)
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                self._add(vector, "c:" + padded[i:i + 3], weight * self.char_weight)
+
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+class SemanticIndex:
+    """
+    In-memory matrix of query vectors keyed by LTM key.
+
+    Rows are appended in place (capacity doubles when full) and search is one
+    matrix-vector product. Each row also keeps the query_signature of its
+    query; only rows with the same signature as the searched query can match.
+
+    Persistence is either an .npz file written by save() (one process), or a
+    shared vector store such as SQLiteLTMStorage: additions and removals are
+    written through to it, and sync() loads the rows other processes added.
+    """
+
+    def __init__(
+        self,
+        index_file: Optional[str] = None,
+        n_features: int = 1024,
+        threshold: float = 0.92,
+        store=None
+    ):
+        """
+        Initialize the index, loading it from index_file or store.
+
+        Args:
+            index_file: Path of the .npz file used for persistence
+            n_features: Vector dimensionality
+            threshold: Minimum cosine similarity for a match
+            store: Optional shared vector store with save_vector(key, vector,
+                signature), delete_vectors(keys) and load_vectors(after);
+                used instead of index_file
+        """
+        self.index_file = index_file
+        self.threshold = threshold
+        self.vectorizer = HashingVectorizer(n_features)
+        self.store = store
+        # Highest store sequence number already loaded
+        self._synced_seq = 0
+
+        self._lock = threading.Lock()
+        self._matrix = np.zeros((64, n_features), dtype=np.float32)
+        self._keys: List[str] = []
+        self._signatures: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self.dirty = False
+
+        if store is not None:
+            self.refresh()
+        elif index_file and os.path.exists(index_file):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str, text: str):
+        """
+        Insert or replace the vector for a key.
+
+        Args:
+            key: LTM key of the stored response
+            text: Query text the response answers
+        """
+        vector = self.vectorizer.transform(text)
+        if not vector.any():
+            return
+        signature = query_signature(text)
+        self._put(key, vector, signature)
+        if self.store is not None:
+            self.store.save_vector(key, vector.tobytes(), signature)
+
+    def _put(self, key: str, vector: np.ndarray, signature: str):
+        with self._lock:
+            position = self._positions.get(key)
+            if position is None:
+                position = len(self._keys)
+                if position == self._matrix.shape[0]:
+                    grown = np.zeros((position * 2, self._matrix.shape[1]), dtype=np.float32)
+                    grown[:position] = self._matrix
+                    self._matrix = grown
+                self._keys.append(key)
+                self._signatures.append(signature)
+                self._positions[key] = position
+            self._matrix[position] = vector
+            self._signatures[position] = signature
+            self.dirty = True
+
+    def remove(self, key: str):
+        """
+        Remove a key by moving the last row into its slot.
+
+        Args:
+            key: LTM key to remove
+        """
+        with self._lock:
+            position = self._positions.pop(key, None)
+            if position is None:
+                return
+
+            last = len(self._keys) - 1
+            if position != last:
+                moved = self._keys[last]
+                self._matrix[position] = self._matrix[last]
+                self._keys[position] = moved
+                self._signatures[position] = self._signatures[last]
+                self._positions[moved] = position
+            self._keys.pop()
+            self._signatures.pop()
+            self.dirty = True
+
+        if self.store is not None:
+            self.store.delete_vectors([key])
+
+    def search(self, text: str, threshold: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """
+        Find the stored query most similar to text among those with the
+        same query_signature.
+
+        Args:
+            text: Query text
+            threshold: Minimum cosine similarity (defaults to the index threshold)
+
+        Returns:
+            Tuple of (key, similarity), or None if nothing reaches the threshold
+        """
+        threshold = self.threshold if threshold is None else threshold
+        vector = self.vectorizer.transform(text)
+        if not vector.any():
+            return None
+        signature = query_signature(text)
+
+        with self._lock:
+            size = len(self._keys)
+            if not size:
+                return None
+            scores = self._matrix[:size] @ vector
+            best = None
+            for position in np.flatnonzero(scores >= threshold):
+                if self._signatures[position] == signature and (best is None or scores[position] > scores[best]):
+                    best = position
+            if best is None:
+                return None
+            return self._keys[best], float(scores[best])
+
+    def refresh(self):
+        """Load the rows added to the store (by any process) since the last refresh."""
+        rows, self._synced_seq = self.store.load_vectors(self._synced_seq)
+        for key, blob, signature in rows:
+            vector = np.frombuffer(blob, dtype=np.float32)
+            if vector.shape[0] == self.vectorizer.n_features:
+                self._put(key, vector, signature)
+        self.dirty = False
+
+    def sync(self):
+        """Refresh from the store, or save to index_file if anything changed."""
+        if self.store is not None:
+            self.refresh()
+        elif self.dirty:
+            self.save()
+
+    def save(self):
+        """Persist the index atomically to index_file."""
+        if not self.index_file:
+            return
+
+        with self._lock:
+            matrix = self._matrix[:len(self._keys)].copy()
+            keys = np.array(self._keys, dtype=str)
+            signatures = np.array(self._signatures, dtype=str)
+            self.dirty = False
+
+        tmp_file = self.index_file + ".tmp.npz"
+        np.savez(tmp_file, matrix=matrix, keys=keys, signatures=signatures)
+        os.replace(tmp_file, self.index_file)
+
+    def load(self):
+        """Load the index from index_file, ignoring it if dimensions changed or it has no signatures."""
+        with np.load(self.index_file) as data:
+            matrix = data["matrix"]
+            keys = [str(key) for key in data["keys"]]
+            signatures = [str(signature) for signature in data["signatures"]] if "signatures" in data else None
+
+        if matrix.ndim != 2 or matrix.shape[1] != self.vectorizer.n_features or signatures is None:
+            logger.warning("Semantic index format changed; starting a new index")
+            return
+
+        with self._lock:
+            capacity = max(64, len(keys) * 2)
+            self._matrix = np.zeros((capacity, matrix.shape[1]), dtype=np.float32)
+            self._matrix[:len(keys)] = matrix
+            self._keys = keys
+            self._signatures = signatures
+            self._positions = {key: i for i, key in enumerate(keys)}
+            self.dirty = False
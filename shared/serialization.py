@@ -0,0 +1,120 @@
+"""
+JSON encoding for API responses and LTM persistence.
+
+Uses orjson when it is installed and the standard library otherwise; both
+produce compact UTF-8 JSON, so files and responses written by one backend
+are read by the other. The backend can be forced with the
+`serialization.backend` setting ("auto", "orjson" or "json") or the
+JSON_BACKEND environment variable.
+"""
+
+import json
+import os
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # Optional: falls back to the json module
+    orjson = None
+
+
+class JsonSerializer:
+    """Standard-library backend (compact separators, UTF-8 output)."""
+
+    name = "json"
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson backend; encodes straight to bytes."""
+
+    name = "orjson"
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        return orjson.dumps(obj)
+
+    def dumps(self, obj: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+def create_serializer(backend: str = "auto"):
+    """
+    Create a serializer.
+
+    Args:
+        backend: "auto" (orjson if installed), "orjson" or "json"
+
+    Returns:
+        Serializer instance
+    """
+    backend = str(backend).lower()
+    if backend == "json":
+        return JsonSerializer()
+    if backend in ("auto", "orjson"):
+        if orjson is not None:
+            return OrjsonSerializer()
+        if backend == "orjson":
+            raise ImportError("serialization.backend is 'orjson' but orjson is not installed")
+        return JsonSerializer()
+    raise ValueError(f"Unknown serialization backend: {backend}")
+
+
+def _configured_backend() -> str:
+    backend = os.getenv("JSON_BACKEND")
+    if backend:
+        return backend
+    from .utils import load_settings
+    return (load_settings().get("serialization", {}) or {}).get("backend", "auto")
+
+
+_serializer = None
+
+
+def get_serializer():
+    """The process-wide serializer, created from settings on first use."""
+    global _serializer
+    if _serializer is None:
+        _serializer = create_serializer(_configured_backend())
+    return _serializer
+
+
+def set_serializer(serializer):
+    """Replace the process-wide serializer (benchmarks and tests)."""
+    global _serializer
+    _serializer = serializer
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Compact UTF-8 JSON bytes."""
+    return get_serializer().dumps_bytes(obj)
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON text."""
+    return get_serializer().dumps(obj)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON text or UTF-8 bytes."""
+    return get_serializer().loads(data)
+
+
+def model_json(model) -> bytes:
+    """
+    JSON bytes for a pydantic v2 model.
+
+    pydantic-core writes the model straight to bytes, without building the
+    intermediate dict that model_dump() plus a JSON encoder would.
+    """
+    return model.__pydantic_serializer__.to_json(model)
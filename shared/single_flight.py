@@ -0,0 +1,116 @@
+"""
+Single-flight request coalescing.
+Concurrent callers with the same key share one execution and its result.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent async calls by key.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it runs await the same task instead of starting their own. A
+    successful result is kept for `linger` seconds so followers that arrive
+    just after completion get it too. The shared task is cancelled only when
+    every caller waiting on it has been cancelled.
+
+    Bound to a single event loop; not thread-safe.
+    """
+
+    def __init__(self, linger: float = 1.0):
+        """
+        Initialize the coalescer.
+
+        Args:
+            linger: Seconds a completed result stays available to late followers
+        """
+        self.linger = linger
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+        # key -> (expires_at, result) for recently completed calls
+        self._recent: Dict[str, Tuple[float, Any]] = {}
+
+        self._executions = 0
+        self._coalesced = 0
+        self._late_joins = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]], reuse_recent: bool = True) -> Any:
+        """
+        Run func once per key among concurrent callers.
+
+        Args:
+            key: Deduplication key
+            func: Zero-argument coroutine function performing the work
+            reuse_recent: Accept a result that completed within `linger`
+                seconds; otherwise only join a call still in progress
+
+        Returns:
+            The shared result (exceptions are re-raised to every caller)
+        """
+        now = time.monotonic()
+        recent = self._recent.get(key) if reuse_recent else None
+        if recent is not None:
+            if recent[0] > now:
+                self._late_joins += 1
+                return recent[1]
+            del self._recent[key]
+
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            self._waiters[key] = 0
+            self._executions += 1
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        else:
+            self._coalesced += 1
+
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._tasks.get(key) is task and self._waiters[key] == 1:
+                # Last interested caller gave up; stop the upstream work
+                task.cancel()
+            raise
+        finally:
+            # Counts belong to the task still registered under this key
+            if self._tasks.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _finish(self, key: str, task: asyncio.Task):
+        """Drop the finished task and keep its result for late followers."""
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+            self._waiters.pop(key, None)
+
+        if self.linger > 0 and not task.cancelled() and task.exception() is None:
+            self._recent[key] = (time.monotonic() + self.linger, task.result())
+
+        if len(self._recent) > 1024:
+            now = time.monotonic()
+            self._recent = {k: v for k, v in self._recent.items() if v[0] > now}
+
+    def stats(self) -> dict:
+        """
+        Coalescing counters and current waiters per in-flight key.
+
+        Returns:
+            Dictionary with totals, a key -> waiter count mapping, and the
+            total and largest current waiter counts
+        """
+        waiters = dict(self._waiters)
+        return {
+            "in_flight": len(self._tasks),
+            "waiters": waiters,
+            "total_waiters": sum(waiters.values()),
+            "max_waiters": max(waiters.values(), default=0),
+            "executions": self._executions,
+            "coalesced": self._coalesced,
+            "late_joins": self._late_joins
+        }
@@ -0,0 +1,301 @@
+"""
+Structured, non-blocking logging for the agent.
+
+Records are stamped with the current request ID, sampled per level and put on
+a bounded queue by the calling thread; a background listener formats them as
+JSON lines and writes them out. A full queue drops records (counted) instead
+of blocking the request path.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+
+ROOT_LOGGER = "MultiAgentSystem"
+
+# Request ID of the request being handled; asyncio tasks and executor calls inherit it
+REQUEST_ID: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra=`
+_RECORD_FIELDS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "request_id"}
+
+
+def get_logger(component: str) -> logging.Logger:
+    """
+    Logger for one component (e.g. "ltm", "api"), below the agent's root logger.
+
+    Args:
+        component: Short component name
+
+    Returns:
+        Logger whose records go through the pipeline configured by setup_logging
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def new_request_id(header_value: Optional[str] = None) -> str:
+    """
+    Request ID for a new request.
+
+    Args:
+        header_value: Caller-supplied ID (X-Request-ID), reused when sensible
+
+    Returns:
+        The caller's ID, or a fresh random one
+    """
+    if header_value:
+        value = header_value.strip()
+        if 0 < len(value) <= 128 and value.isprintable():
+            return value
+    return uuid.uuid4().hex
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request_id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id is not None:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        elif record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Copy the current request ID onto the record.
+
+    Attached to the queue handler, so it runs in the thread that logged the
+    record, where the REQUEST_ID context variable is still set.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "request_id", None) is None:
+            record.request_id = REQUEST_ID.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of records per level.
+
+    Levels without a configured rate (WARNING and above by default) are
+    always kept.
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates = {}
+        for level, rate in (rates or {}).items():
+            self.rates[logging.getLevelName(str(level).upper())] = max(0.0, min(1.0, float(rate)))
+        self.sampled_out = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno)
+        if rate is None or rate >= 1.0 or random.random() < rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that never waits on a full queue and defers formatting.
+
+    Only the message arguments are merged (and tracebacks rendered) in the
+    calling thread; JSON encoding and the write happen in the listener.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogPipeline:
+    """The queue, its handler and the background listener writing the output handlers."""
+
+    def __init__(
+        self,
+        output_handlers: list,
+        queue_size: int = 10000,
+        sample_rates: Optional[Dict[str, float]] = None
+    ):
+        """
+        Initialize the pipeline (call start() to begin writing).
+
+        Args:
+            output_handlers: Handlers the listener thread writes to
+            queue_size: Records buffered before new ones are dropped
+            sample_rates: Fraction of records kept per level name
+        """
+        self.output_handlers = output_handlers
+        self.queue_size = max(1, queue_size)
+        self.sampler = SamplingFilter(sample_rates)
+        self.handler = NonBlockingQueueHandler(queue.Queue(self.queue_size))
+        self.handler.addFilter(self.sampler)
+        self.handler.addFilter(RequestIdFilter())
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the listener thread."""
+        with self._lock:
+            if self._listener is None:
+                self._listener = logging.handlers.QueueListener(
+                    self.handler.queue, *self.output_handlers, respect_handler_level=True
+                )
+                self._listener.start()
+
+    def stop(self):
+        """Write out queued records and stop the listener thread."""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+        for handler in self.output_handlers:
+            handler.flush()
+
+    def restart_after_fork(self):
+        """
+        Give a forked child its own queue and listener.
+
+        The parent's listener thread does not exist in the child, and its
+        queue lock may have been held at fork time; records still queued in
+        the parent are written by the parent.
+        """
+        self.handler.queue = queue.Queue(self.queue_size)
+        self._lock = threading.Lock()
+        self._listener = None
+        self.start()
+
+    def stats(self) -> dict:
+        """Queue depth and counts of dropped and sampled-out records."""
+        return {
+            "queued": self.handler.queue.qsize(),
+            "queue_size": self.queue_size,
+            "dropped": self.handler.dropped,
+            "sampled_out": self.sampler.sampled_out
+        }
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def configure_pipeline(
+    level: str = "INFO",
+    json_format: bool = True,
+    text_format: Optional[str] = None,
+    log_file: Optional[str] = None,
+    queue_size: int = 10000,
+    sample_rates: Optional[Dict[str, float]] = None
+) -> logging.Logger:
+    """
+    Install the logging pipeline on the agent's root logger.
+
+    Calling it again replaces the previous pipeline (after writing out its
+    queued records), so handlers are never stacked.
+
+    Args:
+        level: Minimum level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
+        json_format: Write JSON lines; otherwise use text_format
+        text_format: logging format string for plain-text output
+        log_file: Optional file written in addition to stdout
+        queue_size: Records buffered before new ones are dropped
+        sample_rates: Fraction of records kept per level name, e.g. {"debug": 0.1}
+
+    Returns:
+        The agent's root logger
+    """
+    global _pipeline
+
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(text_format or "[%(asctime)s] %(levelname)s - %(name)s - %(message)s")
+
+    output_handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or ".", exist_ok=True)
+        output_handlers.append(logging.FileHandler(log_file))
+    for handler in output_handlers:
+        handler.setFormatter(formatter)
+
+    pipeline = LogPipeline(output_handlers, queue_size=queue_size, sample_rates=sample_rates)
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    # The pipeline writes everything itself; do not also pass records to the root logger
+    logger.propagate = False
+
+    if _pipeline is not None:
+        logger.removeHandler(_pipeline.handler)
+        _pipeline.stop()
+
+    pipeline.start()
+    logger.addHandler(pipeline.handler)
+    _pipeline = pipeline
+    return logger
+
+
+def pipeline_stats() -> dict:
+    """Stats of the installed pipeline (empty before setup_logging)."""
+    if _pipeline is None:
+        return {}
+    return _pipeline.stats()
+
+
+def shutdown_logging():
+    """Write out queued records; called at interpreter exit."""
+    if _pipeline is not None:
+        _pipeline.stop()
+
+
+def _after_fork_in_child():
+    if _pipeline is not None:
+        _pipeline.restart_after_fork()
+
+
+atexit.register(shutdown_logging)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
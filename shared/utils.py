@@ -6,42 +6,74 @@ Provides logging, time utilities, and helper functions.
 import logging
 import os
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
-import yaml
 import json
 
+from .structured_logging import configure_pipeline, get_logger
 
-def setup_logging(log_level: str = "INFO", log_file: Optional[str] = None) -> logging.Logger:
+
+# Project root (parent of the shared/ package)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+logger = get_logger("config")
+
+
+def setup_logging(
+    log_level: str = "INFO",
+    log_file: Optional[str] = None,
+    json_format: bool = True,
+    log_format: Optional[str] = None,
+    queue_size: int = 10000,
+    sample_rates: Optional[dict] = None
+) -> logging.Logger:
     """
     Set up logging configuration.
     
+    Records are queued by the caller and written by a background thread (see
+    shared.structured_logging). Calling this again replaces the previous
+    configuration instead of adding handlers.
+    
     Args:
         log_level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_file: Optional log file path
+        json_format: Write JSON lines instead of log_format text
+        log_format: logging format string used when json_format is False
+        queue_size: Records buffered before new ones are dropped
+        sample_rates: Fraction of records kept per level, e.g. {"debug": 0.1}
         
     Returns:
         Configured logger instance
     """
-    logger = logging.getLogger("MultiAgentSystem")
-    logger.setLevel(getattr(logging, log_level.upper()))
-    
-    formatter = logging.Formatter(
-        "[%(asctime)s] %(levelname)s - %(name)s - %(message)s"
+    return configure_pipeline(
+        level=log_level,
+        json_format=json_format,
+        text_format=log_format,
+        log_file=log_file,
+        queue_size=queue_size,
+        sample_rates=sample_rates
     )
+
+
+def setup_logging_from_settings(settings: dict) -> logging.Logger:
+    """
+    Set up logging from the `logging` section of settings.yaml.
     
-    # Console handler
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # File handler (if specified)
-    if log_file:
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
+    Args:
+        settings: Settings dictionary
+        
+    Returns:
+        Configured logger instance
+    """
+    config = settings.get("logging", {}) or {}
+    return setup_logging(
+        log_level=os.getenv("LOG_LEVEL", config.get("level", "INFO")),
+        log_file=config.get("file"),
+        json_format=bool(config.get("json", True)),
+        log_format=config.get("format"),
+        queue_size=int(config.get("queue_size", 10000)),
+        sample_rates=config.get("sampling")
+    )
 
 
 def load_yaml_config(config_path: str) -> dict:
@@ -55,10 +87,12 @@ def load_yaml_config(config_path: str) -> dict:
         Configuration dictionary
     """
     try:
+        # Imported here so that modules using only the logging helpers do not load PyYAML
+        import yaml
         with open(config_path, 'r') as f:
             return yaml.safe_load(f)
     except Exception as e:
-        print(f"Error loading YAML config: {e}")
+        logger.error("Error loading YAML config %s: %s", config_path, e)
         return {}
 
 
@@ -76,10 +110,25 @@ def load_json_config(config_path: str) -> dict:
         with open(config_path, 'r') as f:
             return json.load(f)
     except Exception as e:
-        print(f"Error loading JSON config: {e}")
+        logger.error("Error loading JSON config %s: %s", config_path, e)
         return {}
 
 
+@lru_cache(maxsize=None)
+def load_settings(config_dir: Optional[str] = None) -> dict:
+    """
+    Load settings.yaml once per process.
+    
+    Args:
+        config_dir: Directory containing settings.yaml (defaults to <project>/config)
+        
+    Returns:
+        Settings dictionary (empty if the file is missing or invalid)
+    """
+    config_dir = config_dir or os.path.join(PROJECT_ROOT, "config")
+    return load_yaml_config(os.path.join(config_dir, "settings.yaml")) or {}
+
+
 def get_timestamp() -> str:
     """
     Get current timestamp in ISO format.
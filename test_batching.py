@@ -0,0 +1,153 @@
+"""
+Tests for MessageBatcher and bulk task execution.
+Run with: python -m pytest -q test_batching.py
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, List, Optional
+
+from agents.worker_base import AbstractWorkerAgent
+from communication.batching import MessageBatcher
+from communication.protocol import MessageType
+
+
+class Recorder:
+    """Send callback recording each batch and when it arrived."""
+
+    def __init__(self, failures: int = 0):
+        self.batches: List[list] = []
+        self.times: List[float] = []
+        self.failures = failures
+
+    async def __call__(self, batch: list):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("supervisor unavailable")
+        self.batches.append(list(batch))
+        self.times.append(time.monotonic())
+
+
+def test_partial_batch_is_flushed_after_the_interval():
+    async def scenario():
+        send = Recorder()
+        batcher = MessageBatcher(send, batch_size=10, flush_interval=0.05)
+        batcher.start()
+        started = time.monotonic()
+        for item in range(3):
+            batcher.add(item)
+
+        await asyncio.sleep(0.02)
+        assert send.batches == []
+
+        for _ in range(50):
+            if send.batches:
+                break
+            await asyncio.sleep(0.01)
+        assert send.batches == [[0, 1, 2]]
+        assert send.times[0] - started >= 0.05
+        assert len(batcher) == 0
+        await batcher.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_is_sent_without_waiting():
+    async def scenario():
+        send = Recorder()
+        batcher = MessageBatcher(send, batch_size=3, flush_interval=10)
+        batcher.start()
+        for item in range(4):
+            batcher.add(item)
+        await asyncio.sleep(0.01)
+        assert send.batches == [[0, 1, 2]]
+
+        # The remainder goes out on close, not after the 10s interval
+        assert await batcher.aclose()
+        assert send.batches == [[0, 1, 2], [3]]
+        assert batcher.stats() == {"queued": 0, "sent": 4, "batches": 2, "send_errors": 0}
+
+    asyncio.run(scenario())
+
+
+def test_failed_batch_is_retried_ahead_of_newer_items():
+    async def scenario():
+        send = Recorder(failures=1)
+        batcher = MessageBatcher(send, batch_size=2, flush_interval=10)
+        batcher.add("a")
+        batcher.add("b")
+        assert not await batcher.flush()
+        assert len(batcher) == 2
+
+        batcher.add("c")
+        assert await batcher.flush()
+        assert send.batches == [["a", "b"], ["c"]]
+        assert batcher.stats()["send_errors"] == 1
+
+    asyncio.run(scenario())
+
+
+class FlakyAgent(AbstractWorkerAgent):
+    """Worker that fails tasks asking it to and records the batches it sends."""
+
+    def __init__(self):
+        super().__init__("flaky-agent", "supervisor")
+        self.sent: List[List[dict]] = []
+
+    def process_task(self, task_data: dict) -> dict:
+        if task_data.get("fail"):
+            raise RuntimeError(f"task {task_data['n']} failed")
+        return {"n": task_data["n"]}
+
+    async def process_task_async(self, task_data: dict) -> dict:
+        await asyncio.sleep(0.001)
+        return self.process_task(task_data)
+
+    def send_message(self, recipient: str, message_obj: dict):
+        raise AssertionError("reports should be sent in batches")
+
+    def send_messages(self, recipient: str, messages: List[dict]):
+        self.sent.append(list(messages))
+
+    def write_to_ltm(self, key: str, value: Any) -> bool:
+        return False
+
+    def read_from_ltm(self, key: str) -> Optional[Any]:
+        return None
+
+
+def assignment(n: int, fail: bool = False) -> dict:
+    return {
+        "message_id": f"task-{n}",
+        "type": MessageType.TASK_ASSIGNMENT.value,
+        "task": {"name": "work", "parameters": {"n": n, "fail": fail}}
+    }
+
+
+def test_bulk_execution_isolates_failures():
+    agent = FlakyAgent()
+    assignments = [assignment(n, fail=n % 4 == 0) for n in range(10)]
+    assignments.append("{not json")
+    assignments.append(json.dumps({"type": MessageType.STATUS_UPDATE.value}))
+    assignments.append(json.dumps(assignment(10)))
+
+    counts = asyncio.run(agent.execute_tasks_bulk(assignments, concurrency=3, batch_size=4, flush_interval=10))
+
+    assert counts == {
+        "succeeded": 8,
+        "failed": 3,
+        "skipped": 2,
+        "reports_sent": 11,
+        "batches": 3,
+        "reports_unsent": 0
+    }
+    assert [len(batch) for batch in agent.sent] == [4, 4, 3]
+
+    reports = {report["related_message_id"]: report for batch in agent.sent for report in batch}
+    assert set(reports) == {f"task-{n}" for n in range(11)}
+    for n in (0, 4, 8):
+        assert reports[f"task-{n}"]["status"] == "FAILURE"
+        assert reports[f"task-{n}"]["results"]["error"] == f"task {n} failed"
+    assert reports["task-5"]["status"] == "SUCCESS"
+    assert reports["task-5"]["results"] == {"n": 5}
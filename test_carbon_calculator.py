@@ -0,0 +1,47 @@
+"""
+Tests for the local carbon calculator's chat path.
+Run with: python -m pytest -q test_carbon_calculator.py
+"""
+
+import pytest
+
+from shared.carbon_calculator import CarbonCalculator
+
+
+@pytest.fixture(scope="module")
+def calculator():
+    return CarbonCalculator()
+
+
+@pytest.mark.parametrize("query, total", [
+    ("CO2 for 500 km by car", 85.0),
+    ("10,000 kWh in Germany", 3800.0),
+    ("100 km by diesel car and 1 MWh in France", 17.1 + 56.0),
+])
+def test_answers_plain_quantities(calculator, query, total):
+    text, calculation = calculator.answer(query)
+    assert calculation["total_kg_co2e"] == pytest.approx(total)
+    assert text.startswith("Estimated emissions:")
+
+
+@pytest.mark.parametrize("query", [
+    # Rates and periods
+    "I drive 20 miles a day, what's my annual CO2?",
+    "10 kWh per day for a year in France",
+    "50 km daily by car",
+    "200 kWh/month in Germany",
+    # Comparisons and savings
+    "How much CO2 would I save by switching 500 km by car to train?",
+    "Compare 100 kg of beef vs 100 kg of chicken",
+    "500 km by train instead of 500 km by car",
+    # Multipliers
+    "100 km flight for 4 passengers",
+    "300 km by car with 3 people",
+])
+def test_leaves_unmodeled_wording_to_the_llm(calculator, query):
+    assert calculator.parse(query)
+    assert calculator.answer(query) is None
+
+
+def test_leaves_advice_to_the_llm(calculator):
+    assert calculator.answer("How can I reduce the CO2 of 500 km by car?") is None
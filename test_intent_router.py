@@ -0,0 +1,47 @@
+"""
+Tests for the keyword intent router.
+Run with: python -m pytest -q test_intent_router.py
+"""
+
+import pytest
+
+from shared.intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("What is a carbon footprint?", "carbon_footprint_analysis"),
+    ("Tips for recycling plastic", "waste_management_assessment"),
+    ("Should I get solar panels or a wind turbine?", "renewable_energy_recommendations"),
+    ("How do I clean my window?", None),
+])
+def test_routes_to_dominant_intent(router, query, intent):
+    assert router.route(query).intent == intent
+
+
+@pytest.mark.parametrize("query", [
+    "What is a carbon footprint?",
+    "What is LEED certification?",
+    "Tips for recycling plastic",
+    "How can I lower my energy consumption?",
+])
+def test_short_generic_queries_are_overviews(router, query):
+    assert router.is_overview(query)
+
+
+@pytest.mark.parametrize("query", [
+    # Confidently on topic, but the canned text does not answer them
+    "carbon footprint of a NYC-London flight",
+    "What are scope 1, 2 and 3 emissions?",
+    "How can our company with 500 employees cut its carbon footprint by 2030?",
+    "What is LEED certification for a 10 storey building?",
+    "Should I install solar panels in Arizona?",
+    "Explain in detail how a company should structure its annual carbon footprint disclosure",
+])
+def test_specific_queries_are_not_overviews(router, query):
+    assert router.route(query).confidence >= 0.5
+    assert not router.is_overview(query)
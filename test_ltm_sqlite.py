@@ -0,0 +1,105 @@
+"""
+Tests for the SQLite LTM engine: sharing between instances and processes,
+fork handling and per-thread connections.
+Run with: python -m pytest -q test_ltm_sqlite.py
+"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from shared.ltm_sqlite import SQLiteLTMStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteLTMStorage(str(tmp_path), flush_interval=60)
+    yield storage
+    storage.close()
+
+
+def test_round_trip_and_delete(storage):
+    assert storage.write("a", {"answer": [1, 2]})
+    assert storage.read("a") == {"answer": [1, 2]}
+    assert len(storage) == 1
+    assert storage.delete("a")
+    assert not storage.delete("a")
+    assert storage.read("a") is None
+
+
+def test_instances_share_entries_and_flushed_access_counts(storage, tmp_path):
+    other = SQLiteLTMStorage(str(tmp_path), flush_interval=60)
+    try:
+        storage.write("a", {"answer": 1})
+        assert other.read("a") == {"answer": 1}
+        assert other.read_entry("a")["access_count"] == 2
+
+        # Batched counts only become visible to others once flushed
+        assert storage.read_entry("a")["access_count"] == 1
+        other.flush()
+        assert storage.read_entry("a")["access_count"] == 4
+    finally:
+        other.close()
+
+
+def test_imports_json_memory_into_empty_database(tmp_path):
+    memory = {"k": {"value": {"answer": 1}, "timestamp": "2025-01-01T00:00:00Z", "access_count": 5}}
+    (tmp_path / "memory.json").write_text(json.dumps(memory))
+
+    storage = SQLiteLTMStorage(str(tmp_path), flush_interval=60)
+    try:
+        entry = storage.read_entry("k")
+        assert entry["value"] == {"answer": 1}
+        assert entry["access_count"] == 6
+    finally:
+        storage.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_opens_its_own_connection(storage):
+    storage.write("parent", 1)
+    parent_connection = storage._connection()
+
+    pid = os.fork()
+    if pid == 0:
+        # Child: must not reuse the inherited connection, and close() must leave it alone
+        status = 1
+        try:
+            if storage._connection() is not parent_connection and storage.read("parent") == 1:
+                storage.write("child", 2)
+                storage.close()
+                status = 0
+        finally:
+            os._exit(status)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert storage._connection() is parent_connection
+    assert storage.read("child") == 2
+
+
+def test_connections_of_exited_threads_are_closed(storage):
+    def use():
+        storage.read("missing")
+
+    for _ in range(5):
+        thread = threading.Thread(target=use)
+        thread.start()
+        thread.join()
+
+    # Each open prunes the previous threads; only the last one's is left until the next open
+    threads = [thread for thread, _ in storage._connections]
+    assert threads[0] is threading.current_thread()
+    assert len(threads) == 2
+
+
+def test_close_closes_every_connection(storage):
+    thread = threading.Thread(target=storage.read, args=("missing",))
+    thread.start()
+    thread.join()
+    storage.read("missing")
+
+    storage.close()
+    assert storage._connections == []
@@ -0,0 +1,119 @@
+"""
+Tests for the JSON LTM engine: mutation-log replay and compaction.
+Run with: python -m pytest -q test_ltm_storage.py
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from shared.ltm_storage import LTMStorage
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def crash_after(storage_path: str, code: str):
+    """Run `code` against an LTMStorage in a child process that exits without close()."""
+    script = textwrap.dedent(f"""
+        import os, sys
+        sys.path.insert(0, {PROJECT_ROOT!r})
+        from shared.ltm_storage import LTMStorage
+        storage = LTMStorage({storage_path!r}, compact_threshold=10000, flush_interval=60)
+    """) + textwrap.dedent(code) + "\nos._exit(0)\n"
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=60)
+
+
+def test_replays_log_after_crash_without_close(tmp_path):
+    crash_after(str(tmp_path), """
+        storage.write("a", {"answer": 1})
+        storage.write("b", {"answer": 2})
+        storage.write("c", {"answer": 3})
+        storage.delete("b")
+        storage.read_entry("a")
+        storage.flush()
+    """)
+
+    # Nothing was compacted: the snapshot is empty and the log holds every change
+    assert os.path.getsize(tmp_path / "memory.log") > 0
+
+    storage = LTMStorage(str(tmp_path))
+    try:
+        assert len(storage) == 2
+        assert storage.read("a") == {"answer": 1}
+        assert storage.read("b") is None
+        assert storage.read("c") == {"answer": 3}
+        # One access before the crash, one just now
+        assert storage.read_entry("a")["access_count"] == 3
+    finally:
+        storage.close()
+
+
+def test_replay_skips_partial_last_line(tmp_path):
+    crash_after(str(tmp_path), """
+        storage.write("a", {"answer": 1})
+    """)
+    with open(tmp_path / "memory.log", "ab") as f:
+        f.write(b'{"op": "set", "key": "b", "ent')
+
+    storage = LTMStorage(str(tmp_path))
+    try:
+        assert storage.read("a") == {"answer": 1}
+        assert storage.read("b") is None
+    finally:
+        storage.close()
+
+
+def test_replays_rotated_log_from_interrupted_compaction(tmp_path):
+    crash_after(str(tmp_path), """
+        storage.write("a", {"answer": 1})
+    """)
+    os.replace(tmp_path / "memory.log", tmp_path / "memory.log.1")
+    crash_after(str(tmp_path), """
+        storage.write("b", {"answer": 2})
+    """)
+
+    storage = LTMStorage(str(tmp_path))
+    try:
+        assert storage.read("a") == {"answer": 1}
+        assert storage.read("b") == {"answer": 2}
+    finally:
+        storage.close()
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    storage = LTMStorage(str(tmp_path), compact_threshold=10000, flush_interval=60)
+    storage.write("a", {"answer": 1})
+    storage.write("b", {"answer": 2})
+    storage.delete("a")
+    storage.read_entry("b")
+    storage.compact()
+
+    assert not os.path.exists(tmp_path / "memory.log.1")
+    assert not os.path.exists(tmp_path / "memory.log") or os.path.getsize(tmp_path / "memory.log") == 0
+
+    storage.write("c", {"answer": 3})
+    storage.close()
+
+    reopened = LTMStorage(str(tmp_path))
+    try:
+        assert len(reopened) == 2
+        assert reopened.read("a") is None
+        assert reopened.read_entry("b")["access_count"] == 2
+        assert reopened.read("c") == {"answer": 3}
+    finally:
+        reopened.close()
+
+
+def test_close_persists_batched_access_counts(tmp_path):
+    storage = LTMStorage(str(tmp_path), flush_interval=60)
+    storage.write("a", {"answer": 1})
+    for _ in range(3):
+        storage.read_entry("a")
+    storage.close()
+
+    reopened = LTMStorage(str(tmp_path))
+    try:
+        assert reopened.read_entry("a")["access_count"] == 4
+    finally:
+        reopened.close()
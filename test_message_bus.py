@@ -0,0 +1,177 @@
+"""
+Tests for the worker message bus: spool-file claims and at-least-once
+redelivery of unacknowledged task_assignments.
+Run with: python -m pytest -q test_message_bus.py
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from typing import Any, List, Optional
+
+from agents.worker_base import AbstractWorkerAgent
+from communication.bus import FileSpoolTransport, MessageBus
+from communication.protocol import MessageType
+
+
+class EchoAgent(AbstractWorkerAgent):
+    """Worker that answers every task with its parameters."""
+
+    def __init__(self):
+        super().__init__("echo-agent", "supervisor")
+
+    def process_task(self, task_data: dict) -> dict:
+        return {"echo": task_data}
+
+    async def process_task_async(self, task_data: dict) -> dict:
+        return self.process_task(task_data)
+
+    def send_message(self, recipient: str, message_obj: dict):
+        pass
+
+    def write_to_ltm(self, key: str, value: Any) -> bool:
+        return False
+
+    def read_from_ltm(self, key: str) -> Optional[Any]:
+        return None
+
+
+class FailingPublishTransport(FileSpoolTransport):
+    """Spool transport whose outbox is unavailable."""
+
+    async def publish(self, messages: List[dict]):
+        raise OSError("outbox unavailable")
+
+
+def assignment(message_id: str) -> dict:
+    return {
+        "message_id": message_id,
+        "sender": "supervisor",
+        "recipient": "echo-agent",
+        "type": MessageType.TASK_ASSIGNMENT.value,
+        "task": {"name": "echo", "parameters": {"n": message_id}}
+    }
+
+
+def spool(transport: FileSpoolTransport, message_id: str):
+    """Write a task_assignment into the inbox the way the supervisor does."""
+    os.makedirs(transport.inbox_dir, exist_ok=True)
+    temp_path = os.path.join(transport.inbox_dir, f".{message_id}.tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(assignment(message_id), f)
+    os.replace(temp_path, os.path.join(transport.inbox_dir, f"{message_id}.json"))
+
+
+def dead_pid() -> int:
+    """PID of a process that has exited."""
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def published(transport: FileSpoolTransport) -> List[dict]:
+    messages = []
+    for name in sorted(os.listdir(transport.outbox_dir)):
+        with open(os.path.join(transport.outbox_dir, name), encoding="utf-8") as f:
+            messages.extend(json.loads(line) for line in f)
+    return messages
+
+
+def test_unacked_claim_of_dead_worker_is_redelivered(tmp_path):
+    async def scenario():
+        crashed = FileSpoolTransport(str(tmp_path), poll_interval=0.01)
+        await crashed.start()
+        spool(crashed, "task-1")
+        delivery_id, raw = await crashed.receive(1.0)
+        assert json.loads(raw)["message_id"] == "task-1"
+
+        # The worker dies before acking: its claim is left under its PID
+        os.rename(delivery_id, os.path.join(crashed.processing_dir, f"{dead_pid()}-task-1.json"))
+
+        restarted = FileSpoolTransport(str(tmp_path), poll_interval=0.01)
+        await restarted.start()
+        delivery = await restarted.receive(1.0)
+        assert delivery is not None
+        assert json.loads(delivery[1])["message_id"] == "task-1"
+
+        await restarted.ack(delivery[0])
+        assert await restarted.receive(0.05) is None
+        assert os.listdir(restarted.processing_dir) == []
+
+    asyncio.run(scenario())
+
+
+def test_claims_under_own_pid_are_returned_and_live_claims_kept(tmp_path):
+    async def scenario():
+        transport = FileSpoolTransport(str(tmp_path), poll_interval=0.01)
+        os.makedirs(transport.processing_dir)
+        # Left by an earlier process that had our PID (e.g. PID 1 in a container)
+        with open(os.path.join(transport.processing_dir, f"{os.getpid()}-old.json"), "w") as f:
+            json.dump(assignment("old"), f)
+        # Claimed by a worker that is still running
+        live = f"{os.getppid()}-busy.json"
+        with open(os.path.join(transport.processing_dir, live), "w") as f:
+            json.dump(assignment("busy"), f)
+
+        await transport.start()
+        assert os.listdir(transport.processing_dir) == [live]
+        delivery = await transport.receive(1.0)
+        assert json.loads(delivery[1])["message_id"] == "old"
+
+    asyncio.run(scenario())
+
+
+def test_bus_acks_only_after_the_report_is_published(tmp_path):
+    async def scenario():
+        transport = FileSpoolTransport(str(tmp_path), poll_interval=0.01)
+        bus = MessageBus(EchoAgent(), transport, batch_size=10, flush_interval=0.05)
+        spool(transport, "task-1")
+        spool(transport, "task-2")
+
+        await bus.start()
+        for _ in range(100):
+            if bus.stats()["published_messages"] >= 4:
+                break
+            await asyncio.sleep(0.02)
+        await bus.stop()
+
+        reports = [m for m in published(transport) if m["type"] == MessageType.COMPLETION_REPORT.value]
+        assert sorted(r["related_message_id"] for r in reports) == ["task-1", "task-2"]
+        assert all(r["status"] == "SUCCESS" for r in reports)
+        assert os.listdir(transport.processing_dir) == []
+        assert os.listdir(transport.inbox_dir) == []
+
+    asyncio.run(scenario())
+
+
+def test_bus_leaves_assignment_for_redelivery_when_publish_fails(tmp_path):
+    async def scenario():
+        transport = FailingPublishTransport(str(tmp_path), poll_interval=0.01)
+        bus = MessageBus(EchoAgent(), transport, batch_size=10, flush_interval=0.05)
+        spool(transport, "task-1")
+
+        await bus.start()
+        for _ in range(100):
+            if bus.stats()["completed"] and bus.stats()["publish_errors"]:
+                break
+            await asyncio.sleep(0.02)
+        await bus.stop()
+
+        # Processed, but its report never went out, so it was not acked
+        assert len(os.listdir(transport.processing_dir)) == 1
+
+        restarted = FileSpoolTransport(str(tmp_path), poll_interval=0.01)
+        bus = MessageBus(EchoAgent(), restarted, batch_size=10, flush_interval=0.05)
+        await bus.start()
+        for _ in range(100):
+            if any(m.get("related_message_id") == "task-1" for m in published(restarted)):
+                break
+            await asyncio.sleep(0.02)
+        await bus.stop()
+
+        assert [m["related_message_id"] for m in published(restarted) if m["type"] == MessageType.COMPLETION_REPORT.value] == ["task-1"]
+        assert os.listdir(restarted.processing_dir) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,99 @@
+"""
+Tests for the response cache: eviction order per policy and TTL expiry,
+against both LTM engines.
+Run with: python -m pytest -q test_response_cache.py
+"""
+
+import time
+
+import pytest
+
+from shared.ltm_sqlite import SQLiteLTMStorage
+from shared.ltm_storage import LTMStorage
+from shared.response_cache import ResponseCache
+
+
+@pytest.fixture(params=["json", "sqlite"])
+def ltm(request, tmp_path):
+    engine = LTMStorage if request.param == "json" else SQLiteLTMStorage
+    storage = engine(str(tmp_path), flush_interval=60)
+    yield storage
+    storage.close()
+
+
+def put_all(cache: ResponseCache, queries):
+    """Store a response per query, with distinct timestamps."""
+    for query in queries:
+        assert cache.put(query, f"answer to {query}")
+        time.sleep(0.002)
+
+
+def cached(cache: ResponseCache, queries):
+    """The queries that are still cached. Counts as an access, so check last."""
+    return [query for query in queries if cache.ltm.read_entry(cache.ltm._generate_key(query)) is not None]
+
+
+def test_lru_evicts_least_recently_used(ltm):
+    cache = ResponseCache(ltm, max_size=3, policy="lru")
+    put_all(cache, ["a", "b", "c"])
+
+    # "a" is the oldest write but the most recent read
+    assert cache.get("a") == "answer to a"
+    time.sleep(0.002)
+
+    # Evicts "b", then "c"
+    put_all(cache, ["d", "e"])
+    assert cache.stats()["evictions"] == 2
+    assert cached(cache, ["a", "b", "c", "d", "e"]) == ["a", "d", "e"]
+
+
+def test_lfu_evicts_least_frequently_used(ltm):
+    cache = ResponseCache(ltm, max_size=3, policy="lfu")
+    put_all(cache, ["a", "b", "c"])
+    for _ in range(3):
+        cache.get("a")
+    cache.get("c")
+
+    # "b" and the new "d" were never read; ties go to the older entry
+    put_all(cache, ["d"])
+    assert cache.stats()["evictions"] == 1
+    assert cached(cache, ["a", "b", "c", "d"]) == ["a", "c", "d"]
+
+
+def test_expired_entries_are_misses_and_removed(ltm):
+    cache = ResponseCache(ltm, ttl=0.05)
+    put_all(cache, ["a"])
+    assert cache.get("a") == "answer to a"
+
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert len(ltm) == 0
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["expirations"] == 1
+    assert stats["misses"] == 1
+
+
+def test_zero_ttl_never_expires(ltm):
+    cache = ResponseCache(ltm, ttl=0)
+    put_all(cache, ["a"])
+    time.sleep(0.01)
+    assert cache.get("a") == "answer to a"
+
+
+def test_rejects_unknown_policy(ltm):
+    with pytest.raises(ValueError):
+        ResponseCache(ltm, policy="fifo")
+
+
+def test_lfu_keeps_the_entry_just_stored(ltm):
+    cache = ResponseCache(ltm, max_size=3, policy="lfu")
+    put_all(cache, ["a", "b", "c"])
+    for query in ["a", "b", "c"]:
+        cache.get(query)
+
+    # "d" has the lowest count, but evicting it would drop every new answer
+    put_all(cache, ["d"])
+    assert cache.stats()["evictions"] == 1
+    assert cached(cache, ["a", "b", "c", "d"]) == ["b", "c", "d"]
@@ -0,0 +1,108 @@
+"""
+Tests for LLMScheduler admission, priority order and cancellation.
+Run with: python -m pytest -q test_scheduler.py
+"""
+
+import asyncio
+
+import pytest
+
+from communication.protocol import TaskPriority
+from shared.scheduler import LLMScheduler, SchedulerFullError
+
+
+async def settle():
+    """Let every ready task run."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_waiters_are_admitted_by_priority_then_fifo():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=10)
+        await scheduler.acquire()
+        order = []
+
+        async def wait(name, priority):
+            await scheduler.acquire(priority)
+            order.append(name)
+
+        tasks = [
+            asyncio.create_task(wait("low", TaskPriority.LOW)),
+            asyncio.create_task(wait("medium-1", TaskPriority.MEDIUM)),
+            asyncio.create_task(wait("critical", TaskPriority.CRITICAL)),
+            asyncio.create_task(wait("medium-2", TaskPriority.MEDIUM))
+        ]
+        await settle()
+        assert scheduler.queue_depth == 4
+
+        for _ in tasks:
+            scheduler.release()
+            await settle()
+        await asyncio.gather(*tasks)
+        assert order == ["critical", "medium-1", "medium-2", "low"]
+        assert scheduler.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await settle()
+
+        with pytest.raises(SchedulerFullError):
+            await scheduler.acquire()
+        assert scheduler.stats()["rejected"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+
+    asyncio.run(scenario())
+
+
+def test_release_between_cancel_and_resume_frees_the_slot():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=10)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire())
+        await settle()
+        assert scheduler.queue_depth == 1
+
+        # The waiter's future is cancelled now, but its task only resumes later
+        waiter.cancel()
+        scheduler.release()
+        assert scheduler.in_flight == 0
+        assert scheduler.queue_depth == 0
+
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert waiter.cancelled()
+        assert scheduler.in_flight == 0
+        assert scheduler.queue_depth == 0
+
+        # The slot is usable again
+        assert await scheduler.acquire() == 0.0
+        assert scheduler.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_skipped_by_later_release():
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, max_queue=10)
+        await scheduler.acquire()
+        cancelled = asyncio.create_task(scheduler.acquire(TaskPriority.HIGH))
+        waiting = asyncio.create_task(scheduler.acquire(TaskPriority.LOW))
+        await settle()
+
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert scheduler.queue_depth == 1
+
+        scheduler.release()
+        await waiting
+        assert scheduler.in_flight == 1
+        assert scheduler.queue_depth == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,46 @@
+"""
+Tests for the semantic index: query signatures and near-duplicate search.
+Run with: python -m pytest -q test_semantic_index.py
+"""
+
+import pytest
+
+from shared.semantic_index import SemanticIndex, query_signature
+
+
+@pytest.mark.parametrize("text, signature", [
+    ("carbon footprint of a NYC-London flight", "|new york london"),
+    ("CO2 for a flight from New York to London", "|new york london"),
+    ("How much CO2e does 10,000 kWh emit?", "10000|"),
+    ("Electricity emissions in the UK", "|united kingdom"),
+    ("500 MWh in Germany", "500|germany"),
+])
+def test_signature(text, signature):
+    assert query_signature(text) == signature
+
+
+def test_matches_the_paraphrase_from_the_request():
+    index = SemanticIndex()
+    index.add("flight", "carbon footprint of a NYC-London flight")
+
+    match = index.search("CO2 for a flight from New York to London")
+    assert match is not None
+    assert match[0] == "flight"
+    assert match[1] >= index.threshold
+
+
+def test_co2_is_neither_a_number_nor_a_name():
+    index = SemanticIndex(threshold=0.5)
+    index.add("flight", "How much CO2 does a flight from New York to London emit?")
+    assert index.search("What are the emissions of a flight from New York to London?")[0] == "flight"
+
+
+@pytest.mark.parametrize("stored, query", [
+    ("Emissions of 500 MWh of electricity in Germany", "Emissions of 900 MWh of electricity in Germany"),
+    ("CO2 for a flight from New York to London", "CO2 for a flight from London to New York"),
+    ("Compare flying vs the train from Paris to Rome", "Compare flying vs the train from Paris to Berlin"),
+])
+def test_different_numbers_or_places_never_match(stored, query):
+    index = SemanticIndex(threshold=0.0)
+    index.add("stored", stored)
+    assert index.search(query) is None
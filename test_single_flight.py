@@ -0,0 +1,68 @@
+"""
+Tests for single-flight request coalescing.
+Run with: python -m pytest -q test_single_flight.py
+"""
+
+import asyncio
+
+from shared.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_execution_and_report_waiters():
+    async def scenario():
+        flight = SingleFlight(linger=1.0)
+        release = asyncio.Event()
+        calls = 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        callers = [asyncio.create_task(flight.do("a", work)) for _ in range(3)]
+        callers.append(asyncio.create_task(flight.do("b", work)))
+        await asyncio.sleep(0.01)
+
+        stats = flight.stats()
+        assert stats["in_flight"] == 2
+        assert stats["waiters"] == {"a": 3, "b": 1}
+        assert stats["total_waiters"] == 4
+        assert stats["max_waiters"] == 3
+
+        release.set()
+        assert await asyncio.gather(*callers) == ["answer"] * 4
+        assert calls == 2
+
+        # Within the linger window a late caller gets the result without running work
+        assert await flight.do("a", work) == "answer"
+        stats = flight.stats()
+        assert stats["total_waiters"] == 0
+        assert (stats["executions"], stats["coalesced"], stats["late_joins"]) == (2, 2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_work_is_cancelled_only_when_every_caller_is():
+    async def scenario():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def work():
+            started.set()
+            await asyncio.sleep(10)
+
+        first = asyncio.create_task(flight.do("a", work))
+        second = asyncio.create_task(flight.do("a", work))
+        await started.wait()
+
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert flight.stats()["in_flight"] == 1
+
+        second.cancel()
+        await asyncio.gather(second, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())